@@ -0,0 +1,85 @@
+"""This script benchmarks the import time of every entry point of fanet, so a module that loads a heavy library on import (cplex, matplotlib) is caught before the short-lived worker processes pay for it.
+    Every import is timed in a new interpreter, several times, with python -X importtime. We record the wall time of the process minus the one of an empty interpreter, the cumulative import time of the module reported by python, and the heavy libraries it loaded.
+    Usage: python benchmarks/benchmark_imports.py [--output FILE] [--compare FILE] [--repeats N]
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmark_model_build import RESULTS_DIR, get_commit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/"
+# Modules run as scripts (refer to the makefile and the README), and the plotting module imported by the analysis scripts
+ENTRY_POINTS = ["fanet.generate_traces", "fanet.scenario_generator", "fanet.trace_store", "fanet.solve_milp", "fanet.sweep_scheduler", "fanet.parallel_runner",
+                "fanet.results_catalog", "fanet.telemetry_summary", "fanet.tune_cplex", "fanet.solver_service", "fanet.online_planner", "fanet.lagrangian",
+                "fanet.column_generation", "fanet.multi_resolution", "fanet.basic_plots"]
+# Libraries that must only be loaded when a solve or a plot is requested
+HEAVY_LIBRARIES = ["cplex", "matplotlib", "pandas"]
+# Line of python -X importtime: "import time: self [us] | cumulative | imported package"
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+def time_import(module: str) -> dict:
+    """Imports module in a new interpreter and returns the wall time of the process in seconds, the cumulative import time of the module in seconds and the heavy libraries it loaded."""
+    code = f"import sys; import {module}; print(' '.join(library for library in {HEAVY_LIBRARIES!r} if library in sys.modules))" if module else "pass"
+    environment = dict(os.environ, PYTHONPATH=BASE_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=BASE_DIR, env=environment, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    wall_time = time.perf_counter() - start
+    cumulative = {match.group(3): int(match.group(2)) for match in map(IMPORT_TIME_LINE.match, process.stderr.decode().splitlines()) if match}
+    return {"wall_time": wall_time, "import_time": cumulative.get(module, 0) / 1e6, "heavy_libraries": process.stdout.decode().split()}
+
+def benchmark_module(module: str, repeats: int, baseline: float) -> dict:
+    """Returns the median of repeats imports of module, with the wall time of an empty interpreter (baseline) subtracted."""
+    runs = [time_import(module) for _ in range(repeats)]
+    return {"module": module,
+            "wall_time": float(np.median([run["wall_time"] for run in runs])) - baseline,
+            "import_time": float(np.median([run["import_time"] for run in runs])),
+            "heavy_libraries": runs[0]["heavy_libraries"]}
+
+def compare(results: dict, reference: dict) -> None:
+    """Prints the change of the import time of each entry point with respect to a reference benchmark."""
+    reference_results = {result["module"]: result for result in reference["results"]}
+    print(f"Comparison with {reference['commit']}:")
+    for result in results["results"]:
+        if result["module"] in reference_results:
+            reference_result = reference_results[result["module"]]
+            print(f"  {result['module']}: {reference_result['import_time'] * 1e3:.0f} ms -> {result['import_time'] * 1e3:.0f} ms, heavy libraries {reference_result['heavy_libraries']} -> {result['heavy_libraries']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the import time of the entry points of fanet.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are saved. Defaults to benchmarks/results/imports_<commit>.json.")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous benchmark to compare with.")
+    parser.add_argument("--repeats", type=int, default=5, help="Number of imports of each module, the median is reported.")
+    args = parser.parse_args()
+
+    baseline = float(np.median([time_import("")["wall_time"] for _ in range(args.repeats)]))
+    print(f"Empty interpreter: {baseline * 1e3:.0f} ms")
+    results = []
+    for module in ENTRY_POINTS:
+        try:
+            result = benchmark_module(module, args.repeats, baseline)
+        except subprocess.CalledProcessError as error:
+            # The entry point cannot be imported on this machine, e.g. a missing library
+            result = {"module": module, "wall_time": np.nan, "import_time": np.nan, "heavy_libraries": [], "error": error.stderr.decode().strip().splitlines()[-1]}
+        results.append(result)
+        print(f"{module}: " + (f"failed ({result['error']})" if "error" in result else f"{result['import_time'] * 1e3:.0f} ms import, {result['wall_time'] * 1e3:.0f} ms over an empty interpreter, heavy libraries: {', '.join(result['heavy_libraries']) or 'none'}"), flush=True)
+
+    benchmark = {"commit": get_commit(),
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "python": platform.python_version(),
+                 "machine": platform.machine(),
+                 "baseline": baseline,
+                 "results": results}
+    output = args.output if args.output is not None else RESULTS_DIR + f"imports_{benchmark['commit']}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(benchmark, file, indent=1)
+    print(f"Results saved to {output}")
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            compare(benchmark, json.load(file))
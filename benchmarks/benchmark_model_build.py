@@ -0,0 +1,215 @@
+"""This script benchmarks the construction of MilpModel over a grid of parameters and saves the results as JSON, so regressions in the Python-side build can be caught by comparing commits.
+    Each parameter (n_positions, n_targets, n_drones, observation_period, heights) is varied on its own around a base configuration.
+    For every configuration we record the time of each build phase, the peak memory and the number of variables, constraints and nonzeros, and we fit the scaling exponent of each metric with respect to each parameter.
+    Every configuration is built in a new process so the peak memory of one does not hide the others.
+    Usage: python benchmarks/benchmark_model_build.py [--output FILE] [--compare FILE] [--trace-python-memory] [--quick] [--chunk-size N]
+"""
+from typing import Optional
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__)) + "/"
+RESULTS_DIR = BENCHMARKS_DIR + "results/"
+# Configuration around which each parameter is varied
+BASE_CONFIGURATION = {"n_positions": 3, "n_targets": 10, "n_drones": 5, "observation_period": 5, "heights": [45]}
+# Values taken by each parameter
+PARAMETER_GRID = {
+    "n_positions": [2, 3, 4, 5, 6],
+    "n_targets": [5, 10, 20, 40, 80],
+    "n_drones": [2, 5, 10, 20],
+    "observation_period": [2, 5, 10, 20],
+    "heights": [[45], [30, 45], [15, 30, 45], [15, 25, 35, 45]],
+}
+# Smaller grid for a quick check
+QUICK_PARAMETER_GRID = {
+    "n_positions": [2, 3, 4],
+    "n_targets": [5, 10, 20],
+    "n_drones": [2, 5, 10],
+    "observation_period": [2, 5, 10],
+    "heights": [[45], [30, 45], [15, 30, 45]],
+}
+# Metrics for which the scaling exponents are fitted
+SCALING_METRICS = ["build_time", "peak_memory_mb", "n_variables", "n_constraints", "n_nonzeros"]
+
+def get_configurations(parameter_grid: dict) -> list:
+    """Returns the configurations obtained by varying each parameter of BASE_CONFIGURATION on its own.
+
+    Returns:
+        List of tuples (varied parameter, configuration). The base configuration appears once for each parameter.
+    """
+    configurations = []
+    for parameter, values in parameter_grid.items():
+        for value in values:
+            configuration = dict(BASE_CONFIGURATION)
+            configuration[parameter] = value
+            configurations.append((parameter, configuration))
+    return configurations
+
+def get_parameter_size(parameter: str, configuration: dict) -> float:
+    """Returns the numeric size of a parameter, used as the x axis when fitting the scaling exponents. For n_positions this is the number of deployment positions n_positions^2 * |heights|."""
+    if parameter == "n_positions":
+        return configuration["n_positions"] ** 2 * len(configuration["heights"])
+    if parameter == "heights":
+        return len(configuration["heights"])
+    return configuration[parameter]
+
+def build_in_phases(model, phases: dict) -> None:
+    """Builds a model as MilpModel.build_model does without chunks, and saves the time of each phase in phases."""
+    start = time.perf_counter()
+    model.define_all_variables()
+    phases["define_variables"] = time.perf_counter() - start
+    start = time.perf_counter()
+    model.define_all_constraints()
+    phases["define_constraints"] = time.perf_counter() - start
+    start = time.perf_counter()
+    objective_function = model.get_objective_function()
+    phases["objective_function"] = time.perf_counter() - start
+    start = time.perf_counter()
+    model.set_variables_to_cplex()
+    phases["variables_to_cplex"] = time.perf_counter() - start
+    start = time.perf_counter()
+    model.set_constraints_to_cplex()
+    phases["constraints_to_cplex"] = time.perf_counter() - start
+    start = time.perf_counter()
+    model.set_objective_function_to_cplex(objective_function, maximize=False)
+    phases["objective_to_cplex"] = time.perf_counter() - start
+
+def build_configuration(configuration: dict, trace_python_memory: bool, connection, chunk_size: Optional[int] = None) -> None:
+    """Builds the model of a configuration phase by phase and sends the measurements through connection. This is the target of the benchmark processes.
+
+    Args:
+        configuration: Dictionary with the keys of BASE_CONFIGURATION.
+        trace_python_memory: If True, also measures the peak memory allocated by Python with tracemalloc. This slows the build down.
+        connection: Connection where the dictionary of measurements is sent.
+        chunk_size: If not None, the model is built in chunks (refer to MilpModel.build_model) and timed as a single phase. Defaults to None.
+    """
+    from fanet.graph import Graph
+    from fanet.milp_model import MilpModel
+    from fanet.targets_trace import TargetsTrace
+
+    np.random.seed(0)
+    graph = Graph(100, configuration["heights"], (0, 0, 0), configuration["n_positions"], 60, np.pi/6)
+    trace = TargetsTrace(configuration["n_targets"], configuration["observation_period"], 10, 100)
+    model = MilpModel(n_available_drones=configuration["n_drones"],
+                      observation_period=configuration["observation_period"],
+                      time_step_delta=1,
+                      targets_trace=trace,
+                      input_graph=graph,
+                      alpha=0.5,
+                      beta=0.08095)
+    model.model_shut_up()
+    if trace_python_memory:
+        tracemalloc.start()
+
+    phases = {}
+    start = time.perf_counter()
+    if chunk_size is not None:
+        model.build_model(chunk_size)
+        phases["build_in_chunks"] = time.perf_counter() - start
+    else:
+        build_in_phases(model, phases)
+
+    measurements = {"phases": phases, "build_time": sum(phases.values())}
+    measurements.update(model.get_model_size())
+    if trace_python_memory:
+        measurements["python_peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    # ru_maxrss is in kB on Linux
+    measurements["peak_memory_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    model.cplex_finish()
+    connection.send(measurements)
+    connection.close()
+
+def run_configuration(configuration: dict, trace_python_memory: Optional[bool] = False, chunk_size: Optional[int] = None) -> dict:
+    """Builds the model of a configuration in a new process and returns its measurements. Refer to build_configuration."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=build_configuration, args=(configuration, trace_python_memory, sender, chunk_size))
+    process.start()
+    measurements = receiver.recv()
+    process.join()
+    return measurements
+
+def fit_scaling_exponents(results: list) -> dict:
+    """Fits metric = c * size^exponent for each varied parameter and each metric in SCALING_METRICS, by least squares on a log-log scale.
+
+    Args:
+        results: List of dictionaries with the keys "parameter", "size" and the metrics.
+
+    Returns:
+        Dictionary {parameter: {metric: exponent}}.
+    """
+    exponents = {}
+    for parameter in set(result["parameter"] for result in results):
+        points = [result for result in results if result["parameter"] == parameter]
+        sizes = np.log([point["size"] for point in points])
+        exponents[parameter] = {}
+        for metric in SCALING_METRICS:
+            values = [point[metric] for point in points]
+            if len(set(sizes)) < 2 or min(values) <= 0:
+                continue
+            exponents[parameter][metric] = float(np.polyfit(sizes, np.log(values), 1)[0])
+    return exponents
+
+def get_commit() -> str:
+    """Returns the current git commit, or "unknown" outside a git repository."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARKS_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True).stdout.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(results: dict, reference: dict) -> None:
+    """Prints the relative change of the build time, peak memory and model size of each configuration with respect to a reference benchmark."""
+    reference_results = {json.dumps(result["configuration"], sort_keys=True): result for result in reference["results"]}
+    print(f"Comparison with {reference['commit']} (relative change):")
+    for result in results["results"]:
+        key = json.dumps(result["configuration"], sort_keys=True)
+        if key not in reference_results:
+            continue
+        changes = ", ".join(f"{metric}: {result[metric] / reference_results[key][metric] - 1:+.1%}" for metric in SCALING_METRICS if reference_results[key][metric] > 0)
+        print(f"  {result['parameter']}={result['configuration'][result['parameter']]}: {changes}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the construction of MilpModel.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are saved. Defaults to benchmarks/results/model_build_<commit>.json.")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous benchmark to compare with.")
+    parser.add_argument("--trace-python-memory", action="store_true", help="Also measures the peak memory allocated by Python (slower).")
+    parser.add_argument("--quick", action="store_true", help="Uses a smaller grid of parameters.")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Builds the models in chunks of this size (refer to MilpModel.build_model).")
+    args = parser.parse_args()
+
+    results = []
+    done = {}
+    for parameter, configuration in get_configurations(QUICK_PARAMETER_GRID if args.quick else PARAMETER_GRID):
+        key = json.dumps(configuration, sort_keys=True)
+        if key not in done:
+            done[key] = run_configuration(configuration, args.trace_python_memory, args.chunk_size)
+        measurements = done[key]
+        results.append(dict(measurements, parameter=parameter, size=get_parameter_size(parameter, configuration), configuration=configuration))
+        print(f"{parameter}={configuration[parameter]}: build {measurements['build_time']:.2f}s, peak {measurements['peak_memory_mb']:.0f} MB, {measurements['n_variables']} variables, {measurements['n_constraints']} constraints, {measurements['n_nonzeros']} nonzeros", flush=True)
+
+    benchmark = {"commit": get_commit(),
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "python": platform.python_version(),
+                 "machine": platform.machine(),
+                 "results": results,
+                 "exponents": fit_scaling_exponents(results)}
+    for parameter, exponents in benchmark["exponents"].items():
+        print(f"Scaling with {parameter}: " + ", ".join(f"{metric} ~ x^{exponent:.2f}" for metric, exponent in exponents.items()))
+
+    output = args.output if args.output is not None else RESULTS_DIR + f"model_build_{benchmark['commit']}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(benchmark, file, indent=1)
+    print(f"Results saved to {output}")
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            compare(benchmark, json.load(file))
@@ -0,0 +1,98 @@
+"""This script benchmarks the formulations of the drone movements of MilpModel (refer to MilpModel.define_drone_movement_constraints) on the same instances and saves the results as JSON.
+    For every configuration and formulation we record the size of the model, its build time, the bound and the time of its LP relaxation, and the objective value, MIP gap and time of the MILP.
+    Every formulation of a configuration solves the same trace, so their optima must agree.
+    Usage: python benchmarks/benchmark_movement_formulations.py [--output FILE] [--compare FILE] [--time-limit SECONDS] [--quick]
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import numpy as np
+from benchmark_model_build import RESULTS_DIR, get_commit
+
+# Instances solved with every formulation
+CONFIGURATIONS = [
+    {"n_positions": 3, "n_targets": 5, "n_drones": 3, "observation_period": 5, "heights": [45]},
+    {"n_positions": 3, "n_targets": 10, "n_drones": 5, "observation_period": 5, "heights": [45]},
+    {"n_positions": 4, "n_targets": 10, "n_drones": 5, "observation_period": 5, "heights": [45]},
+    {"n_positions": 4, "n_targets": 20, "n_drones": 10, "observation_period": 5, "heights": [45]},
+    {"n_positions": 5, "n_targets": 20, "n_drones": 10, "observation_period": 5, "heights": [45]},
+]
+# Smaller set of instances for a quick check
+QUICK_CONFIGURATIONS = CONFIGURATIONS[:2]
+# Metrics compared between commits
+COMPARED_METRICS = ["build_time", "lp_time", "solution_time", "n_constraints", "n_nonzeros"]
+
+def run_configuration(configuration: dict, movement_formulation: str, time_limit: float) -> dict:
+    """Builds and solves the model of a configuration with a formulation of the drone movements and returns its measurements."""
+    from fanet.graph import Graph
+    from fanet.milp_model import MilpModel
+    from fanet.targets_trace import TargetsTrace
+
+    graph = Graph(100, configuration["heights"], (0, 0, 0), configuration["n_positions"], 60, np.pi/6)
+    trace = TargetsTrace(configuration["n_targets"], configuration["observation_period"], 10, 100, seed=0, graph=graph)
+    model = MilpModel(n_available_drones=configuration["n_drones"],
+                      observation_period=configuration["observation_period"],
+                      time_step_delta=1,
+                      targets_trace=trace,
+                      input_graph=graph,
+                      alpha=0.5,
+                      beta=0.08095,
+                      movement_formulation=movement_formulation)
+    model.model_shut_up()
+    model.set_time_limit(time_limit)
+    start = time.perf_counter()
+    model.build_model()
+    measurements = {"build_time": time.perf_counter() - start}
+    measurements.update(model.get_model_size())
+    relaxation = model.solve_lp_relaxation()
+    measurements["lp_bound"], measurements["lp_time"] = relaxation["lp_bound"], relaxation["solution_time"]
+    model.solve_model()
+    solution = model.get_solution()
+    measurements.update({"status": solution.status, "objective_value": solution.objective_value, "mip_gap": solution.mip_gap, "solution_time": solution.solution_time})
+    model.cplex_finish()
+    return measurements
+
+def compare(results: dict, reference: dict) -> None:
+    """Prints the relative change of the metrics of each configuration and formulation with respect to a reference benchmark."""
+    reference_results = {json.dumps([result["configuration"], result["movement_formulation"]], sort_keys=True): result for result in reference["results"]}
+    print(f"Comparison with {reference['commit']} (relative change):")
+    for result in results["results"]:
+        key = json.dumps([result["configuration"], result["movement_formulation"]], sort_keys=True)
+        if key not in reference_results:
+            continue
+        changes = ", ".join(f"{metric}: {result[metric] / reference_results[key][metric] - 1:+.1%}" for metric in COMPARED_METRICS if reference_results[key][metric] > 0)
+        print(f"  {result['configuration']} {result['movement_formulation']}: {changes}")
+
+if __name__ == "__main__":
+    from fanet.milp_model import MOVEMENT_FORMULATIONS
+    parser = argparse.ArgumentParser(description="Benchmarks the formulations of the drone movements of MilpModel.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are saved. Defaults to benchmarks/results/movement_formulations_<commit>.json.")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous benchmark to compare with.")
+    parser.add_argument("--time-limit", type=float, default=600, help="cplex time limit of each MILP in seconds.")
+    parser.add_argument("--quick", action="store_true", help="Uses a smaller set of instances.")
+    args = parser.parse_args()
+
+    results = []
+    for configuration in QUICK_CONFIGURATIONS if args.quick else CONFIGURATIONS:
+        for movement_formulation in MOVEMENT_FORMULATIONS:
+            measurements = run_configuration(configuration, movement_formulation, args.time_limit)
+            results.append(dict(measurements, configuration=configuration, movement_formulation=movement_formulation))
+            print(f"{configuration} {movement_formulation}: {measurements['n_constraints']} constraints, {measurements['n_nonzeros']} nonzeros, build {measurements['build_time']:.2f}s | "
+                  f"LP bound {measurements['lp_bound']:.4f} in {measurements['lp_time']:.2f}s | objective {measurements['objective_value']:.4f} (gap {measurements['mip_gap']:.2%}) in {measurements['solution_time']:.2f}s", flush=True)
+
+    benchmark = {"commit": get_commit(),
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "python": platform.python_version(),
+                 "machine": platform.machine(),
+                 "time_limit": args.time_limit,
+                 "results": results}
+    output = args.output if args.output is not None else RESULTS_DIR + f"movement_formulations_{benchmark['commit']}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(benchmark, file, indent=1)
+    print(f"Results saved to {output}")
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            compare(benchmark, json.load(file))
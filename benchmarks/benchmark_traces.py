@@ -0,0 +1,75 @@
+"""This script benchmarks the generation of feasible traces and saves the results as JSON: drawing whole traces until one is feasible against restricting the walks to the coverage of the graph (refer to targets_trace.generate_covered_positions).
+    For every number of targets we record the share of unrestricted traces that are feasible, the time per feasible trace that whole-trace rejection would take, and the time per trace of generate_covered_positions.
+    Usage: python benchmarks/benchmark_traces.py [--output FILE] [--compare FILE] [--instances N]
+"""
+import argparse
+import json
+import os
+import platform
+import time
+import numpy as np
+from benchmark_model_build import RESULTS_DIR, get_commit
+
+# Numbers of targets of the traces, on the graph of GRAPH_CONFIGURATION
+N_TARGETS = [10, 20, 50, 100]
+GRAPH_CONFIGURATION = {"area_size": 100, "heights": [45], "n_positions": 3, "comm_range": 60, "observation_period": 5, "target_speed": 10}
+# Metrics compared between commits
+COMPARED_METRICS = ["rejection_time", "covered_time"]
+
+def run_n_targets(n_targets: int, n_instances: int) -> dict:
+    """Generates n_instances traces of n_targets targets with each method and returns their measurements."""
+    from fanet.graph import Graph
+    from fanet.targets_trace import generate_positions_batch, generate_covered_positions
+
+    configuration = GRAPH_CONFIGURATION
+    graph = Graph(configuration["area_size"], configuration["heights"], (0, 0, 0), configuration["n_positions"], configuration["comm_range"], np.pi/6)
+    start = time.perf_counter()
+    batch = generate_positions_batch(n_instances, n_targets, configuration["observation_period"], configuration["target_speed"], configuration["area_size"], seed=0)
+    acceptance = float(graph.is_covered(batch).all(axis=(1, 2)).mean())
+    # Expected time to draw one feasible trace, bounded by the resolution of the sample if no trace is feasible
+    rejection_time = (time.perf_counter() - start) / n_instances / max(acceptance, 1 / n_instances)
+    start = time.perf_counter()
+    for instance in range(n_instances):
+        generate_covered_positions(graph, n_targets, configuration["observation_period"], configuration["target_speed"], configuration["area_size"], seed=instance)
+    covered_time = (time.perf_counter() - start) / n_instances
+    return {"n_targets": n_targets, "acceptance": acceptance, "rejection_time": rejection_time, "covered_time": covered_time}
+
+def compare(results: dict, reference: dict) -> None:
+    """Prints the relative change of the generation times of each number of targets with respect to a reference benchmark."""
+    reference_results = {result["n_targets"]: result for result in reference["results"]}
+    print(f"Comparison with {reference['commit']} (relative change):")
+    for result in results["results"]:
+        if result["n_targets"] not in reference_results:
+            continue
+        changes = ", ".join(f"{metric}: {result[metric] / reference_results[result['n_targets']][metric] - 1:+.1%}" for metric in COMPARED_METRICS if reference_results[result["n_targets"]][metric] > 0)
+        print(f"  {result['n_targets']} targets: {changes}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the generation of feasible traces.")
+    parser.add_argument("--output", default=None, help="JSON file where the results are saved. Defaults to benchmarks/results/traces_<commit>.json.")
+    parser.add_argument("--compare", default=None, help="JSON file of a previous benchmark to compare with.")
+    parser.add_argument("--instances", type=int, default=1000, help="Number of traces generated with each method for each number of targets.")
+    args = parser.parse_args()
+
+    results = []
+    for n_targets in N_TARGETS:
+        result = run_n_targets(n_targets, args.instances)
+        results.append(result)
+        print(f"{n_targets} targets: {result['acceptance']:.1%} of the unrestricted traces feasible, {result['rejection_time'] * 1e3:.2f} ms per feasible trace by rejection, "
+              f"{result['covered_time'] * 1e3:.2f} ms per trace restricted to the coverage", flush=True)
+
+    benchmark = {"commit": get_commit(),
+                 "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "python": platform.python_version(),
+                 "machine": platform.machine(),
+                 "configuration": GRAPH_CONFIGURATION,
+                 "instances": args.instances,
+                 "results": results}
+    output = args.output if args.output is not None else RESULTS_DIR + f"traces_{benchmark['commit']}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(benchmark, file, indent=1)
+    print(f"Results saved to {output}")
+    if args.compare is not None:
+        with open(args.compare, "r") as file:
+            compare(benchmark, json.load(file))
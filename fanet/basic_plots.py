@@ -1,11 +1,55 @@
 from typing import Optional
-from matplotlib.patches import Circle
-import matplotlib.pyplot as plt
-from matplotlib import collections as mc
+import multiprocessing
+import numpy as np
 from fanet.targets_trace import TargetsTrace
 from fanet.graph import Graph
+from fanet.model_size import get_comm_adjacency
 from fanet.setup.config import FILES_DIR
 
+def create_figure(area_size: float) -> tuple:
+    """Creates the figure and the axes of a plot of the area.
+
+    Returns:
+        Tuple (fig, ax).
+    """
+    # matplotlib is imported by the functions that plot, so importing this module stays cheap
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(6, 6))
+    ax.set(xlim=(0, area_size), ylim=(0, area_size))
+    ax.tick_params(labelsize=16)
+    return fig, ax
+
+def get_comm_links(graph: Graph, positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """Returns the communication links between the positions of the graph and with the base station, as segments.
+
+    Args:
+        graph: Graph of the network.
+        positions: Boolean mask of the deployment positions whose links are returned. Defaults to None (all positions).
+
+    Returns:
+        Array of shape (n_links, 2, 2) with the (x, y) ends of each link.
+    """
+    adjacency, base_adjacency = get_comm_adjacency(graph)
+    if positions is not None:
+        adjacency = adjacency & positions[:, None] & positions[None, :]
+        base_adjacency = base_adjacency & positions
+    points = graph.get_positions_array()[:, :2]
+    # Each pair of positions once
+    first, second = np.nonzero(np.triu(adjacency))
+    base_neighbors = np.flatnonzero(base_adjacency)
+    first = np.concatenate([first, np.full(len(base_neighbors), len(points) - 1)])
+    second = np.concatenate([second, base_neighbors])
+    return np.stack([points[first], points[second]], axis=1)
+
+def draw_graph(ax, graph: Graph) -> None:
+    """Draws the static background of the plots: the deployment positions (red dots), their coverage (red disks) and the communication links (blue dotted lines). Each layer is a single collection."""
+    from matplotlib import collections as mc
+    from matplotlib.patches import Circle
+    centers, radii = graph.get_coverage_disks()
+    ax.add_collection(mc.PatchCollection([Circle(center, radius) for center, radius in zip(centers, radii)], color="r", alpha=0.1))
+    ax.add_collection(mc.LineCollection(get_comm_links(graph), color="b", linestyle=":", linewidth=0.5))
+    ax.scatter(centers[:, 0], centers[:, 1], color="red", marker="o", s=120)
+
 def plot_trace(trace: TargetsTrace, file_name: Optional[str] = FILES_DIR + "trace_plot.eps") -> None:
     """Plots the trace of targets during the whole observation period. Targets are represented by green Xs and their movements are shown with blue lines between subsequent positions.
 
@@ -13,24 +57,18 @@ def plot_trace(trace: TargetsTrace, file_name: Optional[str] = FILES_DIR + "trac
         trace (TargetsTrace): Trace of targets.
         file_name (Optional[str], optional): Name of the file where the plot will be saved. Defaults to FILES_DIR + "trace_plot.eps".
     """
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.set(xlim=(0, trace.area_size), ylim=(0, trace.area_size))
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-
-    # Ploting the history of the sensors
-    for target_trace in trace.trace_set:
-        X_target = [target_position[0] for target_position in target_trace]
-        Y_target = [target_position[1] for target_position in target_trace]
-        edges = []
-        for time_step in range(1, trace.observation_period):
-            edges.append([target_trace[time_step - 1], target_trace[time_step]])
-        lines = mc.LineCollection(edges, linestyle=":", color="blue")  # lines between subsequent positions
-
-        ax.scatter(X_target, Y_target, color="green", marker="x", s=120)  # targets will be green X
-        ax.add_collection(lines)
+    import matplotlib.pyplot as plt
+    from matplotlib import collections as mc
+    fig, ax = create_figure(trace.area_size)
+    positions = trace.get_positions()
+
+    # Ploting the history of the sensors: lines between subsequent positions and targets as green Xs
+    edges = np.stack([positions[:, :-1], positions[:, 1:]], axis=2).reshape(-1, 2, 2)
+    ax.add_collection(mc.LineCollection(edges, linestyle=":", color="blue"))
+    ax.scatter(positions[:, :, 0].flatten(), positions[:, :, 1].flatten(), color="green", marker="x", s=120)
 
     fig.savefig(file_name, bbox_inches="tight", format="eps")
+    plt.close(fig)
 
 def plot_trace_with_coverage(trace: TargetsTrace, graph: Graph, file_name: Optional[str] = FILES_DIR + "trace_plot.png") -> None:
     """Plots the targets trace along with the area coverage of the drones.
@@ -40,57 +78,83 @@ def plot_trace_with_coverage(trace: TargetsTrace, graph: Graph, file_name: Optio
         graph (Graph): Graph of the network.
         file_name (Optional[str], optional): Name of the file where the plot will be saved. Defaults to FILES_DIR + "trace_plot.png".
     """
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.set(xlim=(0, trace.area_size), ylim=(0, trace.area_size))
-    plt.xticks(fontsize=16)
-    plt.yticks(fontsize=16)
-
-    # Ploting the history of the sensors
-    for target_trace in trace.trace_set:
-        X_target = [target_position[0] for target_position in target_trace]
-        Y_target = [target_position[1] for target_position in target_trace]
-        edges = []
-        for time_step in range(1, trace.observation_period):
-            edges.append([target_trace[time_step - 1], target_trace[time_step]])
-
-        ax.scatter(X_target, Y_target, color="green", marker="x", s=120)  # targets will be green X
-    for position in graph.deployment_positions:
-        ax.scatter(position[0], position[1], color="red", marker="o", s=120)
-        position_coverage = Circle((position[0],position[1]), graph.coverage_tan_angle*position[2], color="r", alpha=0.1)
-        for neighboor in graph.get_positions_in_comm_range(position):
-            ax.plot([position[0], neighboor[0]], [position[1], neighboor[1]], color="b", linestyle=":", linewidth=0.5)
-        ax.add_patch(position_coverage)
-    for neighboor in graph.get_positions_in_comm_range(graph.base_station):
-        ax.plot([graph.base_station[0], neighboor[0]], [graph.base_station[1], neighboor[1]], color="b", linestyle=":", linewidth=0.5)
+    import matplotlib.pyplot as plt
+    fig, ax = create_figure(trace.area_size)
+    positions = trace.get_positions()
+    ax.scatter(positions[:, :, 0].flatten(), positions[:, :, 1].flatten(), color="green", marker="x", s=120)  # targets will be green X
+    draw_graph(ax, graph)
 
     fig.savefig(file_name, bbox_inches="tight", format="png")
+    plt.close(fig)
+
+def render_time_steps(positions: np.ndarray, area_size: float, graph: Graph, file_name: str, time_steps: list, deployment: Optional[np.ndarray] = None) -> None:
+    """Saves one plot per time step. The background is drawn once and only the targets (and the drones) are updated between time steps. This is the target of the worker processes of plot_trace_per_time_step.
+
+    Args:
+        positions: Positions of the targets, array of shape (n_targets, observation_period, 2).
+        area_size: Lenght of the square area A.
+        graph: Graph of the network.
+        file_name: Name of the files, the time step is added before the extension.
+        time_steps: Time steps to plot.
+        deployment: Positions of the drones as indices of graph.get_positions_array(), array of shape (observation_period, n_drones). Defaults to None (no drones).
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib import collections as mc
+    from matplotlib.patches import Circle
+    fig, ax = create_figure(area_size)
+    draw_graph(ax, graph)
+    targets = ax.scatter(positions[:, 0, 0], positions[:, 0, 1], color="green", marker="x", s=120, zorder=3)
+    if deployment is not None:
+        graph_positions = graph.get_positions_array()
+        deployed = np.zeros(len(graph_positions), dtype=bool)
+        links = ax.add_collection(mc.LineCollection([], color="b", linewidth=1.5))
+        coverage = ax.add_collection(mc.PatchCollection([], color="b", alpha=0.2))
+        drones = ax.scatter([], [], color="blue", marker="^", s=160, zorder=4)
+        centers, radii = graph.get_coverage_disks()
+
+    for time_step in time_steps:
+        targets.set_offsets(positions[:, time_step])
+        if deployment is not None:
+            deployed[:] = False
+            deployed[deployment[time_step]] = True
+            drones.set_offsets(graph_positions[deployment[time_step], :2])
+            links.set_segments(get_comm_links(graph, deployed[:-1]) if deployed[:-1].any() else [])
+            coverage.set_paths([Circle(center, radius) for center, radius in zip(centers[deployed[:-1]], radii[deployed[:-1]])])
+        fig.savefig(file_name[:-4] + f"_{time_step}.png", bbox_inches="tight", format="png")
+    plt.close(fig)
 
-def plot_trace_per_time_step(trace: TargetsTrace, graph: Graph, file_name: Optional[str] = FILES_DIR + "trace_plot.png") -> None:
+def render_in_parallel(positions: np.ndarray, area_size: float, graph: Graph, file_name: str, deployment: Optional[np.ndarray] = None, n_workers: Optional[int] = 1) -> None:
+    """Splits the time steps between n_workers processes running render_time_steps. With n_workers = 1, renders in this process."""
+    time_steps = list(range(positions.shape[1]))
+    if n_workers <= 1:
+        render_time_steps(positions, area_size, graph, file_name, time_steps, deployment)
+        return
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=render_time_steps, args=(positions, area_size, graph, file_name, time_steps[worker::n_workers], deployment)) for worker in range(n_workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"A plotting process failed with exit code {process.exitcode}")
+
+def plot_trace_per_time_step(trace: TargetsTrace, graph: Graph, file_name: Optional[str] = FILES_DIR + "trace_plot.png", n_workers: Optional[int] = 1) -> None:
     """Plots the trace of all targets for each time step.
 
     Args:
         trace (TargetsTrace): Trace of targets.
         graph (Graph): Graph of the network.
-        file_name (Optional[str], optional): Name of the file where the plot will be saved. Defaults to FILES_DIR + "trace_plot.png". This leads to the creation of multiple files named trace_plot_0.png, trace_plot_1.png, etc. for each time step."""
-    for time_step in range(trace.observation_period):
-        fig, ax = plt.subplots(figsize=(6, 6))
-        ax.set(xlim=(0, trace.area_size), ylim=(0, trace.area_size))
-        plt.xticks(fontsize=16)
-        plt.yticks(fontsize=16)
-
-        # Ploting the history of the sensors
-        for target_trace in trace.trace_set:
-            X_target = target_trace[time_step][0]
-            Y_target = target_trace[time_step][1]
-            ax.scatter(X_target, Y_target, color="green", marker="x", s=120)  # targets will be green X
-        for position in graph.deployment_positions:
-            ax.scatter(position[0], position[1], color="red", marker="o", s=120)
-            position_coverage = Circle((position[0],position[1]), graph.coverage_tan_angle*position[2], color="r", alpha=0.1)
-            for neighboor in graph.get_positions_in_comm_range(position):
-                ax.plot([position[0], neighboor[0]], [position[1], neighboor[1]], color="b", linestyle=":", linewidth=0.5)
-            ax.add_patch(position_coverage)
-        for neighboor in graph.get_positions_in_comm_range(graph.base_station):
-            ax.plot([graph.base_station[0], neighboor[0]], [graph.base_station[1], neighboor[1]], color="b", linestyle=":", linewidth=0.5)
-
-        fig_name = file_name[:-4] + f"_{time_step}.png"
-        fig.savefig(fig_name, bbox_inches="tight", format="png")
+        file_name (Optional[str], optional): Name of the file where the plot will be saved. Defaults to FILES_DIR + "trace_plot.png". This leads to the creation of multiple files named trace_plot_0.png, trace_plot_1.png, etc. for each time step.
+        n_workers (Optional[int], optional): Number of processes rendering the time steps. Defaults to 1."""
+    render_in_parallel(trace.get_positions(), trace.area_size, graph, file_name, n_workers=n_workers)
+
+def plot_deployment(deployment: np.ndarray, trace: TargetsTrace, graph: Graph, file_name: Optional[str] = FILES_DIR + "deployment_plot.png", n_workers: Optional[int] = 1) -> None:
+    """Plots the deployment of the drones over the trace for each time step: the drones (blue triangles), their coverage (blue disks) and the communication links between them and with the base station (blue lines).
+
+    Args:
+        deployment: Integer array of shape (observation_period, n_drones) with the positions of the drones as indices of graph.get_positions_array(). Refer to Solution.deployment or solution.load_solution.
+        trace (TargetsTrace): Trace of targets.
+        graph (Graph): Graph of the network.
+        file_name (Optional[str], optional): Name of the file where the plot will be saved. Defaults to FILES_DIR + "deployment_plot.png". This leads to the creation of multiple files named deployment_plot_0.png, deployment_plot_1.png, etc. for each time step.
+        n_workers (Optional[int], optional): Number of processes rendering the time steps. Defaults to 1."""
+    render_in_parallel(trace.get_positions(), trace.area_size, graph, file_name, np.asarray(deployment, dtype=int), n_workers)
@@ -0,0 +1,267 @@
+"""Column generation over drone trajectories, an alternative to MilpModel whose movement variables grow as D * T * (|P| + 1)^2.
+    Each column is the full trajectory of a drone over the observation period, from the base station and back, with its exact cost (refer to MilpModel.get_cost_matrix).
+    The master problem keeps the coverage and connectivity constraints of MilpModel on the variables z^t_p and chooses n_available_drones trajectories (the drones are identical) with
+        sum_k a^k_{tp} lambda_k = z^t_p    and    sum_k lambda_k = n_available_drones,
+    where a^k_{tp} = 1 if trajectory k is at position p at time step t. The pricing problem is a shortest path in the time-expanded graph of the positions, where the arcs to (t, p) are discounted by the dual of the first constraint, solved by dynamic programming.
+    Price-and-branch: columns are generated until the LP relaxation of the master is optimal, which gives a lower bound, then the master is solved as a MILP with the generated columns, which gives a feasible deployment but is not guaranteed to be optimal.
+    Usage: python fanet/column_generation.py [--n-positions N] [--n-drones D] [--n-targets S] [--instance I] [--iterations K]
+"""
+from typing import Optional
+import argparse
+import time
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel
+from fanet.solution import Solution
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.cplex_constants import *
+from fanet.setup.config import PARAMETERS
+
+def price_trajectories(cost_matrix: np.ndarray, prices: np.ndarray) -> tuple:
+    """Returns, for each position, the trajectory ending there at the last time step that minimizes its cost minus the prices of the (time step, position) pairs it visits.
+
+    Args:
+        cost_matrix: Cost of moving between every pair of positions, indexed as deployment_positions + [base_station].
+        prices: Array of shape (observation_period, |P| + 1), price of being at each position at each time step.
+
+    Returns:
+        Tuple (trajectories, values): integer array of shape (|P| + 1, observation_period) with the position of the trajectories at each time step, and array of shape (|P| + 1,) with their cost minus their prices, including the departure from and the return to the base station.
+    """
+    observation_period, n_positions = prices.shape
+    base_station = n_positions - 1
+    values = cost_matrix[base_station] - prices[0]
+    predecessors = np.zeros((observation_period, n_positions), dtype=int)
+    for t in range(1, observation_period):
+        # moves[p, q]: best trajectory at p at time step t - 1 then moving to q
+        moves = values[:, None] + cost_matrix
+        predecessors[t] = np.argmin(moves, axis=0)
+        values = moves[predecessors[t], np.arange(n_positions)] - prices[t]
+    values = values + cost_matrix[:, base_station]
+
+    trajectories = np.zeros((n_positions, observation_period), dtype=int)
+    trajectories[:, -1] = np.arange(n_positions)
+    for t in range(observation_period - 1, 0, -1):
+        trajectories[:, t - 1] = predecessors[t][trajectories[:, t]]
+    return trajectories, values
+
+class TrajectoryMasterModel(MilpModel):
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, model_name: Optional[str] = "Trajectory_Master") -> None:
+        """Master problem of the column generation: the variables z_t_p, the flows and one variable per trajectory, added by add_trajectories. Refer to the description of this module.
+        A continuous variable s_t_p per position and time step lets z^t_p = 1 without a drone at a penalty higher than the cost of any deployment, so the master is feasible before the useful trajectories are generated.
+
+        Args:
+            Refer to MilpModel.
+        """
+        super().__init__(n_available_drones, observation_period, time_step_delta, targets_trace, input_graph, alpha, beta, model_name)
+        self.trajectories = []
+        self.trajectory_costs = []
+        self.penalty = n_available_drones * (observation_period + 1) * max(self.get_cost_matrix().max(), 1) + 1
+
+    def var_s_t_p(self, time_step: int, position: tuple) -> str:
+        """Returns the name of the variable s_t_p, the part of z_t_p not covered by a trajectory."""
+        return f"s_t_{time_step}_p_{position}".replace(" ", "")
+
+    def var_trajectory(self, index: int) -> str:
+        """Returns the name of the variable of the trajectory at index in self.trajectories."""
+        return f"trajectory_{index}"
+
+    def define_all_variables(self) -> None:
+        """Defines the variables z_t_p, s_t_p and the flows. The trajectory variables are added by add_trajectories."""
+        for t in range(self.observation_period):
+            self.define_variable(self.var_z_t_p(t, self.input_graph.base_station), 0, self.n_available_drones, INTEGER_VARIABLE)
+            for p in self.input_graph.deployment_positions:
+                self.define_variable(self.var_z_t_p(t, p), 0, 1, BINARY_VARIABLE)
+        for t in range(self.observation_period):
+            for p in self.input_graph.deployment_positions:
+                self.define_variable(self.var_s_t_p(t, p), 0, 1, CONTINUOUS_VARIABLE)
+        self.define_flow_variables()
+
+    def define_position_use_constraints(self) -> None:
+        """Defines the constraints sum_k a^k_{tp} lambda_k + s^t_p - z^t_p = 0 (the trajectories are added by add_trajectories), and the constraint choosing n_available_drones trajectories."""
+        for t in range(self.observation_period):
+            for p in self.input_graph.deployment_positions:
+                self.define_constraint(f"position_use_constr_t_{t}_p_{p}", [[self.var_s_t_p(t, p), self.var_z_t_p(t, p)], [1, -1]], EQUAL, 0)
+        self.define_constraint("n_trajectories_constr", [[], []], EQUAL, self.n_available_drones)
+
+    def define_all_constraints(self) -> None:
+        """Defines the coverage and connectivity constraints of MilpModel and the constraints linking the trajectories to the variables z_t_p."""
+        self.define_flow_constraints()
+        self.define_drone_flow_constraints()
+        self.define_position_use_constraints()
+
+    def get_objective_function(self) -> list:
+        """Returns the penalty of the variables s_t_p. The cost of the trajectories is set when they are added."""
+        return [(self.var_s_t_p(t, p), self.penalty) for t in range(self.observation_period) for p in self.input_graph.deployment_positions]
+
+    def build_model(self) -> None:
+        """Builds the master problem with the trajectory where every drone stays at the base station, as the LP relaxation. Refer to set_integer."""
+        super().build_model()
+        self.cplex_model.set_problem_type(self.cplex_model.problem_type.LP)
+        # position_use_rows[t, p] is the index of the constraint of (t, p), indexed as deployment_positions
+        names = [f"position_use_constr_t_{t}_p_{p}" for t in range(self.observation_period) for p in self.input_graph.deployment_positions]
+        self.position_use_rows = np.array(self.cplex_model.linear_constraints.get_indices(names)).reshape(self.observation_period, -1)
+        self.n_trajectories_row = self.cplex_model.linear_constraints.get_indices("n_trajectories_constr")
+        base_station = len(self.input_graph.deployment_positions)
+        self.add_trajectories(np.full((1, self.observation_period), base_station))
+
+    def get_trajectory_cost(self, trajectory: np.ndarray) -> float:
+        """Returns the cost of a trajectory of shape (observation_period,), from the base station and back."""
+        cost_matrix = self.get_cost_matrix()
+        base_station = len(self.input_graph.deployment_positions)
+        path = np.concatenate(([base_station], trajectory, [base_station]))
+        return float(cost_matrix[path[:-1], path[1:]].sum())
+
+    def add_trajectories(self, trajectories: np.ndarray) -> None:
+        """Adds one variable per trajectory to the master, as a column of the position use constraints of the positions it visits and of the constraint choosing n_available_drones trajectories.
+
+        Args:
+            trajectories: Integer array of shape (n_trajectories, observation_period) of position indices in deployment_positions + [base_station].
+        """
+        import cplex
+        base_station = len(self.input_graph.deployment_positions)
+        columns, costs = [], []
+        for trajectory in trajectories:
+            rows = [int(self.position_use_rows[t, p]) for t, p in enumerate(trajectory) if p != base_station]
+            columns.append(cplex.SparsePair(ind=rows + [self.n_trajectories_row], val=[1] * (len(rows) + 1)))
+            costs.append(self.get_trajectory_cost(trajectory))
+        names = [self.var_trajectory(len(self.trajectories) + i) for i in range(len(trajectories))]
+        self.cplex_model.variables.add(obj=costs, lb=[0] * len(names), ub=[self.n_available_drones] * len(names), names=names, columns=columns)
+        self.trajectories += [np.array(trajectory) for trajectory in trajectories]
+        self.trajectory_costs += costs
+
+    def get_prices(self) -> tuple:
+        """Returns the duals of the last LP solve.
+
+        Returns:
+            Tuple (prices, n_trajectories_price): array of shape (observation_period, |P| + 1) with the dual of the position use constraint of each (t, p), 0 for the base station, and the dual of the constraint choosing n_available_drones trajectories.
+        """
+        duals = np.array(self.cplex_model.solution.get_dual_values(self.position_use_rows.flatten().tolist()))
+        prices = np.zeros((self.observation_period, len(self.input_graph.deployment_positions) + 1))
+        prices[:, :-1] = duals.reshape(self.observation_period, -1)
+        return prices, self.cplex_model.solution.get_dual_values(self.n_trajectories_row)
+
+    def set_integer(self) -> None:
+        """Turns the master into a MILP over the generated trajectories: z_t_p and the trajectory variables are integer."""
+        self.cplex_model.variables.set_types([(self.var_z_t_p(t, self.input_graph.base_station), INTEGER_VARIABLE) for t in range(self.observation_period)]
+                                             + [(self.var_z_t_p(t, p), BINARY_VARIABLE) for t in range(self.observation_period) for p in self.input_graph.deployment_positions]
+                                             + [(self.var_trajectory(i), INTEGER_VARIABLE) for i in range(len(self.trajectories))])
+
+    def get_deployment(self) -> Optional[np.ndarray]:
+        """Returns the deployment of the chosen trajectories, one drone per unit of their variables, as an integer array of shape (observation_period, n_available_drones). None if the last solve is infeasible or uses the variables s_t_p."""
+        if self.get_solution_status() not in FEASIBLE_STATUS:
+            return None
+        s_values = self.cplex_model.solution.get_values([self.var_s_t_p(t, p) for t in range(self.observation_period) for p in self.input_graph.deployment_positions])
+        if max(s_values) > 1e-6:
+            return None
+        counts = np.round(self.cplex_model.solution.get_values([self.var_trajectory(i) for i in range(len(self.trajectories))])).astype(int)
+        return np.array([trajectory for trajectory, count in zip(self.trajectories, counts) for _ in range(count)]).T
+
+class ColumnGeneration:
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, parameters: Optional[dict] = None) -> None:
+        """Price-and-branch over drone trajectories. Refer to the description of this module.
+
+        Args:
+            parameters: cplex parameters of the master (refer to MilpModel.set_parameters). Defaults to None (cplex defaults).
+            Refer to MilpModel for the other arguments.
+        """
+        self.n_available_drones = n_available_drones
+        self.master = TrajectoryMasterModel(n_available_drones, observation_period, time_step_delta, targets_trace, input_graph, alpha, beta)
+        self.master.model_shut_up()
+        if parameters is not None:
+            self.master.set_parameters(parameters)
+        self.master.build_model()
+        self.generated = {tuple(trajectory) for trajectory in self.master.trajectories}
+
+    def generate_columns(self, max_iterations: Optional[int] = 100, time_limit: Optional[float] = None, verbose: Optional[bool] = False) -> dict:
+        """Solves the LP relaxation of the master and adds the trajectories with negative reduced cost (one per final position) until there are none.
+
+        Args:
+            max_iterations: Maximum number of LP solves. Defaults to 100.
+            time_limit: Time limit in seconds. Defaults to None (no limit).
+            verbose: If True, prints the LP value at every iteration. Defaults to False.
+
+        Returns:
+            Dictionary with the keys lower_bound, converged (no trajectory with negative reduced cost is left), n_iterations and history (array of shape (n_iterations, 4) with the time, LP value, lower bound and number of trajectories of each iteration).
+        """
+        start_time = time.perf_counter()
+        result = {"lower_bound": -np.inf, "converged": False, "n_iterations": 0, "history": []}
+        for iteration in range(max_iterations):
+            self.master.solve_model()
+            result["n_iterations"] = iteration + 1
+            if self.master.get_solution_status() != LP_OPTIMAL_SOLUTION:
+                break
+            lp_value = self.master.cplex_model.solution.get_objective_value()
+            prices, n_trajectories_price = self.master.get_prices()
+            trajectories, values = price_trajectories(self.master.get_cost_matrix(), prices)
+            reduced_costs = values - n_trajectories_price
+            # Since exactly n_available_drones trajectories are chosen, no solution costs less than lp_value + n_available_drones * min reduced cost
+            result["lower_bound"] = max(result["lower_bound"], lp_value + self.n_available_drones * min(reduced_costs.min(), 0))
+            result["history"].append((time.perf_counter() - start_time, lp_value, result["lower_bound"], len(self.master.trajectories)))
+            if verbose:
+                print(f"[{iteration + 1}] LP: {lp_value:.4f} | lower bound: {result['lower_bound']:.4f} | trajectories: {len(self.master.trajectories)}", flush=True)
+            new_trajectories = [trajectory for trajectory, reduced_cost in zip(trajectories, reduced_costs) if reduced_cost < -1e-6 and tuple(trajectory) not in self.generated]
+            if not new_trajectories:
+                result["converged"] = True
+                break
+            self.master.add_trajectories(np.array(new_trajectories))
+            self.generated.update(tuple(trajectory) for trajectory in new_trajectories)
+            if time_limit is not None and time.perf_counter() - start_time >= time_limit:
+                break
+        result["history"] = np.array(result["history"]).reshape(-1, 4)
+        return result
+
+    def solve(self, max_iterations: Optional[int] = 100, time_limit: Optional[float] = None, verbose: Optional[bool] = False) -> dict:
+        """Generates the columns, then solves the master as a MILP over the generated trajectories.
+
+        Args:
+            Refer to generate_columns. The MILP uses the time limit of the cplex parameters.
+
+        Returns:
+            Dictionary with the keys of generate_columns and upper_bound, gap (relative to the upper bound), deployment (array of shape (observation_period, n_available_drones), None if no feasible deployment was found), n_trajectories and solution_time.
+        """
+        start_time = time.perf_counter()
+        result = self.generate_columns(max_iterations, time_limit, verbose)
+        self.master.set_integer()
+        self.master.solve_model()
+        result["deployment"] = self.master.get_deployment()
+        result["upper_bound"] = self.master.get_objective_value() if result["deployment"] is not None else np.inf
+        result["gap"] = (result["upper_bound"] - result["lower_bound"]) / max(abs(result["upper_bound"]), 1e-9)
+        result["n_trajectories"] = len(self.master.trajectories)
+        result["solution_time"] = time.perf_counter() - start_time
+        return result
+
+    def get_solution(self, result: dict) -> Solution:
+        """Returns the deployment of a result of solve as a Solution, with the gap between the bounds as MIP gap and the model size of the master."""
+        return Solution(status=OPTIMAL_TOL_SOLUTION if result["gap"] <= 1e-4 else ABORTED_FEASIBLE,
+                        objective_value=result["upper_bound"] if result["deployment"] is not None else -1,
+                        solution_time=result["solution_time"],
+                        deployment=result["deployment"],
+                        positions=self.master.input_graph.deployment_positions + [self.master.input_graph.base_station],
+                        distance_matrix=self.master.distance_matrix,
+                        energy_matrix=self.master.energy_matrix,
+                        mip_gap=result["gap"],
+                        model_size=self.master.get_model_size(),
+                        lp_bound=result["lower_bound"])
+
+    def finish(self) -> None:
+        """Closes the cplex model of the master."""
+        self.master.cplex_finish()
+
+if __name__ == "__main__":
+    from fanet.trace_store import load_run_trace
+    from fanet.solve_milp import get_graph
+    parser = argparse.ArgumentParser(description="Solves a run described by PARAMETERS by price-and-branch over drone trajectories.")
+    parser.add_argument("--n-positions", type=int, default=PARAMETERS["n_positions"][0])
+    parser.add_argument("--n-drones", type=int, default=PARAMETERS["n_drones"][0])
+    parser.add_argument("--n-targets", type=int, default=PARAMETERS["n_targets"][0])
+    parser.add_argument("--instance", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=100, help="Maximum number of LP solves of the column generation.")
+    parser.add_argument("--time-limit", type=float, default=None, help="Time limit in seconds of the column generation.")
+    args = parser.parse_args()
+
+    trace = load_run_trace(PARAMETERS, args.n_targets, PARAMETERS["targets_speed"][0], args.instance)
+    column_generation = ColumnGeneration(args.n_drones, PARAMETERS["observation_period"], PARAMETERS["time_step_delta"], trace, get_graph(PARAMETERS, args.n_positions), PARAMETERS["alpha"][0], PARAMETERS["beta"], PARAMETERS)
+    result = column_generation.solve(args.iterations, args.time_limit, verbose=True)
+    print(f"Lower bound: {result['lower_bound']:.4f} | upper bound: {result['upper_bound']:.4f} | gap: {result['gap']:.2%} | {result['n_trajectories']} trajectories in {result['solution_time']:.1f}s")
+    print(f"Master: {column_generation.master.get_model_size()}")
+    column_generation.finish()
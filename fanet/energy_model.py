@@ -53,3 +53,23 @@ def energy(d: float, t: float, hover: Optional[bool] = True) -> float:
                 E_aux = Power(v)*d/v
 
     return E_aux
+
+def energy_matrix(distance_matrix: np.ndarray, t: float, hover: np.ndarray) -> np.ndarray:
+    """Returns the minimum energy for every entry of a distance matrix. The numerical search in energy() is run once per distinct (distance, hover) pair instead of once per entry.
+
+    Args:
+        distance_matrix: Array of distances.
+        t: Time available to travel each distance.
+        hover: Boolean array with the same shape as distance_matrix. Refer to energy().
+
+    Returns:
+        Array with the same shape as distance_matrix.
+    """
+    energies = np.zeros(distance_matrix.shape)
+    computed = {}
+    for index, d in np.ndenumerate(distance_matrix):
+        key = (d, bool(hover[index]))
+        if key not in computed:
+            computed[key] = energy(d, t, key[1])
+        energies[index] = computed[key]
+    return energies
@@ -1,13 +1,14 @@
-"""This script generates feasible traces and saves them in the /fanet_deployment/files/traces/ directory.
+"""This script generates feasible traces and saves them in the /fanet_deployment/files/traces/ directory, then converts them to the binary trace store (refer to trace_store.py).
     If the traces already exist, it does nothing."""
 
 import os
 import numpy as np
 from fanet.targets_trace import TargetsTrace
+from fanet.trace_store import convert_experiment_traces
 from fanet.graph import Graph
 from fanet.setup.config import FILES_DIR, PARAMETERS
 
-def create_trace(n_targets, observation_period, target_speed, area_size, my_graph) -> None:
+def create_trace(n_targets, observation_period, target_speed, area_size, my_graph, instance, seed = None) -> None:
     """" Creates a trace and saves it in the /fanet_deployment/files/traces/ directory. It only creates traces that are feasible, i.e., all targets are covered by at least one position for the given graph.
 
     Args:
@@ -16,16 +17,17 @@ def create_trace(n_targets, observation_period, target_speed, area_size, my_grap
         target_speed: Speed of the targets
         area_size: Size of the area
         my_graph: Graph object to determine feasibility.
+        instance: Number of the instance.
+        seed: If not None, the trace is drawn from the generator seeded with [seed, instance], so it can be created again. Defaults to None.
 
     Returns:
         True if the trace was created, False if it already existed."""
-    file_name = FILES_DIR + "/traces/trace_nt_" + str(n_targets) + "_t_" + str(observation_period) + "_v_" + str(target_speed) + "_i_" + str(n) + ".txt"
+    file_name = FILES_DIR + "/traces/trace_nt_" + str(n_targets) + "_t_" + str(observation_period) + "_v_" + str(target_speed) + "_i_" + str(instance) + ".txt"
     if os.path.isfile(file_name):
         print("Trace already exists: " + file_name)
         return False
-    new_trace = TargetsTrace(n_targets, observation_period, target_speed, area_size)
-    while not my_graph.verify_trace_feasiblity(new_trace.trace_set):
-        new_trace = TargetsTrace(n_targets, observation_period, target_speed, area_size)
+    # Restricted to the coverage of my_graph, so the trace is feasible without drawing it again
+    new_trace = TargetsTrace(n_targets, observation_period, target_speed, area_size, seed=None if seed is None else [seed, instance], graph=my_graph)
     new_trace.save_trace(file_name)
     return True
 
@@ -46,4 +48,7 @@ if __name__ == "__main__":
                                 PARAMETERS["observation_period"],
                                 target_speed,
                                 PARAMETERS["area_size"],
-                                my_graph)
+                                my_graph,
+                                n,
+                                PARAMETERS.get("traces_seed"))
+    convert_experiment_traces(PARAMETERS)
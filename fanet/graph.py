@@ -78,6 +78,31 @@ class Graph:
 
         return True
 
+    def get_coverage_disks(self) -> tuple:
+        """Returns the disks of the area covered by each position in P, following get_target_coverage.
+
+        Returns:
+            Tuple (centers, radii): arrays of shape (|P|, 2) and (|P|,).
+        """
+        positions = np.array(self.deployment_positions, dtype=float).reshape(-1, 3)
+        return positions[:, :2], self.coverage_tan_angle * positions[:, 2]
+
+    def is_covered(self, targets_positions: np.ndarray) -> np.ndarray:
+        """Vectorized check of whether target positions are covered by at least one position in P.
+
+        Args:
+            targets_positions: Array of shape (..., 2) with (x, y) positions.
+
+        Returns:
+            Boolean array of shape (...).
+        """
+        centers, radii = self.get_coverage_disks()
+        points = np.asarray(targets_positions, dtype=float)
+        covered = np.zeros(points.shape[:-1], dtype=bool)
+        for center, radius in zip(centers, radii):
+            covered |= np.linalg.norm(points - center, axis=-1) <= radius
+        return covered
+
     def get_distance(self, position1: tuple, position2: tuple) -> float:
         """Returns the distance between two positions.
 
@@ -89,3 +114,16 @@ class Graph:
             Distance between the two positions
         """
         return np.linalg.norm(np.array(position1) - np.array(position2))
+
+    def get_positions_array(self) -> np.ndarray:
+        """Returns the positions P \\cup {base_station} as an array of shape (|P| + 1, 3). The rows follow the order deployment_positions + [base_station], so the base station is always the last row."""
+        return np.array(self.deployment_positions + [self.base_station], dtype=float).reshape(-1, 3)
+
+    def get_distance_matrix(self) -> np.ndarray:
+        """Returns the distances between every pair of positions in P \\cup {base_station}.
+
+        Returns:
+            Array of shape (|P| + 1, |P| + 1) indexed as in get_positions_array.
+        """
+        positions = self.get_positions_array()
+        return np.linalg.norm(positions[:, None, :] - positions[None, :, :], axis=2)
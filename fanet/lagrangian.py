@@ -0,0 +1,228 @@
+"""Lagrangian relaxation of MilpModel by time step, giving lower bounds (and feasible deployments) for instances CPLEX cannot close within the time limit.
+    The time steps are only coupled by the movements of the drones. Writing them as flows, a drone moving to q at time step t comes from exactly one position p of time step t - 1:
+        sum_q z^t_{upq} = z^{t-1}_{up}    and    sum_p z^t_{upq} = z^t_{uq}.
+    The first constraints are dualized with multipliers lambda^t_{up}. What remains splits into one subproblem per time step: a deployment covering the targets of the time step with a connected network, where
+    drone u at position q costs min_p (c_pq + lambda^t_{up}) - lambda^{t+1}_{uq} (plus the deployment cost at t = 0 and the return cost at t = T - 1).
+    Each subproblem is a MilpModel with a single time step whose objective is replaced by these costs, built once and solved again at every iteration, in parallel threads.
+    The sum of the best bounds of the subproblems is a valid lower bound for any multipliers, and the multipliers are updated by subgradient with the Polyak step.
+    Since the drones can move anywhere between time steps, the deployments of the subproblems always form a feasible solution. It is repaired by reordering the drones of each time step to shorten their movements, giving the upper bound.
+    Usage: python fanet/lagrangian.py [--n-positions N] [--n-drones D] [--n-targets S] [--instance I] [--iterations K] [--workers W]
+"""
+from typing import Optional
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel
+from fanet.solution import Solution
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.cplex_constants import FEASIBLE_STATUS, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE
+from fanet.setup.config import PARAMETERS
+
+def match_drones(previous: np.ndarray, current: np.ndarray, cost_matrix: np.ndarray) -> np.ndarray:
+    """Reorders the positions of the drones at a time step so that the drones move less from the previous time step. Greedy assignment of the cheapest moves, then swaps of pairs of drones while they lower the cost.
+
+    Args:
+        previous: Integer array of shape (n_drones,) with the positions of the drones at the previous time step.
+        current: Integer array of shape (n_drones,) with the positions at the time step.
+        cost_matrix: Cost of moving between every pair of positions.
+
+    Returns:
+        The positions of current, reordered.
+    """
+    costs = cost_matrix[previous[:, None], current[None, :]]
+    order = np.full(len(previous), -1)
+    assigned = np.zeros(len(current), dtype=bool)
+    for flat_index in np.argsort(costs, axis=None, kind="stable"):
+        drone, position = divmod(int(flat_index), len(current))
+        if order[drone] < 0 and not assigned[position]:
+            order[drone] = position
+            assigned[position] = True
+    improved = True
+    while improved:
+        improved = False
+        for first in range(len(order)):
+            for second in range(first + 1, len(order)):
+                if costs[first, order[second]] + costs[second, order[first]] < costs[first, order[first]] + costs[second, order[second]] - 1e-9:
+                    order[first], order[second] = order[second], order[first]
+                    improved = True
+    return current[order]
+
+class LagrangianRelaxation:
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, n_workers: Optional[int] = 1, subproblem_time_limit: Optional[float] = 0) -> None:
+        """Builds one subproblem per time step. Refer to the description of this module.
+
+        Args:
+            n_workers: Number of subproblems solved at the same time. Each subproblem then uses one cplex thread. Defaults to 1.
+            subproblem_time_limit: Time limit in seconds of each subproblem, 0 for none. The lower bound stays valid since the best bound of the subproblem is used. Defaults to 0.
+            Refer to MilpModel for the other arguments.
+        """
+        self.n_available_drones = n_available_drones
+        self.observation_period = observation_period
+        self.n_workers = n_workers
+        self.positions = input_graph.deployment_positions + [input_graph.base_station]
+        positions = targets_trace.get_positions()
+        self.subproblems = []
+        for t in range(observation_period):
+            trace = TargetsTrace.from_positions(positions[:, t:t + 1], targets_trace.target_speed, targets_trace.area_size, time_step_delta)
+            subproblem = MilpModel(n_available_drones, 1, time_step_delta, trace, input_graph, alpha, beta, model_name=f"Lagrangian_subproblem_t_{t}")
+            subproblem.model_shut_up()
+            subproblem.set_time_limit(subproblem_time_limit)
+            if n_workers > 1:
+                subproblem.set_threads(1)
+            subproblem.build_model()
+            # The costs are on the variables z_t_drone_p, refer to get_costs
+            subproblem.cplex_model.objective.set_linear([(subproblem.var_z_t_p(0, p), 0) for p in input_graph.deployment_positions])
+            self.subproblems.append(subproblem)
+        self.cost_matrix = self.subproblems[0].get_cost_matrix()
+        # multipliers[t, drone, p] is lambda^t_{up}, multipliers[0] is unused
+        self.multipliers = np.zeros((observation_period, n_available_drones, len(self.positions)))
+
+    def get_costs(self, time_step: int) -> tuple:
+        """Returns the cost of each drone at each position in the subproblem of time_step, and the position each drone comes from.
+
+        Returns:
+            Tuple (costs, predecessors) of arrays of shape (n_available_drones, |P| + 1), indexed as deployment_positions + [base_station].
+        """
+        base_station = len(self.positions) - 1
+        if time_step == 0:
+            # Every drone leaves the base station
+            predecessors = np.full((self.n_available_drones, len(self.positions)), base_station)
+            costs = np.repeat(self.cost_matrix[base_station][None, :], self.n_available_drones, axis=0)
+        else:
+            # moves[drone, p, q] = c_pq + lambda^t_{up}
+            moves = self.cost_matrix[None, :, :] + self.multipliers[time_step][:, :, None]
+            predecessors = np.argmin(moves, axis=1)
+            costs = np.min(moves, axis=1)
+        if time_step < self.observation_period - 1:
+            costs = costs - self.multipliers[time_step + 1]
+        else:
+            # Every drone returns to the base station
+            costs = costs + self.cost_matrix[:, base_station][None, :]
+        return costs, predecessors
+
+    def solve_subproblem(self, time_step: int, costs: np.ndarray) -> tuple:
+        """Solves the subproblem of time_step with the given costs.
+
+        Returns:
+            Tuple (deployment, objective_value, best_bound): deployment is an integer array of shape (n_available_drones,), None if the subproblem has no feasible solution.
+        """
+        subproblem = self.subproblems[time_step]
+        # Within the block z_t_drone_p the base station comes first for each drone
+        block_costs = np.roll(costs, 1, axis=1).flatten()
+        subproblem.cplex_model.objective.set_linear(list(zip(range(subproblem.z_t_drone_p_index, subproblem.z_t_drone_p_index + len(block_costs)), block_costs.tolist())))
+        subproblem.solve_model()
+        if subproblem.get_solution_status() not in FEASIBLE_STATUS:
+            return None, np.nan, np.nan
+        return subproblem.get_solution().deployment[0], subproblem.get_objective_value(), subproblem.cplex_model.solution.MIP.get_best_objective()
+
+    def get_deployment_cost(self, deployment: np.ndarray) -> float:
+        """Returns the objective value of MilpModel for a deployment of shape (observation_period, n_available_drones)."""
+        return Solution(ABORTED_FEASIBLE, -1, 0, deployment, self.positions, self.cost_matrix, self.cost_matrix).get_path_cost(self.cost_matrix)
+
+    def repair(self, deployment: np.ndarray) -> np.ndarray:
+        """Returns the deployment with the drones of each time step reordered by match_drones, if this lowers its cost."""
+        repaired = deployment.copy()
+        for t in range(1, self.observation_period):
+            repaired[t] = match_drones(repaired[t - 1], repaired[t], self.cost_matrix)
+        return repaired if self.get_deployment_cost(repaired) < self.get_deployment_cost(deployment) else deployment
+
+    def solve(self, max_iterations: Optional[int] = 100, time_limit: Optional[float] = None, step_scale: Optional[float] = 2, patience: Optional[int] = 5, tolerance: Optional[float] = 1e-4, verbose: Optional[bool] = False) -> dict:
+        """Runs the subgradient method from the current multipliers.
+
+        Args:
+            max_iterations: Maximum number of iterations. Defaults to 100.
+            time_limit: Time limit in seconds. Defaults to None (no limit).
+            step_scale: Initial scale of the Polyak step, halved after patience iterations without improving the lower bound. Defaults to 2.
+            patience: Refer to step_scale. Defaults to 5.
+            tolerance: The method stops once the relative gap between the bounds is lower or equal to tolerance. Defaults to 1e-4.
+            verbose: If True, prints the bounds at every iteration. Defaults to False.
+
+        Returns:
+            Dictionary with the keys lower_bound, upper_bound, gap (relative to the upper bound), deployment (best deployment found, array of shape (observation_period, n_available_drones), None if infeasible),
+            n_iterations, solution_time and history (array of shape (n_iterations, 4) with the time, Lagrangian value, best lower bound and best upper bound of each iteration).
+        """
+        start_time = time.perf_counter()
+        result = {"lower_bound": -np.inf, "upper_bound": np.inf, "gap": np.inf, "deployment": None, "n_iterations": 0, "solution_time": 0, "history": []}
+        n_without_improvement = 0
+        with ThreadPoolExecutor(self.n_workers) as executor:
+            for iteration in range(max_iterations):
+                costs, predecessors = zip(*[self.get_costs(t) for t in range(self.observation_period)])
+                deployments, values, bounds = zip(*executor.map(self.solve_subproblem, range(self.observation_period), costs))
+                result["n_iterations"] = iteration + 1
+                if any(deployment is None for deployment in deployments):
+                    # A time step cannot be covered, so the instance is infeasible
+                    result["lower_bound"] = np.inf
+                    break
+
+                deployment = self.repair(np.array(deployments))
+                upper_bound = self.get_deployment_cost(deployment)
+                if upper_bound < result["upper_bound"]:
+                    result["upper_bound"], result["deployment"] = upper_bound, deployment
+                if sum(bounds) > result["lower_bound"] + 1e-9:
+                    result["lower_bound"] = sum(bounds)
+                    n_without_improvement = 0
+                else:
+                    n_without_improvement += 1
+                    if n_without_improvement >= patience:
+                        step_scale /= 2
+                        n_without_improvement = 0
+                result["gap"] = (result["upper_bound"] - result["lower_bound"]) / max(abs(result["upper_bound"]), 1e-9)
+                result["history"].append((time.perf_counter() - start_time, sum(values), result["lower_bound"], result["upper_bound"]))
+                if verbose:
+                    print(f"[{iteration + 1}] lagrangian: {sum(values):.4f} | lower bound: {result['lower_bound']:.4f} | upper bound: {result['upper_bound']:.4f} | gap: {result['gap']:.2%}", flush=True)
+                if result["gap"] <= tolerance or (time_limit is not None and time.perf_counter() - start_time >= time_limit):
+                    break
+
+                # Subgradient of the dualized constraints: sum_q z^t_{upq} - z^{t-1}_{up}
+                subgradient = np.zeros(self.multipliers.shape)
+                drones = np.arange(self.n_available_drones)
+                for t in range(1, self.observation_period):
+                    subgradient[t, drones, predecessors[t][drones, deployments[t]]] += 1
+                    subgradient[t, drones, deployments[t - 1]] -= 1
+                norm = (subgradient ** 2).sum()
+                if norm == 0:
+                    # The subproblems agree on every movement, so their deployments are optimal
+                    break
+                self.multipliers += step_scale * (result["upper_bound"] - sum(values)) / norm * subgradient
+
+        result["solution_time"] = time.perf_counter() - start_time
+        result["history"] = np.array(result["history"]).reshape(-1, 4)
+        return result
+
+    def get_solution(self, result: dict) -> Solution:
+        """Returns the best deployment of a result of solve as a Solution, with the gap between the bounds as MIP gap."""
+        subproblem = self.subproblems[0]
+        return Solution(status=OPTIMAL_TOL_SOLUTION if result["gap"] <= 1e-4 else ABORTED_FEASIBLE,
+                        objective_value=result["upper_bound"] if result["deployment"] is not None else -1,
+                        solution_time=result["solution_time"],
+                        deployment=result["deployment"],
+                        positions=self.positions,
+                        distance_matrix=subproblem.distance_matrix,
+                        energy_matrix=subproblem.energy_matrix,
+                        mip_gap=result["gap"])
+
+    def finish(self) -> None:
+        """Closes the cplex models of the subproblems."""
+        for subproblem in self.subproblems:
+            subproblem.cplex_finish()
+
+if __name__ == "__main__":
+    from fanet.trace_store import load_run_trace
+    from fanet.solve_milp import get_graph
+    parser = argparse.ArgumentParser(description="Computes Lagrangian bounds for a run described by PARAMETERS.")
+    parser.add_argument("--n-positions", type=int, default=PARAMETERS["n_positions"][0])
+    parser.add_argument("--n-drones", type=int, default=PARAMETERS["n_drones"][0])
+    parser.add_argument("--n-targets", type=int, default=PARAMETERS["n_targets"][0])
+    parser.add_argument("--instance", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=100, help="Maximum number of subgradient iterations.")
+    parser.add_argument("--time-limit", type=float, default=None, help="Time limit in seconds.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of subproblems solved at the same time.")
+    args = parser.parse_args()
+
+    trace = load_run_trace(PARAMETERS, args.n_targets, PARAMETERS["targets_speed"][0], args.instance)
+    relaxation = LagrangianRelaxation(args.n_drones, PARAMETERS["observation_period"], PARAMETERS["time_step_delta"], trace, get_graph(PARAMETERS, args.n_positions), PARAMETERS["alpha"][0], PARAMETERS["beta"], args.workers)
+    result = relaxation.solve(args.iterations, args.time_limit, verbose=True)
+    print(f"Lower bound: {result['lower_bound']:.4f} | upper bound: {result['upper_bound']:.4f} | gap: {result['gap']:.2%} | {result['n_iterations']} iterations in {result['solution_time']:.1f}s")
+    relaxation.finish()
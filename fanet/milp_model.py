@@ -1,14 +1,67 @@
 from typing import Optional
 from fanet.graph import Graph
 from fanet.targets_trace import TargetsTrace
-from fanet.energy_model import energy
+from fanet.energy_model import energy_matrix
 from fanet.linear_expression import LinearExpression
+from fanet.solution import Solution, TELEMETRY_COLUMNS
 from fanet.setup.cplex_constants import *
-from fanet.setup.config import PARAMETERS
-import cplex
+from fanet.setup.cplex_profiles import CPLEX_PROFILES
+from fanet.setup.config import PARAMETERS, TUNING_DIR, CPLEX_WORK_DIR
+import functools
+import os
+import numpy as np
+
+# Formulations of the drone movements (refer to MilpModel.define_drone_movement_constraints)
+MOVEMENT_FORMULATIONS = ("mccormick", "flow")
+
+def get_cost_matrices(input_graph: Graph, time_step_delta: float) -> tuple:
+    """Returns the distance and energy between every pair of positions in P \cup {base_station}, indexed as input_graph.get_positions_array(). Moving to or from the base station does not hover, every other movement does.
+
+    Returns:
+        Tuple (distance_matrix, energy_matrix).
+    """
+    distance_matrix = input_graph.get_distance_matrix()
+    hover = np.ones(distance_matrix.shape, dtype=bool)
+    hover[-1, :] = False
+    hover[:, -1] = False
+    return distance_matrix, energy_matrix(distance_matrix, time_step_delta, hover)
+
+@functools.lru_cache(maxsize=None)
+def get_telemetry_callback_class() -> type:
+    """Returns the class TelemetryCallback. It is defined on first use since its base class comes from cplex, which is only imported when a model is solved."""
+    import cplex
+
+    class TelemetryCallback(cplex.callbacks.MIPInfoCallback):
+        """Info callback recording the progress of cplex (refer to solution.TELEMETRY_COLUMNS) every time the incumbent improves and at least every interval seconds. Registered by MilpModel.set_telemetry."""
+
+        def reset(self, interval: float) -> None:
+            """Clears the records before a solve."""
+            self.interval = interval
+            self.records = []
+            self.last_time = -np.inf
+            self.last_incumbent = np.nan
+
+        def __call__(self) -> None:
+            elapsed = self.get_time() - self.get_start_time()
+            has_incumbent = self.has_incumbent()
+            incumbent = self.get_incumbent_objective_value() if has_incumbent else np.nan
+            # nan != nan, so the first incumbent is an improvement
+            improved = has_incumbent and incumbent != self.last_incumbent
+            if improved or elapsed - self.last_time >= self.interval:
+                self.records.append((elapsed, self.get_num_nodes(), incumbent, self.get_best_objective_value(), self.get_MIP_relative_gap() if has_incumbent else np.nan))
+                self.last_time = elapsed
+                self.last_incumbent = incumbent
+
+    return TelemetryCallback
+
+def __getattr__(name: str):
+    """Module attributes that need cplex, resolved on first access."""
+    if name == "TelemetryCallback":
+        return get_telemetry_callback_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class MilpModel:
-    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, model_name: Optional[str] = "MILP_Model") -> None:
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, model_name: Optional[str] = "MILP_Model", movement_formulation: Optional[str] = "mccormick") -> None:
         """Builds the linear program to obtain the optimal deployment of drones to cover all targets at all time steps.
 
         Args:
@@ -20,7 +73,10 @@ class MilpModel:
             alpha: Weight of objective function metrics.
             beta: Objective function normalization parameter.
             model_name: Name of the cplex model. Defaults to "MILP_Model".
+            movement_formulation: Constraints defining the drone movements, one of MOVEMENT_FORMULATIONS. Refer to define_drone_movement_constraints. Defaults to "mccormick".
         """
+        if movement_formulation not in MOVEMENT_FORMULATIONS:
+            raise ValueError(f"Unknown movement formulation: {movement_formulation}. Choose one of {list(MOVEMENT_FORMULATIONS)}.")
 
         self.n_available_drones = n_available_drones
         self.observation_period = observation_period
@@ -29,11 +85,23 @@ class MilpModel:
         self.input_graph = input_graph
         self.alpha = alpha
         self.beta = beta
+        self.movement_formulation = movement_formulation
 
+        # Imported here so that importing this module does not load cplex
+        import cplex
         self.cplex_model = cplex.Cplex()
         self.cplex_model.set_problem_name(model_name)
         self.variables = []
         self.constraints = []
+        # Number of variables added to cplex and dropped from self.variables, and size of the chunks when building in chunks (refer to build_model)
+        self.n_added_variables = 0
+        self.chunk_size = None
+        self.distance_matrix = None
+        self.energy_matrix = None
+        self.z_t_drone_p_index = None
+        self.solution = None
+        self.telemetry_callback = None
+        self.lp_bound = np.nan
 
     def define_variable(self, var_name: str, var_lb: float, var_up: float, var_type: str) -> None:
         """Defines a variable and saves it in self.variables list. This function does not add the variables to the cplex model. Using these lists to add variables and constraints in batches is faster than adding them one by one to cplex.
@@ -45,6 +113,8 @@ class MilpModel:
             var_type: Type of the variable. Use the constants defined in cplex_constants.py.
         """
         self.variables.append({"name": var_name, "lb": var_lb, "ub": var_up, "type": var_type})
+        if self.chunk_size is not None and len(self.variables) >= self.chunk_size:
+            self.set_variables_to_cplex()
 
     def get_variable(self, var_name: str) -> dict:
         """Returns the variable with the given name from the list self.variables.
@@ -109,6 +179,10 @@ class MilpModel:
         """
         return f"z_t_{time_step}_drone_{drone}_p_{position_p}_q_{position_q}".replace(" ", "")
 
+    def get_max_flow(self) -> int:
+        """Returns the maximum flow that can leave a position, i.e., the number of targets |S|. It bounds the flow variables and is the big-M of the drone flow constraints."""
+        return len(self.targets_trace.trace_set)
+
     def define_all_variables(self) -> None:
         """Defines all the variables of the linear program. Uses the function define_variable to save the information of the variables in the corresponding lists. Later the variables must be added to the cplex model."""
         # Defining the variables z_t_p for all t \in T and p \in P \cup {base_station}
@@ -118,32 +192,38 @@ class MilpModel:
                 self.define_variable(self.var_z_t_p(t, p), 0, 1, BINARY_VARIABLE)
 
         # Defining the variables z_t_drone_p for all t \in T, drone \in n_available_drones and p \in P \cup {base_station}
+        # They are defined as a contiguous block so the solution can be read with a single call (see get_solution)
+        self.z_t_drone_p_index = self.n_added_variables + len(self.variables)
         for t in range(self.observation_period):
             for drone in range(self.n_available_drones):
                 self.define_variable(self.var_z_t_drone_p(t, drone, self.input_graph.base_station), 0, 1, BINARY_VARIABLE)
                 for p in self.input_graph.deployment_positions:
                     self.define_variable(self.var_z_t_drone_p(t, drone, p), 0, 1, BINARY_VARIABLE)
 
+        self.define_flow_variables()
+
+        # Defining the variables z_t_drone_p_q for all t \in T, drone \in n_available_drones, p, q \in P and p \neq q
+        if self.observation_period > 1: # Otherwise there are no drone movements within the observation period
+            for t in range(self.observation_period):
+                for drone in range(self.n_available_drones):
+                    for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
+                        for q in self.input_graph.deployment_positions + [self.input_graph.base_station]:
+                            self.define_variable(self.var_z_t_drone_p_q(t, drone, p, q), 0, 1, BINARY_VARIABLE)
+
+    def define_flow_variables(self) -> None:
+        """Defines the flow variables between positions and from the positions to the targets they cover."""
         # Defining the flow variables f_t_p_q for all t \in T, p, q \in P and p \neq q
         for t in range(self.observation_period):
             for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
                 for q in self.input_graph.get_positions_in_comm_range(p):
-                    self.define_variable(self.var_f_t_p_q(t, p, q), 0, len(self.targets_trace.trace_set), CONTINUOUS_VARIABLE)
+                    self.define_variable(self.var_f_t_p_q(t, p, q), 0, self.get_max_flow(), CONTINUOUS_VARIABLE)
 
         # Defining the flow variables f_t_p_q for all t \in T, sensor_position \in trace_set and delpoyment_position \in P that covers the sensor_position
         for t in range(self.observation_period):
             for sensor_trace in self.targets_trace.trace_set:
                 sensor_position = sensor_trace[t]
                 for deployment_position in self.input_graph.get_target_coverage(sensor_position):
-                    self.define_variable(self.var_f_t_p_q(t, deployment_position, sensor_position), 0, len(self.targets_trace.trace_set), CONTINUOUS_VARIABLE)
-
-        # Defining the variables z_t_drone_p_q for all t \in T, drone \in n_available_drones, p, q \in P and p \neq q
-        if self.observation_period > 1: # Otherwise there are no drone movements within the observation period
-            for t in range(self.observation_period):
-                for drone in range(self.n_available_drones):
-                    for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
-                        for q in self.input_graph.deployment_positions + [self.input_graph.base_station]:
-                            self.define_variable(self.var_z_t_drone_p_q(t, drone, p, q), 0, 1, BINARY_VARIABLE)
+                    self.define_variable(self.var_f_t_p_q(t, deployment_position, sensor_position), 0, self.get_max_flow(), CONTINUOUS_VARIABLE)
 
     def define_constraint(self, constr_name: str, constr_linear_expr: list, constr_sense:int, constr_rhs:float) -> None:
         """Defines a constraint and saves its information in the corresponding lists.
@@ -157,6 +237,8 @@ class MilpModel:
             constr_rhs: Right hand side of the constraint.
         """
         self.constraints.append({"name": constr_name, "linear_expr": constr_linear_expr, "sense": constr_sense, "rhs": constr_rhs})
+        if self.chunk_size is not None and len(self.constraints) >= self.chunk_size:
+            self.set_constraints_to_cplex()
 
     def define_flow_constraints(self) -> None:
         """Defines the flow constraints for all time steps."""
@@ -202,7 +284,7 @@ class MilpModel:
                     # (+) Flow that enters p from base station
                     constr.add_term(1, self.var_f_t_p_q(t, self.input_graph.base_station, p))
                     # (-) Number of sensors * z^t_p
-                    constr.add_term(-1*len(self.targets_trace.trace_set), self.var_z_t_p(t, p))
+                    constr.add_term(-1*self.get_max_flow(), self.var_z_t_p(t, p))
                     # Has to be less or equal to 0
                     self.define_constraint(constr_name, constr.get_expression(), LESS_EQUAL, 0)
 
@@ -213,7 +295,7 @@ class MilpModel:
                     # (+) Flow that leaves p to q
                     constr.add_term(1, self.var_f_t_p_q(t, p, q))
                     # (-) Number of sensors * z^t_p
-                    constr.add_term(-1*len(self.targets_trace.trace_set), self.var_z_t_p(t, p))
+                    constr.add_term(-1*self.get_max_flow(), self.var_z_t_p(t, p))
                     # Has to be less or equal to 0
                     self.define_constraint(constr_name, constr.get_expression(), LESS_EQUAL, 0)
 
@@ -223,7 +305,7 @@ class MilpModel:
                     # (+) Flow that leaves p to sensor
                     constr.add_term(1, self.var_f_t_p_q(t, p, sensor))
                     # (-) Number of sensors * z^t_p
-                    constr.add_term(-1*len(self.targets_trace.trace_set), self.var_z_t_p(t, p))
+                    constr.add_term(-1*self.get_max_flow(), self.var_z_t_p(t, p))
                     # Has to be less or equal to 0
                     self.define_constraint(constr_name, constr.get_expression(), LESS_EQUAL, 0)
 
@@ -251,9 +333,14 @@ class MilpModel:
                 self.define_constraint(constr_name, constr.get_expression(), EQUAL, 0)
 
     def define_drone_movement_constraints(self) -> None:
-        """Defines the constraints that ensure the definition of the variables z^t_{upq}."""
+        """Defines the constraints that ensure the definition of the variables z^t_{upq}, with the formulation movement_formulation:
+        "mccormick" linearizes z^t_{upq} = z^{t-1}_up * z^t_uq with 3 constraints per (t, drone, p, q), "flow" uses the flow conservation constraints of define_drone_movement_flow_constraints.
+        """
         if self.observation_period <= 1: # In this case there are no movements within the observation period so there is no need to define these constraints
             return
+        if self.movement_formulation == "flow":
+            self.define_drone_movement_flow_constraints()
+            return
         for t in range(1, self.observation_period):
             for drone in range(self.n_available_drones):
                 for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
@@ -280,6 +367,31 @@ class MilpModel:
                         constr.add_term(-1, self.var_z_t_drone_p(t-1, drone, p))
                         self.define_constraint(constr_name, constr.get_expression(), GREATER_EQUAL, -1)
 
+    def define_drone_movement_flow_constraints(self) -> None:
+        """Defines the variables z^t_{upq} as the flow of drone u from its position at time step t - 1 to its position at time step t: every drone leaves p by exactly one movement if it was in p, and enters q by exactly one movement if it is in q.
+        This needs 2 constraints per (t, drone, p) instead of 3 per (t, drone, p, q), and its LP relaxation is tighter: the movements must carry the whole fractional deployment from one time step to the next.
+        """
+        positions = self.input_graph.deployment_positions + [self.input_graph.base_station]
+        for t in range(1, self.observation_period):
+            for drone in range(self.n_available_drones):
+                for p in positions:
+                    # sum_q z^t_{upq} - z^{t-1}_up = 0
+                    constr = LinearExpression()
+                    constr_name = f"drone_mov_flow_out_t_{t}_drone_{drone}_p_{p}"
+                    for q in positions:
+                        constr.add_term(1, self.var_z_t_drone_p_q(t, drone, p, q))
+                    constr.add_term(-1, self.var_z_t_drone_p(t-1, drone, p))
+                    self.define_constraint(constr_name, constr.get_expression(), EQUAL, 0)
+
+                for q in positions:
+                    # sum_p z^t_{upq} - z^t_uq = 0
+                    constr = LinearExpression()
+                    constr_name = f"drone_mov_flow_in_t_{t}_drone_{drone}_q_{q}"
+                    for p in positions:
+                        constr.add_term(1, self.var_z_t_drone_p_q(t, drone, p, q))
+                    constr.add_term(-1, self.var_z_t_drone_p(t, drone, q))
+                    self.define_constraint(constr_name, constr.get_expression(), EQUAL, 0)
+
     def define_all_constraints(self) -> None:
         """Defines all the constraints of the linear program. Uses the function define_constraint to save the information of the constraints in the corresponding lists. Later the constraints must be added to the cplex model."""
         self.define_flow_constraints()
@@ -288,57 +400,76 @@ class MilpModel:
         self.define_position_use_constraints()
         self.define_drone_movement_constraints()
 
-    def get_objective_function(self) -> list:
-        """ Returns the linear expression of the objective function.
+    def set_cost_matrices(self) -> None:
+        """Computes the distance and energy between every pair of positions in P \cup {base_station}. Refer to get_cost_matrices."""
+        self.distance_matrix, self.energy_matrix = get_cost_matrices(self.input_graph, self.time_step_delta)
 
-        Returns:
-            list: The linear expression of the objective function. This is a list of tuples with the form (variable_name (str), coefficient (float)).
-        """
+    def get_cost_matrix(self) -> np.ndarray:
+        """Returns the cost of moving between every pair of positions, (1 - alpha) * distance + alpha * beta * energy, indexed as input_graph.get_positions_array()."""
+        if self.distance_matrix is None:
+            self.set_cost_matrices()
+        return (1 - self.alpha) * self.distance_matrix + self.alpha * self.beta * self.energy_matrix
+
+    def get_deployment_objective(self) -> list:
+        """Returns the terms of the objective function for the deployment (t = 0) and the return to the base station (t = T - 1), as a list of tuples (variable_name, coefficient)."""
+        cost_matrix = self.get_cost_matrix()
+        base_station = len(self.input_graph.deployment_positions)
         obj_func = LinearExpression()
 
-        for p in self.input_graph.deployment_positions:
+        for i, p in enumerate(self.input_graph.deployment_positions):
             # Deployement cost (t = 0)
-            energy_consumed = energy(self.input_graph.get_distance(p, self.input_graph.base_station), self.time_step_delta, False)
-            distance_cost = (1 - self.alpha) * self.input_graph.get_distance(p, self.input_graph.base_station)
-            energy_cost = self.alpha * self.beta * energy_consumed
-            obj_func.add_term(distance_cost + energy_cost, self.var_z_t_p(0, p))
+            obj_func.add_term(cost_matrix[base_station, i], self.var_z_t_p(0, p))
             # Return to base cost (t = T - 1)
-            energy_consumed = energy(self.input_graph.get_distance(p, self.input_graph.base_station), self.time_step_delta, False)
-            distance_cost = (1 - self.alpha) * self.input_graph.get_distance(p, self.input_graph.base_station)
-            energy_cost = self.alpha * self.beta * energy_consumed
-            obj_func.add_term(distance_cost + energy_cost, self.var_z_t_p(self.observation_period - 1, p))
+            obj_func.add_term(cost_matrix[i, base_station], self.var_z_t_p(self.observation_period - 1, p))
 
         if self.observation_period == 1: # In this case the deployement and return costs use the same variable
             obj_func.merge_duplicates()  # So we merge them into one term
-            return obj_func.get_tuple_expression()
+        return obj_func.get_tuple_expression()
+
+    def get_movement_objective(self, time_step: int) -> list:
+        """Returns the terms of the objective function for the movements of the drones at time_step (1 <= time_step < T), as a list of tuples (variable_name, coefficient)."""
+        cost_matrix = self.get_cost_matrix()
+        positions = self.input_graph.deployment_positions + [self.input_graph.base_station]
+        obj_func = LinearExpression()
+        for i, p in enumerate(positions):
+            for j, q in enumerate(positions):
+                for drone in range(self.n_available_drones):
+                    obj_func.add_term(cost_matrix[i, j], self.var_z_t_drone_p_q(time_step, drone, p, q))
+        return obj_func.get_tuple_expression()
+
+    def get_objective_function(self) -> list:
+        """ Returns the linear expression of the objective function.
+
+        Returns:
+            list: The linear expression of the objective function. This is a list of tuples with the form (variable_name (str), coefficient (float)).
+        """
+        obj_func = self.get_deployment_objective()
         # Movement cost
-        for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
-            for q in self.input_graph.deployment_positions + [self.input_graph.base_station]:
-                hover = False if (p == self.input_graph.base_station or q == self.input_graph.base_station) else True
-                energy_consumed = energy(self.input_graph.get_distance(p, q), self.time_step_delta, hover)
-                distance_cost = (1 - self.alpha) * self.input_graph.get_distance(p, q)
-                energy_cost = self.alpha * self.beta * energy_consumed
-                for t in range(1,self.observation_period):
-                    for drone in range(self.n_available_drones):
-                        obj_func.add_term(distance_cost + energy_cost, self.var_z_t_drone_p_q(t, drone, p, q))
-        return obj_func.get_tuple_expression() # For some reason cplex API doesn't use the notation of linear expressions for constraints and objective function. Instead it uses a list of tuples with the form (variable_name (str), coefficient (float)).
+        for t in range(1, self.observation_period):
+            obj_func += self.get_movement_objective(t)
+        return obj_func # For some reason cplex API doesn't use the notation of linear expressions for constraints and objective function. Instead it uses a list of tuples with the form (variable_name (str), coefficient (float)).
 
     def set_variables_to_cplex(self) -> None:
-        """Adds the variables to the cplex model."""
+        """Adds the variables to the cplex model. When building in chunks (refer to build_model), the variables are then dropped from self.variables."""
         var_names = [var["name"] for var in self.variables]
         var_lower_bounds = [var["lb"] for var in self.variables]
         var_upper_bounds = [var["ub"] for var in self.variables]
         var_types = [var["type"] for var in self.variables]
         self.cplex_model.variables.add(names = var_names, lb = var_lower_bounds, ub = var_upper_bounds, types = var_types)
+        if self.chunk_size is not None:
+            self.n_added_variables += len(self.variables)
+            self.variables = []
 
     def set_constraints_to_cplex(self) -> None:
-        """Adds the constraints to the cplex model."""
+        """Adds the constraints to the cplex model. When building in chunks (refer to build_model), the constraints are then dropped from self.constraints."""
         constr_names = [constr["name"] for constr in self.constraints]
         constr_linear_expr = [constr["linear_expr"] for constr in self.constraints]
         constr_sense = [constr["sense"] for constr in self.constraints]
         constr_rhs = [constr["rhs"] for constr in self.constraints]
 
         self.cplex_model.linear_constraints.add(lin_expr = constr_linear_expr, senses = constr_sense, rhs = constr_rhs, names = constr_names)
+        if self.chunk_size is not None:
+            self.constraints = []
 
     def set_objective_function_to_cplex(self, objective_function: list, maximize: Optional[bool] = True) -> None:
         """Sets the objective function to the cplex model.
@@ -350,37 +481,234 @@ class MilpModel:
         self.cplex_model.objective.set_linear(objective_function)
         self.cplex_model.objective.set_sense(self.cplex_model.objective.sense.maximize if maximize else self.cplex_model.objective.sense.minimize)
 
-    def build_model(self) -> None:
-        """Builds the linear program by defining all the variables, constraints and objective function and adding them to the cplex model."""
+    def build_model(self, chunk_size: Optional[int] = None) -> None:
+        """Builds the linear program by defining all the variables, constraints and objective function and adding them to the cplex model.
+        With chunk_size, the variables and constraints are added to cplex every chunk_size definitions and then dropped, and the objective function is added one time step at a time, so the memory used by Python is bounded by a chunk instead of the whole model.
+        All variables are added before the first constraint. get_variable is not available after a build in chunks.
+
+        Args:
+            chunk_size: Number of variables or constraints per chunk. Defaults to None (the whole model is defined before being added to cplex).
+        """
+        self.chunk_size = chunk_size
         self.define_all_variables()
+        if chunk_size is not None:
+            self.set_variables_to_cplex()
         self.define_all_constraints()
 
-        self.set_variables_to_cplex()
+        if chunk_size is None:
+            self.set_variables_to_cplex()
+            self.set_constraints_to_cplex()
+            self.set_objective_function_to_cplex(self.get_objective_function(), maximize=False)
+            return
         self.set_constraints_to_cplex()
-        self.set_objective_function_to_cplex(self.get_objective_function(), maximize=False)
+        self.set_objective_function_to_cplex(self.get_deployment_objective(), maximize=False)
+        for t in range(1, self.observation_period):
+            self.cplex_model.objective.set_linear(self.get_movement_objective(t))
 
     def solve_model(self) -> None:
         """Solves the linear program and saves the time required to reach the solution."""
+        self.solution = None
+        if self.telemetry_callback is not None:
+            self.telemetry_callback.reset(self.telemetry_interval)
         self.start_time = self.cplex_model.get_time()
         self.cplex_model.solve()
         self.finish_time = self.cplex_model.get_time()
         self.solution_time = self.finish_time - self.start_time
 
+    def solve_lp_relaxation(self) -> dict:
+        """Solves the LP relaxation of the model on a copy, so the model itself is unchanged. Its objective value is a lower bound of the optimum.
+
+        Returns:
+            Dictionary with the keys lp_bound (nan if the relaxation is infeasible), values and reduced_costs (arrays indexed as the cplex variables, None if infeasible) and solution_time.
+        """
+        import cplex
+        lp_model = cplex.Cplex(self.cplex_model)
+        lp_model.set_problem_type(lp_model.problem_type.LP)
+        for set_stream in [lp_model.set_log_stream, lp_model.set_error_stream, lp_model.set_warning_stream, lp_model.set_results_stream]:
+            set_stream(None)
+        start_time = lp_model.get_time()
+        lp_model.solve()
+        relaxation = {"lp_bound": np.nan, "values": None, "reduced_costs": None, "solution_time": lp_model.get_time() - start_time}
+        if lp_model.solution.get_status() == LP_OPTIMAL_SOLUTION:
+            relaxation["lp_bound"] = lp_model.solution.get_objective_value()
+            relaxation["values"] = np.array(lp_model.solution.get_values())
+            relaxation["reduced_costs"] = np.array(lp_model.solution.get_reduced_costs())
+        lp_model.end()
+        return relaxation
+
+    def get_heuristic_incumbent(self, time_limit: float) -> tuple:
+        """Searches a feasible solution on a copy of the model with cplex emphasis on feasibility.
+
+        Args:
+            time_limit: Limit in seconds of the search.
+
+        Returns:
+            Tuple (objective_value, values) with the values indexed as the cplex variables. (inf, None) if no feasible solution was found.
+        """
+        import cplex
+        heuristic_model = cplex.Cplex(self.cplex_model)
+        for set_stream in [heuristic_model.set_log_stream, heuristic_model.set_error_stream, heuristic_model.set_warning_stream, heuristic_model.set_results_stream]:
+            set_stream(None)
+        heuristic_model.parameters.timelimit.set(time_limit)
+        heuristic_model.parameters.emphasis.mip.set(MIP_EMPHASIS_FEASIBILITY)
+        heuristic_model.solve()
+        incumbent = (np.inf, None)
+        if heuristic_model.solution.get_status() in FEASIBLE_STATUS:
+            incumbent = (heuristic_model.solution.get_objective_value(), np.array(heuristic_model.solution.get_values()))
+        heuristic_model.end()
+        return incumbent
+
+    def fix_by_reduced_costs(self, relaxation: dict, upper_bound: float) -> int:
+        """Fixes the integer variables that take another value in no solution better than upper_bound. An integer variable at a bound of the LP relaxation with reduced cost d gets at least lp_bound + |d| when it leaves the bound, so it is fixed to that bound if lp_bound + |d| > upper_bound, e.g. the movements between far away positions.
+
+        Args:
+            relaxation: LP relaxation as returned by solve_lp_relaxation.
+            upper_bound: Objective value of a feasible solution.
+
+        Returns:
+            Number of fixed variables.
+        """
+        if relaxation["values"] is None or not np.isfinite(upper_bound):
+            return 0
+        lower_bounds = np.array(self.cplex_model.variables.get_lower_bounds())
+        upper_bounds = np.array(self.cplex_model.variables.get_upper_bounds())
+        is_integer = np.isin(self.cplex_model.variables.get_types(), [BINARY_VARIABLE, INTEGER_VARIABLE])
+        values, reduced_costs = relaxation["values"], relaxation["reduced_costs"]
+        # Strict improvement over upper_bound up to the tolerance, so the solution of upper_bound stays feasible
+        cutoff = upper_bound + 1e-6 * max(1, abs(upper_bound))
+        at_lower = is_integer & (lower_bounds < upper_bounds) & np.isclose(values, lower_bounds) & (relaxation["lp_bound"] + reduced_costs > cutoff)
+        at_upper = is_integer & (lower_bounds < upper_bounds) & np.isclose(values, upper_bounds) & (relaxation["lp_bound"] - reduced_costs > cutoff)
+        if at_lower.any():
+            self.cplex_model.variables.set_upper_bounds([(int(i), lower_bounds[i]) for i in np.flatnonzero(at_lower)])
+        if at_upper.any():
+            self.cplex_model.variables.set_lower_bounds([(int(i), upper_bounds[i]) for i in np.flatnonzero(at_upper)])
+        return int(at_lower.sum() + at_upper.sum())
+
+    def quick_estimate(self, heuristic_time_limit: Optional[float] = None) -> dict:
+        """Solves the LP relaxation of the built model and keeps its bound in the solution (refer to Solution.lp_bound). If heuristic_time_limit is given, a feasible solution searched for that long is used to fix variables by their reduced costs (refer to fix_by_reduced_costs) and given to cplex as a MIP start, so solve_model explores a smaller tree with the same optimum.
+
+        Args:
+            heuristic_time_limit: Limit in seconds of the search of a feasible solution. Defaults to None (no variable is fixed).
+
+        Returns:
+            Dictionary with the keys lp_bound, upper_bound (inf without feasible solution), n_fixed and estimate_time (seconds spent).
+        """
+        import cplex
+        start_time = self.cplex_model.get_time()
+        relaxation = self.solve_lp_relaxation()
+        self.lp_bound = relaxation["lp_bound"]
+        upper_bound, incumbent = np.inf, None
+        if heuristic_time_limit is not None and relaxation["values"] is not None:
+            upper_bound, incumbent = self.get_heuristic_incumbent(heuristic_time_limit)
+        n_fixed = self.fix_by_reduced_costs(relaxation, upper_bound)
+        if incumbent is not None:
+            self.cplex_model.MIP_starts.add(cplex.SparsePair(ind=list(range(len(incumbent))), val=incumbent.tolist()), self.cplex_model.MIP_starts.effort_level.check_feasibility)
+        return {"lp_bound": self.lp_bound, "upper_bound": upper_bound, "n_fixed": n_fixed, "estimate_time": self.cplex_model.get_time() - start_time}
+
+    def set_telemetry(self, interval: float) -> None:
+        """Records the progress of cplex during the next solves: (time, nodes, incumbent, best bound, gap) every time the incumbent improves and at least every interval seconds. Refer to get_telemetry.
+
+        Args:
+            interval: Maximum number of seconds between two records.
+        """
+        if self.telemetry_callback is None:
+            self.telemetry_callback = self.cplex_model.register_callback(get_telemetry_callback_class())
+        self.telemetry_interval = interval
+
+    def get_telemetry(self) -> np.ndarray:
+        """Returns the progress of cplex during the last solve, followed by a record of the end of the solve.
+
+        Returns:
+            Array of shape (n_records, len(TELEMETRY_COLUMNS)). Empty if set_telemetry was not called.
+        """
+        if self.telemetry_callback is None:
+            return np.empty((0, len(TELEMETRY_COLUMNS)))
+        final_record = [self.solution_time, np.nan, np.nan, np.nan, np.nan]
+        if self.get_solution_status() in FEASIBLE_STATUS:
+            final_record[1:] = [self.cplex_model.solution.progress.get_num_nodes_processed(),
+                                self.cplex_model.solution.get_objective_value(),
+                                self.cplex_model.solution.MIP.get_best_objective(),
+                                self.cplex_model.solution.MIP.get_mip_relative_gap()]
+        return np.array(self.telemetry_callback.records + [tuple(final_record)], dtype=float).reshape(-1, len(TELEMETRY_COLUMNS))
+
+    def get_solution(self) -> Solution:
+        """Returns the solution of the last solve. The variables z_t_drone_p are read from cplex with a single call and decoded into a (observation_period x n_available_drones) array of position indices. The result is cached until the model is solved again.
+
+        Returns:
+            Solution: The positions are indexed as input_graph.deployment_positions + [input_graph.base_station].
+        """
+        if self.solution is not None:
+            return self.solution
+        if self.distance_matrix is None:
+            self.set_cost_matrices()
+
+        deployment = None
+        mip_gap = np.nan
+        if self.get_solution_status() in FEASIBLE_STATUS:
+            mip_gap = self.cplex_model.solution.MIP.get_mip_relative_gap()
+            n_positions = len(self.input_graph.deployment_positions) + 1
+            first = self.z_t_drone_p_index
+            last = first + self.observation_period * self.n_available_drones * n_positions - 1
+            values = np.array(self.cplex_model.solution.get_values(first, last))
+            # Within the block the base station comes first for each (t, drone), roll it to the last column
+            values = np.roll(values.reshape(self.observation_period, self.n_available_drones, n_positions), -1, axis=2)
+            deployment = np.argmax(values, axis=2)
+
+        self.solution = Solution(status=self.get_solution_status(),
+                                 objective_value=self.get_objective_value(),
+                                 solution_time=self.solution_time,
+                                 deployment=deployment,
+                                 positions=self.input_graph.deployment_positions + [self.input_graph.base_station],
+                                 distance_matrix=self.distance_matrix,
+                                 energy_matrix=self.energy_matrix,
+                                 mip_gap=mip_gap,
+                                 model_size=self.get_model_size(),
+                                 telemetry=self.get_telemetry(),
+                                 lp_bound=self.lp_bound)
+        return self.solution
+
+    def get_deployment_values(self, deployment: np.ndarray) -> list:
+        """Returns the values of the block of variables z_t_drone_p for a deployment, in the order of the block (refer to get_solution).
+
+        Args:
+            deployment: Integer array of shape (n_time_steps, n_available_drones) of position indices, the base station last. n_time_steps can be lower than observation_period, then only the first time steps are returned.
+        """
+        n_positions = len(self.input_graph.deployment_positions) + 1
+        values = np.zeros((len(deployment), self.n_available_drones, n_positions))
+        # Within the block the base station comes first for each (t, drone)
+        np.put_along_axis(values, ((deployment + 1) % n_positions)[:, :, None], 1, axis=2)
+        return values.flatten().tolist()
+
+    def set_warm_start(self, deployment: np.ndarray) -> None:
+        """Replaces the MIP start of cplex by a deployment of the whole observation period. cplex repairs it if it is not feasible.
+
+        Args:
+            deployment: Integer array of shape (observation_period, n_available_drones) of position indices, the base station last.
+        """
+        import cplex
+        if self.cplex_model.MIP_starts.get_num() > 0:
+            self.cplex_model.MIP_starts.delete()
+        values = self.get_deployment_values(deployment)
+        indices = list(range(self.z_t_drone_p_index, self.z_t_drone_p_index + len(values)))
+        self.cplex_model.MIP_starts.add(cplex.SparsePair(ind=indices, val=values), self.cplex_model.MIP_starts.effort_level.repair)
+
+    def get_model_size(self) -> dict:
+        """Returns the number of variables, constraints and nonzeros of the cplex model.
+
+        Returns:
+            dict: Dictionary with the keys "n_variables", "n_constraints" and "n_nonzeros".
+        """
+        return {"n_variables": self.cplex_model.variables.get_num(),
+                "n_constraints": self.cplex_model.linear_constraints.get_num(),
+                "n_nonzeros": self.cplex_model.linear_constraints.get_num_nonzeros()}
+
     def get_drones_deployement(self) -> list:
         """Returns the deployment of drones at each time step.
 
         Returns:
             list: List of list of tuples. For each time step, for each drone, the position where the drone is deployed.
         """
-        drones_deployement = []
-        for t in range(self.observation_period):
-            deployement_at_t = []
-            for drone in range(self.n_available_drones):
-                for p in self.input_graph.deployment_positions + [self.input_graph.base_station]:
-                    if self.cplex_model.solution.get_values(self.var_z_t_drone_p(t, drone, p)) >= 0.9:
-                        deployement_at_t.append(p)
-            drones_deployement.append(deployement_at_t)
-        return drones_deployement
+        return self.get_solution().get_drones_deployement()
 
     def cplex_finish(self) -> None:
         """Closes the cplex model."""
@@ -388,7 +716,7 @@ class MilpModel:
 
     def get_objective_value(self) -> float:
         """Returns the value of the objective function. In case of infeasible solution, returns -1."""
-        if self.cplex_model.solution.get_status() in [OPTIMAL_SOLUTION, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE, TIME_LIMIT_FEASIBLE, MEMORY_LIMIT_FEASIBLE]:
+        if self.cplex_model.solution.get_status() in FEASIBLE_STATUS:
             return self.cplex_model.solution.get_objective_value()
         return -1
 
@@ -404,16 +732,18 @@ class MilpModel:
         """Saves the solution of the linear program to a file.
         It saves the objective function value, time to reach the solution, and the deployment of drones at each time step.
 
+        The file is written to file_name + ".tmp" first and then renamed, so an interrupted run never leaves a partial file behind.
+
         Args:
             file_name (str): Name of the file to save the solution.
         """
-        with open(file_name, "w") as file:
+        with open(file_name + ".tmp", "w") as file:
             file.write(f"{'Solution status:':<30} {self.get_solution_status()}\n")
             file.write(f"{'Objective function value:':<30} {self.get_objective_value()}\n")
             file.write(f"{'Total Distance:':<30} {self.get_solution_distance()}\n")
             file.write(f"{'Total Energy:':<30} {self.get_solution_energy()}\n")
             file.write(f"{'Time to reach the solution:':<30} {self.solution_time}\n")
-            if self.cplex_model.solution.get_status() in [OPTIMAL_SOLUTION, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE, TIME_LIMIT_FEASIBLE, MEMORY_LIMIT_FEASIBLE]:
+            if self.cplex_model.solution.get_status() in FEASIBLE_STATUS:
                 file.write(f"{'Drones deployment:':<30}\n")
                 file.write("-------------------------------------------\n")
                 drones_deployement = self.get_drones_deployement()
@@ -421,6 +751,15 @@ class MilpModel:
                 for time_step in range(len(drones_deployement)):
                     for drone in range(len(drones_deployement[time_step])):
                         file.write(f"{time_step:<15} {drone:<11} {drones_deployement[time_step][drone]}\n")
+        os.replace(file_name + ".tmp", file_name)
+
+    def save_solution_data(self, file_name: str) -> None:
+        """Saves the solution to a .npz file with a fixed schema. Unlike save_solution, this file is meant to be loaded in bulk. Refer to Solution.save() and solution.load_solutions().
+
+        Args:
+            file_name (str): Name of the .npz file to save the solution.
+        """
+        self.get_solution().save(file_name)
 
     def model_shut_up(self) -> None:
         """Disables cplex output stream."""
@@ -455,33 +794,106 @@ class MilpModel:
         if memory_limit > 0:
             self.cplex_model.parameters.workmem.set(memory_limit)
 
-    def get_solution_distance(self) -> float:
-        """Returns the distance traveled by the drones in the solution. If the solution was not reached, returns -1."""
-        if not self.cplex_model.solution.get_status() in [OPTIMAL_SOLUTION, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE, TIME_LIMIT_FEASIBLE, MEMORY_LIMIT_FEASIBLE]:
-            return -1
+    def set_threads(self, n_threads: int) -> None:
+        """Sets the number of threads used by cplex.
+
+        Args:
+            n_threads: Maximum number of threads. 0 lets cplex decide.
+        """
+        if n_threads >= 0:
+            self.cplex_model.parameters.threads.set(n_threads)
+
+    def set_parallel_mode(self, parallel_mode: int) -> None:
+        """Sets the parallel mode of cplex.
+
+        Args:
+            parallel_mode: PARALLEL_OPPORTUNISTIC, PARALLEL_AUTO or PARALLEL_DETERMINISTIC defined in cplex_constants.py.
+        """
+        self.cplex_model.parameters.parallel.set(parallel_mode)
+
+    def set_mip_emphasis(self, mip_emphasis: int) -> None:
+        """Sets the MIP emphasis of cplex, i.e., the trade-off between finding feasible solutions and proving optimality.
+
+        Args:
+            mip_emphasis: One of the MIP_EMPHASIS constants defined in cplex_constants.py.
+        """
+        self.cplex_model.parameters.emphasis.mip.set(mip_emphasis)
+
+    def set_node_file(self, node_file: int, work_dir: Optional[str] = None) -> None:
+        """Sets where cplex stores the nodes of the branch and bound tree once their size exceeds the memory limit.
+
+        Args:
+            node_file: One of the NODE_FILE constants defined in cplex_constants.py.
+            work_dir: Directory where the node files are written when they are kept on disk. Defaults to None (CPLEX_WORK_DIR).
+        """
+        self.cplex_model.parameters.mip.strategy.file.set(node_file)
+        if node_file in [NODE_FILE_DISK, NODE_FILE_DISK_COMPRESSED]:
+            work_dir = CPLEX_WORK_DIR if work_dir is None else work_dir
+            os.makedirs(work_dir, exist_ok=True)
+            self.cplex_model.parameters.workdir.set(work_dir)
+
+    def set_heuristic_frequency(self, heuristic_frequency: int) -> None:
+        """Sets how often cplex applies its node heuristic.
+
+        Args:
+            heuristic_frequency: HEURISTIC_FREQUENCY_NONE, HEURISTIC_FREQUENCY_AUTO or a positive number n to apply the heuristic every n nodes.
+        """
+        self.cplex_model.parameters.mip.strategy.heuristicfreq.set(heuristic_frequency)
+
+    def set_memory_emphasis(self, memory_emphasis: bool) -> None:
+        """Sets whether cplex conserves memory where possible.
+
+        Args:
+            memory_emphasis: If True, cplex compresses data structures and uses node files earlier.
+        """
+        self.cplex_model.parameters.emphasis.memory.set(1 if memory_emphasis else 0)
+
+    def set_profile(self, profile: str) -> None:
+        """Sets a named profile of cplex parameters. The name is either a key of CPLEX_PROFILES or a profile saved by tune_cplex.py in TUNING_DIR.
+
+        Args:
+            profile: Name of the profile.
+        """
+        if profile in CPLEX_PROFILES:
+            self.set_performance_parameters(CPLEX_PROFILES[profile])
+        elif os.path.isfile(TUNING_DIR + profile + ".prm"):
+            self.cplex_model.parameters.read_file(TUNING_DIR + profile + ".prm")
+        else:
+            raise ValueError(f"Unknown cplex profile: {profile}")
 
-        total_distance = 0
-        drones_deployement = self.get_drones_deployement()
-        for drone in range(self.n_available_drones):
-            total_distance += self.input_graph.get_distance(self.input_graph.base_station, drones_deployement[0][drone]) # depoyement cost
-            total_distance += self.input_graph.get_distance(drones_deployement[self.observation_period-1][drone], self.input_graph.base_station) # return to base cost
-            for t in range(1, self.observation_period):
-                total_distance += self.input_graph.get_distance(drones_deployement[t-1][drone], drones_deployement[t][drone]) # movement cost
+    def set_performance_parameters(self, parameters: dict) -> None:
+        """Sets the cplex performance parameters found in a parameters dictionary. Keys that are missing or None are left unchanged.
 
-        return total_distance
+        Args:
+            parameters: Dictionary with any of the keys cplex_threads, cplex_parallel_mode, cplex_mip_emphasis, cplex_node_file, cplex_heuristic_frequency and cplex_memory_emphasis. Refer to parameters.py.
+        """
+        setters = {"cplex_threads": self.set_threads,
+                   "cplex_parallel_mode": self.set_parallel_mode,
+                   "cplex_mip_emphasis": self.set_mip_emphasis,
+                   "cplex_node_file": self.set_node_file,
+                   "cplex_heuristic_frequency": self.set_heuristic_frequency,
+                   "cplex_memory_emphasis": self.set_memory_emphasis}
+        for key, setter in setters.items():
+            if parameters.get(key) is not None:
+                setter(parameters[key])
+
+    def set_parameters(self, parameters: dict) -> None:
+        """Sets all cplex parameters from a parameters dictionary: first the profile cplex_profile, then the time and memory limits and the performance parameters that are not None. If cplex_telemetry_interval is not None, the progress of cplex is recorded (refer to set_telemetry).
+
+        Args:
+            parameters: Parameters dictionary. Refer to parameters.py.
+        """
+        self.set_profile(parameters.get("cplex_profile", "default"))
+        self.set_time_limit(parameters.get("cplex_time_limit", 0))
+        self.set_memory_limit(parameters.get("cplex_workmem_limit", 0))
+        self.set_performance_parameters(parameters)
+        if parameters.get("cplex_telemetry_interval") is not None:
+            self.set_telemetry(parameters["cplex_telemetry_interval"])
+
+    def get_solution_distance(self) -> float:
+        """Returns the distance traveled by the drones in the solution. If the solution was not reached, returns -1."""
+        return self.get_solution().get_distance()
 
     def get_solution_energy(self) -> float:
         """Returns the energy consumed by the drones in the solution. If the solution was not reached, returns -1."""
-        if not self.cplex_model.solution.get_status() in [OPTIMAL_SOLUTION, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE, TIME_LIMIT_FEASIBLE, MEMORY_LIMIT_FEASIBLE]:
-            return -1
-
-        total_energy = 0
-        drones_deployement = self.get_drones_deployement()
-        for drone in range(self.n_available_drones):
-            total_energy += energy(self.input_graph.get_distance(self.input_graph.base_station, drones_deployement[0][drone]), self.time_step_delta, False) # depoyement cost
-            total_energy += energy(self.input_graph.get_distance(drones_deployement[self.observation_period-1][drone], self.input_graph.base_station), self.time_step_delta, False) # return to base cost
-            for t in range(1, self.observation_period):
-                hover = False if (drones_deployement[t-1][drone] == self.input_graph.base_station or drones_deployement[t][drone] == self.input_graph.base_station) else True
-                total_energy += energy(self.input_graph.get_distance(drones_deployement[t-1][drone], drones_deployement[t][drone]), self.time_step_delta, hover=hover) # movement cost
-
-        return total_energy
+        return self.get_solution().get_energy()
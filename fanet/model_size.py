@@ -0,0 +1,108 @@
+"""Predicts the size and memory of MilpModel before building it.
+    The numbers of variables, constraints and nonzeros are computed exactly from the graph and the trace, following the definitions of MilpModel, without creating any of them.
+    The memory is predicted from these numbers with the per-item costs below. They can be recalibrated from the peak memory recorded by benchmarks/benchmark_model_build.py.
+"""
+from typing import Optional
+import numpy as np
+from fanet.graph import Graph
+from fanet.targets_trace import TargetsTrace
+
+# Bytes held by Python for each variable, constraint and nonzero while the model is built (dictionaries, names and the lists copied for cplex)
+PYTHON_BYTES_PER_VARIABLE = 450
+PYTHON_BYTES_PER_CONSTRAINT = 400
+PYTHON_BYTES_PER_NONZERO = 150
+# Bytes held by cplex for each variable, constraint and nonzero of the model (names, bounds and the matrix stored by rows and columns)
+CPLEX_BYTES_PER_VARIABLE = 120
+CPLEX_BYTES_PER_CONSTRAINT = 120
+CPLEX_BYTES_PER_NONZERO = 32
+
+def get_comm_adjacency(graph: Graph) -> tuple:
+    """Returns the communication links of the graph as boolean arrays, following Graph.get_positions_in_comm_range.
+
+    Returns:
+        Tuple (adjacency, base_adjacency). adjacency[i, j] is True if positions i and j of P are distinct and in communication range. base_adjacency[i] is True if position i is in communication range of the base station.
+    """
+    distance_matrix = graph.get_distance_matrix()
+    adjacency = distance_matrix[:-1, :-1] <= graph.communication_range
+    np.fill_diagonal(adjacency, False)
+    base_adjacency = distance_matrix[-1, :-1] <= graph.communication_range
+    return adjacency, base_adjacency
+
+def get_coverage(graph: Graph, targets_positions: np.ndarray) -> np.ndarray:
+    """Returns which positions cover which targets, following Graph.get_target_coverage.
+
+    Args:
+        graph: Graph of the problem.
+        targets_positions: Array of shape (n_targets, observation_period, 2).
+
+    Returns:
+        Boolean array of shape (observation_period, n_targets, |P|).
+    """
+    positions = np.array(graph.deployment_positions, dtype=float).reshape(-1, 3)
+    coverage = np.zeros((targets_positions.shape[1], targets_positions.shape[0], len(positions)), dtype=bool)
+    for t in range(targets_positions.shape[1]):
+        distances = np.linalg.norm(positions[None, :, :2] - targets_positions[:, t, None, :], axis=2)
+        coverage[t] = distances <= graph.coverage_tan_angle * positions[None, :, 2]
+    return coverage
+
+def estimate_model_size(graph: Graph, targets_trace: TargetsTrace, n_drones: int, observation_period: int, chunk_size: Optional[int] = None, movement_formulation: Optional[str] = "mccormick") -> dict:
+    """Computes the exact size of the MilpModel of an instance and predicts its memory, without building it.
+
+    Args:
+        graph: Graph of the problem.
+        targets_trace: Trace of the targets.
+        n_drones: Number of available drones.
+        observation_period: Number of time steps.
+        chunk_size: Size of the chunks if the model is built in chunks (refer to MilpModel.build_model). Defaults to None (the whole model is held by Python).
+        movement_formulation: Formulation of the drone movements (refer to MilpModel.define_drone_movement_constraints). Defaults to "mccormick".
+
+    Returns:
+        Dictionary with the keys n_variables, n_constraints and n_nonzeros, and the predicted memory in MB: python_memory_mb (peak while building, one chunk of variables or constraints when building in chunks), cplex_memory_mb (model inside cplex, without the branch and bound tree) and total_memory_mb (both).
+    """
+    n_positions = len(graph.deployment_positions)
+    T, D = observation_period, n_drones
+    targets_positions = targets_trace.get_positions()[:, :T]
+    adjacency, base_adjacency = get_comm_adjacency(graph)
+    coverage = get_coverage(graph, targets_positions)
+    n_links = int(adjacency.sum() + base_adjacency.sum())
+    n_coverage_links = int(coverage.sum())
+    n_movements = T * D * (n_positions + 1) ** 2 if T > 1 else 0
+
+    n_variables = T * (n_positions + 1) + T * D * (n_positions + 1) + T * n_links + n_coverage_links + n_movements
+
+    # Flow conservation at the positions and at the targets
+    n_constraints = T * n_positions + coverage.shape[1] * T
+    n_nonzeros = T * int(base_adjacency.sum() + 2 * adjacency.sum()) + 2 * n_coverage_links
+    # Flow only leaves positions with a drone: one constraint with 2 nonzeros per link
+    n_constraints += T * n_links + n_coverage_links
+    n_nonzeros += 2 * (T * n_links + n_coverage_links)
+    # Drone integrity and position use
+    n_constraints += T * D + T * n_positions
+    n_nonzeros += T * D * (n_positions + 1) + T * n_positions * (D + 1)
+    # Drone movements with flows: 2 constraints with |P| + 2 nonzeros per (t > 0, drone, p)
+    if T > 1 and movement_formulation == "flow":
+        n_constraints += 2 * (T - 1) * D * (n_positions + 1)
+        n_nonzeros += 2 * (T - 1) * D * (n_positions + 1) * (n_positions + 2)
+    # Drone movements: 3 constraints with 2, 2 and 3 nonzeros per (t > 0, drone, p, q)
+    elif T > 1:
+        n_constraints += 3 * (T - 1) * D * (n_positions + 1) ** 2
+        n_nonzeros += 7 * (T - 1) * D * (n_positions + 1) ** 2
+
+    python_memory = n_variables * PYTHON_BYTES_PER_VARIABLE + n_constraints * PYTHON_BYTES_PER_CONSTRAINT + n_nonzeros * PYTHON_BYTES_PER_NONZERO
+    if chunk_size is not None:
+        # The largest of a chunk of variables and a chunk of constraints with the average number of nonzeros
+        python_memory = max(min(chunk_size, n_variables) * PYTHON_BYTES_PER_VARIABLE,
+                            min(chunk_size, n_constraints) * (PYTHON_BYTES_PER_CONSTRAINT + n_nonzeros / max(n_constraints, 1) * PYTHON_BYTES_PER_NONZERO))
+    cplex_memory = n_variables * CPLEX_BYTES_PER_VARIABLE + n_constraints * CPLEX_BYTES_PER_CONSTRAINT + n_nonzeros * CPLEX_BYTES_PER_NONZERO
+    return {"n_variables": n_variables,
+            "n_constraints": n_constraints,
+            "n_nonzeros": n_nonzeros,
+            "python_memory_mb": python_memory / 2**20,
+            "cplex_memory_mb": cplex_memory / 2**20,
+            "total_memory_mb": (python_memory + cplex_memory) / 2**20}
+
+def exceeds_memory_budget(estimate: dict, parameters: dict) -> bool:
+    """Returns True if the predicted memory of a run plus the cplex working memory exceeds the memory_budget parameter (in MB). A memory_budget of None means no budget."""
+    if parameters.get("memory_budget") is None:
+        return False
+    return estimate["total_memory_mb"] + parameters["cplex_workmem_limit"] > parameters["memory_budget"]
@@ -0,0 +1,127 @@
+"""Coarse-to-fine solving of MilpModel for fine grids whose model is too large to solve directly.
+    The model is first solved on a coarse grid. At each finer resolution, the grid keeps only the positions in the neighbourhood of the positions used by the previous solution, plus these positions themselves, so the previous solution stays feasible and is given to cplex as a warm start.
+    The last resolution is the one of the input graph. The result is a feasible deployment on the fine grid that is not guaranteed to be optimal, but costs at most as much as the coarse one when cplex solves each resolution to optimality.
+    Usage: python fanet/multi_resolution.py [--resolutions 3 5] [--n-positions N] [--n-drones D] [--n-targets S] [--instance I] [--neighbourhood F]
+"""
+from typing import Optional
+import argparse
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.config import PARAMETERS
+
+def get_grid_spacing(input_graph: Graph) -> float:
+    """Returns the distance between two neighbouring positions of the grid of input_graph."""
+    return input_graph.size_A / (input_graph.n_positions_per_axis + 1)
+
+def refine_positions(used_positions: list, fine_graph: Graph, radius: float) -> list:
+    """Returns the positions of the grid of fine_graph whose horizontal distance to a used position is at most radius, followed by the used positions that are not on this grid.
+
+    Args:
+        used_positions: Positions (x, y, h) used by a coarser solution.
+        fine_graph: Graph with the full grid of the finer resolution.
+        radius: Radius of the neighbourhood of the used positions.
+    """
+    if not used_positions:
+        return []
+    grid = np.array(fine_graph.deployment_positions, dtype=float).reshape(-1, 3)
+    used = np.array(used_positions, dtype=float).reshape(-1, 3)
+    distances = np.linalg.norm(grid[:, None, :2] - used[None, :, :2], axis=2)
+    refined = [position for position, close in zip(fine_graph.deployment_positions, (distances <= radius + 1e-9).any(axis=1)) if close]
+    # Up to rounding, a used position may already be on the grid
+    on_grid = (np.linalg.norm(grid[:, None, :] - used[None, :, :], axis=2) <= 1e-9).any(axis=0)
+    return refined + [position for position, found in zip(used_positions, on_grid) if not found]
+
+class MultiResolutionSolver:
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, targets_trace: TargetsTrace, input_graph: Graph, alpha: float, beta: float, resolutions: list, parameters: Optional[dict] = None, neighbourhood: Optional[float] = 1) -> None:
+        """Solves the model on grids of increasing resolution. Refer to the description of this module.
+
+        Args:
+            input_graph: Graph with the target resolution.
+            resolutions: Numbers of axis splits of the coarser grids, solved in increasing order before the one of input_graph.
+            parameters: cplex parameters of every resolution (refer to MilpModel.set_parameters). Defaults to None (cplex defaults).
+            neighbourhood: Radius of the neighbourhood of the used positions, as a multiple of the grid spacing of the previous resolution. Defaults to 1.
+            Refer to MilpModel for the other arguments.
+        """
+        self.n_available_drones = n_available_drones
+        self.observation_period = observation_period
+        self.time_step_delta = time_step_delta
+        self.targets_trace = targets_trace
+        self.input_graph = input_graph
+        self.alpha = alpha
+        self.beta = beta
+        self.resolutions = sorted(n for n in resolutions if n < input_graph.n_positions_per_axis) + [input_graph.n_positions_per_axis]
+        self.parameters = parameters
+        self.neighbourhood = neighbourhood
+
+    def get_graph(self, n_positions_per_axis: int) -> Graph:
+        """Returns the graph of input_graph with the full grid of the given resolution."""
+        return Graph(self.input_graph.size_A, self.input_graph.heights, self.input_graph.base_station, n_positions_per_axis, self.input_graph.communication_range, np.arctan(self.input_graph.coverage_tan_angle))
+
+    def solve_resolution(self, graph: Graph, warm_start: Optional[np.ndarray] = None) -> MilpModel:
+        """Builds and solves the model of a graph, with a warm start if given. The caller closes the model."""
+        model = MilpModel(self.n_available_drones, self.observation_period, self.time_step_delta, self.targets_trace, graph, self.alpha, self.beta, model_name=f"MILP_Model_p_{graph.n_positions_per_axis}",
+                          movement_formulation=self.parameters.get("movement_formulation", "mccormick") if self.parameters is not None else "mccormick")
+        model.model_shut_up()
+        if self.parameters is not None:
+            model.set_parameters(self.parameters)
+        model.build_model(self.parameters.get("model_build_chunk_size") if self.parameters is not None else None)
+        if warm_start is not None:
+            model.set_warm_start(warm_start)
+        model.solve_model()
+        return model
+
+    def solve(self, verbose: Optional[bool] = False) -> dict:
+        """Solves every resolution, each one on the neighbourhood of the solution of the previous one. If a resolution has no feasible solution, the next one uses its full grid.
+
+        Args:
+            verbose: If True, prints the result of every resolution. Defaults to False.
+
+        Returns:
+            Dictionary with the keys solution (Solution of the last resolution), graph (its graph, with the refined positions), solution_time (sum over the resolutions)
+            and history (list of dictionaries with the keys n_positions_per_axis, n_positions, objective_value and solution_time of every resolution).
+        """
+        result = {"solution": None, "graph": None, "solution_time": 0, "history": []}
+        previous_positions, previous_deployment, previous_spacing = None, None, None
+        for n_positions_per_axis in self.resolutions:
+            graph = self.get_graph(n_positions_per_axis)
+            warm_start = None
+            if previous_deployment is not None:
+                used = sorted({previous_positions[index] for index in previous_deployment.flatten() if index < len(previous_positions) - 1})
+                graph.deployment_positions = refine_positions(used, graph, self.neighbourhood * previous_spacing)
+                # Every previous position is in the refined grid, the closest one up to rounding
+                previous_array = np.array(previous_positions, dtype=float).reshape(-1, 3)
+                mapping = np.argmin(np.linalg.norm(previous_array[:, None, :] - graph.get_positions_array()[None, :, :], axis=2), axis=1)
+                warm_start = mapping[previous_deployment]
+            model = self.solve_resolution(graph, warm_start)
+            solution = model.get_solution()
+            model.cplex_finish()
+
+            result["solution"], result["graph"] = solution, graph
+            result["solution_time"] += solution.solution_time
+            result["history"].append({"n_positions_per_axis": n_positions_per_axis, "n_positions": len(graph.deployment_positions), "objective_value": solution.objective_value, "solution_time": solution.solution_time})
+            if verbose:
+                print(f"p = {n_positions_per_axis}: {len(graph.deployment_positions)} positions | objective: {solution.objective_value:.4f} | {solution.solution_time:.1f}s", flush=True)
+            if solution.is_feasible():
+                previous_positions, previous_deployment, previous_spacing = solution.positions, solution.deployment, get_grid_spacing(graph)
+            else:
+                previous_positions, previous_deployment = None, None
+        return result
+
+if __name__ == "__main__":
+    from fanet.trace_store import load_run_trace
+    from fanet.solve_milp import get_graph
+    parser = argparse.ArgumentParser(description="Solves a run described by PARAMETERS from coarse to fine grids.")
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[3], help="Numbers of axis splits of the coarser grids.")
+    parser.add_argument("--n-positions", type=int, default=PARAMETERS["n_positions"][-1], help="Number of axis splits of the final grid.")
+    parser.add_argument("--n-drones", type=int, default=PARAMETERS["n_drones"][0])
+    parser.add_argument("--n-targets", type=int, default=PARAMETERS["n_targets"][0])
+    parser.add_argument("--instance", type=int, default=0)
+    parser.add_argument("--neighbourhood", type=float, default=1, help="Radius of the neighbourhood of the used positions, in grid spacings of the previous resolution.")
+    args = parser.parse_args()
+
+    trace = load_run_trace(PARAMETERS, args.n_targets, PARAMETERS["targets_speed"][0], args.instance)
+    solver = MultiResolutionSolver(args.n_drones, PARAMETERS["observation_period"], PARAMETERS["time_step_delta"], trace, get_graph(PARAMETERS, args.n_positions), PARAMETERS["alpha"][0], PARAMETERS["beta"], args.resolutions, PARAMETERS, args.neighbourhood)
+    result = solver.solve(verbose=True)
+    print(f"Objective: {result['solution'].objective_value:.4f} on {len(result['graph'].deployment_positions)} of {args.n_positions ** 2 * len(PARAMETERS['heights'])} positions in {result['solution_time']:.1f}s")
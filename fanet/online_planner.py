@@ -0,0 +1,255 @@
+"""Online re-optimization of the deployment while the target positions arrive step by step.
+    At each step the planner solves a window of horizon + 1 time steps: time step 0 holds the current deployment (fixed) and time steps 1 to horizon the latest target positions followed by their predictions.
+    The part of the model that does not depend on the targets (positions, drones, links between positions and movements) is built once. Only the flows to the targets are replaced at each step.
+    The plan of the previous step, shifted by one time step, is given to cplex as a warm start, and the time limit of cplex is what remains of the latency budget.
+    Usage: python fanet/online_planner.py [--n-targets N] [--n-drones D] [--horizon H] [--latency-budget SECONDS] [--steps T] [--seed S]
+"""
+from typing import Optional
+import argparse
+import time
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel
+from fanet.model_size import get_coverage
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.cplex_constants import CONTINUOUS_VARIABLE, GREATER_EQUAL, LESS_EQUAL
+from fanet.setup.config import PARAMETERS
+
+# Minimum time limit given to cplex when the update of the model used most of the latency budget
+MIN_SOLVE_TIME = 0.01
+
+class OnlineMilpModel(MilpModel):
+    # Time step of the first positions given to set_targets, time step 0 is the current deployment
+    first_target_step = 1
+
+    def __init__(self, n_available_drones: int, horizon: int, time_step_delta: float, input_graph: Graph, alpha: float, beta: float, max_targets: int, movement_formulation: Optional[str] = "mccormick") -> None:
+        """MilpModel of a window of horizon + 1 time steps whose targets can be replaced without building the model again. It is built without targets, and set_targets adds the flows to the targets of time steps 1 to horizon.
+        The drones do not return to the base station at the end of the window, so the return cost is not in the objective function.
+
+        Args:
+            n_available_drones: Number of drones available.
+            horizon: Number of time steps after the current one.
+            time_step_delta: Amount of seconds between time steps.
+            input_graph: The topology of the problem.
+            alpha: Weight of objective function metrics.
+            beta: Objective function normalization parameter.
+            max_targets: Maximum number of targets of a window. It bounds the flows.
+            movement_formulation: Refer to MilpModel. Defaults to "mccormick".
+        """
+        # Trace without targets, built from positions so it does not draw from the global numpy random state
+        no_targets = TargetsTrace.from_positions(np.empty((0, horizon + 1, 2)), 0, input_graph.size_A, time_step_delta)
+        super().__init__(n_available_drones, horizon + 1, time_step_delta, no_targets, input_graph, alpha, beta, model_name="Online_MILP_Model", movement_formulation=movement_formulation)
+        self.max_targets = max_targets
+        self.target_variables = []
+        self.target_constraints = []
+
+    def get_max_flow(self) -> int:
+        """Returns max_targets, since the number of targets changes between windows."""
+        return self.max_targets
+
+    def var_f_t_p_target(self, time_step: int, position: tuple, target: int) -> str:
+        """Returns the name of the flow variable from position to the target with index target at time step. Targets are named by index since their positions change between windows."""
+        return f"f_t_{time_step}_p_{position}_target_{target}".replace(" ", "")
+
+    def build_model(self) -> None:
+        """Builds the part of the model that does not depend on the targets and removes the return cost from the objective function."""
+        super().build_model()
+        self.cplex_model.objective.set_linear([(self.var_z_t_p(self.observation_period - 1, p), 0) for p in self.input_graph.deployment_positions])
+
+    def set_targets(self, targets_positions: np.ndarray) -> None:
+        """Replaces the flows to the targets by the ones of new target positions.
+
+        Args:
+            targets_positions: Array of shape (horizon, n_targets, 2). Entry [t] holds the positions at time step t + first_target_step of the window.
+        """
+        if targets_positions.shape[1] > self.max_targets:
+            raise ValueError(f"{targets_positions.shape[1]} targets exceed max_targets = {self.max_targets}")
+        if self.target_constraints:
+            self.cplex_model.linear_constraints.delete(self.target_constraints)
+        if self.target_variables:
+            self.cplex_model.variables.delete(self.target_variables)
+
+        # coverage[t, target, p] is True if p covers the target at time step t + first_target_step
+        coverage = get_coverage(self.input_graph, np.transpose(targets_positions, (1, 0, 2)))
+        positions = self.input_graph.deployment_positions
+        self.target_variables = []
+        self.target_constraints = []
+        coefficients = []
+        expressions = []
+        senses = []
+        rhs = []
+        for t in range(self.first_target_step, self.first_target_step + coverage.shape[0]):
+            for target in range(coverage.shape[1]):
+                covering = np.flatnonzero(coverage[t - self.first_target_step, target])
+                flows = [self.var_f_t_p_target(t, positions[p], target) for p in covering]
+                self.target_variables += flows
+                # The flow to the target leaves p
+                coefficients += [(f"flow_conservation_t_{t}_p_{positions[p]}", flow, 1) for p, flow in zip(covering, flows)]
+                # The target receives at least one flow
+                self.target_constraints.append(f"flow_conservation_t_{t}_target_{target}")
+                expressions.append([flows, [1] * len(flows)])
+                senses.append(GREATER_EQUAL)
+                rhs.append(1)
+                # A flow only leaves p if a drone is deployed at p
+                for p, flow in zip(covering, flows):
+                    self.target_constraints.append(f"drone_flow_constr_{t}_p_{positions[p]}_target_{target}")
+                    expressions.append([[flow, self.var_z_t_p(t, positions[p])], [1, -self.max_targets]])
+                    senses.append(LESS_EQUAL)
+                    rhs.append(0)
+
+        n_flows = len(self.target_variables)
+        self.cplex_model.variables.add(names=self.target_variables, lb=[0] * n_flows, ub=[self.max_targets] * n_flows, types=[CONTINUOUS_VARIABLE] * n_flows)
+        if coefficients:
+            self.cplex_model.linear_constraints.set_coefficients(coefficients)
+        self.cplex_model.linear_constraints.add(lin_expr=expressions, senses=senses, rhs=rhs, names=self.target_constraints)
+
+    def set_current_deployment(self, deployment: np.ndarray) -> None:
+        """Fixes the positions of the drones at time step 0 of the window.
+
+        Args:
+            deployment: Integer array of shape (n_available_drones,) of position indices, the base station last.
+        """
+        values = self.get_deployment_values(deployment[None, :])
+        indices = list(range(self.z_t_drone_p_index, self.z_t_drone_p_index + len(values)))
+        self.cplex_model.variables.set_lower_bounds(list(zip(indices, values)))
+        self.cplex_model.variables.set_upper_bounds(list(zip(indices, values)))
+
+class OnlinePlanner:
+    def __init__(self, input_graph: Graph, n_available_drones: int, time_step_delta: float, alpha: float, beta: float, max_targets: int, horizon: Optional[int] = 1, latency_budget: Optional[float] = 1, parameters: Optional[dict] = None) -> None:
+        """Decides the next deployment of the drones each time the target positions are updated. Refer to the description of this module.
+
+        Args:
+            input_graph: The topology of the problem.
+            n_available_drones: Number of drones available.
+            time_step_delta: Amount of seconds between time steps.
+            alpha: Weight of objective function metrics.
+            beta: Objective function normalization parameter.
+            max_targets: Maximum number of targets at a time step.
+            horizon: Number of time steps planned at each step, the next one and horizon - 1 predicted ones. Defaults to 1.
+            latency_budget: Seconds available to decide each deployment, updates of the model included. Defaults to 1.
+            parameters: Parameters dictionary whose cplex parameters are used (refer to MilpModel.set_parameters), except the time limit. Defaults to None (cplex defaults).
+        """
+        self.horizon = horizon
+        self.latency_budget = latency_budget
+        self.model = OnlineMilpModel(n_available_drones, horizon, time_step_delta, input_graph, alpha, beta, max_targets)
+        self.model.model_shut_up()
+        if parameters is not None:
+            self.model.set_parameters(parameters)
+        self.model.build_model()
+        # All drones start at the base station
+        self.deployment = np.full(n_available_drones, len(input_graph.deployment_positions))
+        self.plan = None
+        self.history = []
+
+    def get_window_positions(self, targets_positions: np.ndarray, predicted_positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the target positions of time steps 1 to horizon of the window. Without predictions, the targets are assumed to stay where they are.
+
+        Args:
+            targets_positions: Array of shape (n_targets, 2) with the latest positions.
+            predicted_positions: Array of shape (horizon - 1, n_targets, 2). Defaults to None.
+
+        Returns:
+            Array of shape (horizon, n_targets, 2).
+        """
+        targets_positions = np.asarray(targets_positions, dtype=float).reshape(1, -1, 2)
+        if predicted_positions is None:
+            return np.repeat(targets_positions, self.horizon, axis=0)
+        return np.concatenate([targets_positions, np.asarray(predicted_positions, dtype=float).reshape(self.horizon - 1, -1, 2)])
+
+    def step(self, targets_positions: np.ndarray, predicted_positions: Optional[np.ndarray] = None, current_deployment: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decides the deployment of the next time step. If cplex finds no feasible deployment within the latency budget, the drones stay where they are.
+
+        Args:
+            targets_positions: Array of shape (n_targets, 2) with the positions the next deployment must cover.
+            predicted_positions: Array of shape (horizon - 1, n_targets, 2) with the predicted positions of the following time steps. Defaults to None (the targets stay where they are).
+            current_deployment: Integer array of shape (n_available_drones,) of position indices (deployment_positions + [base_station]). Defaults to None (the last decision).
+
+        Returns:
+            Integer array of shape (n_available_drones,) of position indices. The latency of the decision is appended to history.
+        """
+        start_time = time.perf_counter()
+        current_deployment = self.deployment if current_deployment is None else np.asarray(current_deployment, dtype=int)
+        self.model.set_current_deployment(current_deployment)
+        self.model.set_targets(self.get_window_positions(targets_positions, predicted_positions))
+        # The previous plan shifted by one time step, otherwise the drones stay where they are
+        if self.plan is not None:
+            warm_start = np.concatenate([current_deployment[None, :], self.plan[2:], self.plan[-1:]])
+        else:
+            warm_start = np.repeat(current_deployment[None, :], self.horizon + 1, axis=0)
+        self.model.set_warm_start(warm_start)
+        update_time = time.perf_counter() - start_time
+
+        self.model.set_time_limit(max(self.latency_budget - update_time, MIN_SOLVE_TIME))
+        self.model.solve_model()
+        solution = self.model.get_solution()
+        if solution.is_feasible():
+            self.plan = solution.deployment
+            self.deployment = self.plan[1].copy()
+        else:
+            self.plan = None
+            self.deployment = current_deployment.copy()
+        latency = time.perf_counter() - start_time
+
+        self.history.append({"latency": latency,
+                             "update_time": update_time,
+                             "solve_time": solution.solution_time,
+                             "status": solution.status,
+                             "objective_value": solution.objective_value,
+                             "mip_gap": solution.mip_gap,
+                             "feasible": solution.is_feasible(),
+                             "warm_start": self.plan is not None})
+        return self.deployment.copy()
+
+    def get_latency_summary(self) -> dict:
+        """Returns the number of steps, the mean, median, 95th percentile and maximum latency in seconds, and the number of steps over the latency budget and without a feasible deployment."""
+        latencies = np.array([step["latency"] for step in self.history])
+        return {"n_steps": len(latencies),
+                "mean_latency": float(latencies.mean()),
+                "median_latency": float(np.median(latencies)),
+                "p95_latency": float(np.percentile(latencies, 95)),
+                "max_latency": float(latencies.max()),
+                "n_over_budget": int((latencies > self.latency_budget).sum()),
+                "n_infeasible": sum(not step["feasible"] for step in self.history)}
+
+    def finish(self) -> None:
+        """Closes the cplex model."""
+        self.model.cplex_finish()
+
+def run_online(planner: OnlinePlanner, trace: TargetsTrace, verbose: Optional[bool] = False) -> np.ndarray:
+    """Replays a trace step by step through the planner, giving it the true future positions as predictions.
+
+    Returns:
+        Integer array of shape (observation_period, n_available_drones) with the deployment decided at each time step.
+    """
+    positions = trace.get_positions()
+    deployments = []
+    for t in range(trace.observation_period):
+        # Positions after the end of the trace are assumed to stay where they are
+        window = positions[:, np.minimum(np.arange(t, t + planner.horizon), trace.observation_period - 1)].transpose(1, 0, 2)
+        deployments.append(planner.step(window[0], window[1:]))
+        if verbose:
+            step = planner.history[-1]
+            print(f"[{t + 1}/{trace.observation_period}] latency: {step['latency'] * 1000:.0f} ms (update {step['update_time'] * 1000:.0f} ms) | objective: {step['objective_value']:.2f} | deployment: {deployments[-1].tolist()}", flush=True)
+    return np.array(deployments)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays a random trace through the online planner and reports the latency of each decision.")
+    parser.add_argument("--n-targets", type=int, default=PARAMETERS["n_targets"][0], help="Number of targets.")
+    parser.add_argument("--n-drones", type=int, default=PARAMETERS["n_drones"][0], help="Number of drones.")
+    parser.add_argument("--horizon", type=int, default=2, help="Number of time steps planned at each step.")
+    parser.add_argument("--latency-budget", type=float, default=1, help="Seconds available to decide each deployment.")
+    parser.add_argument("--steps", type=int, default=20, help="Number of time steps of the trace.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the trace.")
+    args = parser.parse_args()
+
+    graph = Graph(size_A = PARAMETERS["area_size"],
+                  heights = PARAMETERS["heights"],
+                  base_station = PARAMETERS["base_station"],
+                  n_positions_per_axis = PARAMETERS["n_positions"][0],
+                  communication_range = PARAMETERS["comm_range"],
+                  coverage_angle = PARAMETERS["coverage_angle"])
+    trace = TargetsTrace(args.n_targets, args.steps, PARAMETERS["targets_speed"][0], PARAMETERS["area_size"], PARAMETERS["time_step_delta"], seed=args.seed, graph=graph)
+    planner = OnlinePlanner(graph, args.n_drones, PARAMETERS["time_step_delta"], PARAMETERS["alpha"][0], PARAMETERS["beta"], args.n_targets, args.horizon, args.latency_budget, PARAMETERS)
+    run_online(planner, trace, verbose=True)
+    print(planner.get_latency_summary())
+    planner.finish()
@@ -0,0 +1,100 @@
+"""This script runs the parameter sweep of solve_milp.py in parallel.
+    Each run is solved in its own process, so a cplex crash or an out of memory kill only fails that run.
+    The cores and the cplex working memory are split between the workers.
+    Usage: python fanet/parallel_runner.py [--workers N] [--cores N] [--memory MB]
+"""
+from typing import Optional, Callable
+import argparse
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+from fanet.solve_milp import run_milp_model, get_graph, get_sweep_jobs, setup_experiment_dir
+from fanet.setup.config import PARAMETERS
+
+def get_worker_parameters(parameters: dict, n_workers: int, total_cores: int, total_memory: Optional[int] = None) -> dict:
+    """Returns a copy of the parameters dictionary with the cplex threads and working memory of one worker.
+
+    Args:
+        parameters: Parameters dictionary of the experiment.
+        n_workers: Number of runs solved simultaneously.
+        total_cores: Number of cores shared by all workers.
+        total_memory: Cplex working memory in MB shared by all workers. If None, each worker keeps cplex_workmem_limit. Defaults to None.
+
+    Returns:
+        Parameters dictionary where cplex_threads is total_cores // n_workers (at least 1) and cplex_workmem_limit is at most total_memory // n_workers.
+    """
+    worker_parameters = dict(parameters)
+    worker_parameters["cplex_threads"] = max(1, total_cores // n_workers)
+    if total_memory is not None:
+        worker_parameters["cplex_workmem_limit"] = min(parameters["cplex_workmem_limit"], total_memory // n_workers)
+    return worker_parameters
+
+def run_job(job: dict, parameters: dict) -> None:
+    """Solves one run of the sweep. This is the target of the worker processes.
+
+    Args:
+        job: Run as returned by solve_milp.get_sweep_jobs.
+        parameters: Parameters dictionary of the worker.
+    """
+    graph = get_graph(parameters, job["n_positions"])
+    run_milp_model(job["n_targets"], job["n_drones"], job["target_speed"], job["instance"], graph, job["alpha"], parameters)
+
+def run_parallel(jobs: list, parameters: dict, n_workers: int, on_job_started: Optional[Callable] = None, on_job_finished: Optional[Callable] = None, verbose: Optional[bool] = True) -> list:
+    """Solves the jobs in parallel, each one in a new process, with at most n_workers processes at a time. Jobs are started in the order of the list.
+
+    Args:
+        jobs: List of runs as returned by solve_milp.get_sweep_jobs.
+        parameters: Parameters dictionary given to every run. Refer to get_worker_parameters.
+        n_workers: Maximum number of simultaneous processes.
+        on_job_started: Called with the job when its process starts. Defaults to None.
+        on_job_finished: Called with the job and the exit code of its process when it finishes. Defaults to None.
+        verbose: If True, prints the progress every time a job finishes. Defaults to True.
+
+    Returns:
+        List of tuples (job, exit_code) in the order the jobs finished. An exit code other than 0 means the run failed (a negative code is the signal that killed it).
+    """
+    # spawn gives each run a fresh interpreter instead of a copy of this one
+    context = multiprocessing.get_context("spawn")
+    pending = list(jobs)
+    running = {}
+    finished = []
+    n_failed = 0
+    start_time = time.time()
+
+    while pending or running:
+        while pending and len(running) < n_workers:
+            job = pending.pop(0)
+            process = context.Process(target=run_job, args=(job, parameters))
+            process.start()
+            running[process.sentinel] = (process, job)
+            if on_job_started is not None:
+                on_job_started(job)
+
+        for sentinel in multiprocessing.connection.wait(list(running.keys())):
+            process, job = running.pop(sentinel)
+            process.join()
+            finished.append((job, process.exitcode))
+            if process.exitcode != 0:
+                n_failed += 1
+            if on_job_finished is not None:
+                on_job_finished(job, process.exitcode)
+            if verbose:
+                elapsed = time.time() - start_time
+                remaining = elapsed / len(finished) * (len(pending) + len(running))
+                status = "done" if process.exitcode == 0 else f"FAILED (exit code {process.exitcode})"
+                print(f"[{len(finished)}/{len(jobs)}] {status}: {job} | failed: {n_failed} | elapsed: {elapsed:.0f}s | remaining: ~{remaining:.0f}s", flush=True)
+    return finished
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the parameter sweep described by PARAMETERS in parallel.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of runs solved simultaneously.")
+    parser.add_argument("--cores", type=int, default=os.cpu_count(), help="Number of cores shared by all workers.")
+    parser.add_argument("--memory", type=int, default=None, help="Cplex working memory in MB shared by all workers.")
+    args = parser.parse_args()
+
+    setup_experiment_dir(PARAMETERS)
+    worker_parameters = get_worker_parameters(PARAMETERS, args.workers, args.cores, args.memory)
+    finished = run_parallel(get_sweep_jobs(PARAMETERS), worker_parameters, args.workers)
+    failed = [job for job, exit_code in finished if exit_code != 0]
+    print(f"{len(finished) - len(failed)} runs done, {len(failed)} failed.")
@@ -0,0 +1,136 @@
+"""Cache of the solutions of all experiments, addressed by a hash of the trace of the run and of every parameter that affects its model or its solve.
+    A run is solved once into the cache and its files are linked into the directory of every experiment with the same instance, whatever its experiment_name.
+    Each solution file in an experiment directory has a .key file next to it with the hash it was solved for, so a run whose parameters changed (comm_range, heights, cplex_time_limit, ...) is never reused.
+    Solution files written before the cache have no .key file: if their .npz file exists, they are adopted for the key of their experiment instead of being solved again (refer to ResultCache.is_legacy).
+"""
+from typing import Optional
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.config import RESULT_CACHE_DIR
+
+# Parameters that affect the model or the solution of a run, besides n_positions, n_drones, alpha, the trace and the cplex settings. The others (experiment_name, n_instances, ...) are not in the key.
+RESULT_PARAMETERS = ("observation_period", "time_step_delta", "beta", "area_size", "heights", "base_station", "comm_range", "coverage_angle",
+                     "lp_relaxation", "lp_fixing_time_limit", "movement_formulation")
+# Every parameter with this prefix is a cplex setting read by MilpModel.set_parameters, and is in the key unless it is in CPLEX_RESOURCE_PARAMETERS
+CPLEX_PARAMETERS_PREFIX = "cplex_"
+# cplex settings that only change the resources used by a solve or what is recorded about it, not the model or its answer.
+# parallel_runner.get_worker_parameters sets cplex_threads and cplex_workmem_limit from the number of workers, so they must not change the key.
+CPLEX_RESOURCE_PARAMETERS = ("cplex_threads", "cplex_workmem_limit", "cplex_node_file", "cplex_memory_emphasis", "cplex_telemetry_interval")
+# Files of a run, as suffixes of the solution file without its .txt extension. The text file is linked last since it marks the run as complete.
+RESULT_FILE_SUFFIXES = (".npz", "_telemetry.csv", ".txt")
+
+def normalize_value(value):
+    """Returns value with its numbers as floats and its tuples as lists, so 60 and 60.0 or (0, 0, 0) and [0, 0, 0] give the same key."""
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(item) for item in value]
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def get_run_key(parameters: dict, n_positions: int, n_drones: int, alpha: float, trace: TargetsTrace) -> str:
+    """Returns the SHA-256 hash of the trace positions and of the parameters of a run that affect its result: RESULT_PARAMETERS and every cplex setting but CPLEX_RESOURCE_PARAMETERS.
+    The cplex settings that are None are left out, so adding a new one to parameters.py does not change the key of the runs already solved.
+
+    Args:
+        parameters: Parameters dictionary of the experiment. Refer to parameters.py.
+        n_positions: Number of axis splits of the graph.
+        n_drones: Number of available drones.
+        alpha: Weight of objective function metrics.
+        trace: Trace of the run.
+
+    Returns:
+        Hexadecimal string of 64 characters.
+    """
+    run_parameters = {key: normalize_value(parameters.get(key)) for key in RESULT_PARAMETERS}
+    run_parameters.update({key: normalize_value(value) for key, value in parameters.items() if key.startswith(CPLEX_PARAMETERS_PREFIX) and key not in CPLEX_RESOURCE_PARAMETERS and value is not None})
+    run_parameters.update({"n_positions": float(n_positions), "n_drones": float(n_drones), "alpha": float(alpha)})
+    positions = np.ascontiguousarray(trace.get_positions(), dtype=np.float64)
+    run_hash = hashlib.sha256(json.dumps(run_parameters, sort_keys=True).encode())
+    run_hash.update(str(positions.shape).encode())
+    run_hash.update(positions.tobytes())
+    return run_hash.hexdigest()
+
+def link_file(source: str, destination: str) -> None:
+    """Hard links source to destination, replacing destination atomically. Falls back to a copy if the files are on different file systems."""
+    try:
+        os.link(source, destination + ".tmp")
+    except OSError:
+        shutil.copyfile(source, destination + ".tmp")
+    os.replace(destination + ".tmp", destination)
+
+class ResultCache:
+    def __init__(self, cache_dir: Optional[str] = RESULT_CACHE_DIR) -> None:
+        """Directory of solutions named by their key. Refer to get_run_key.
+
+        Args:
+            cache_dir: Directory of the cache. Defaults to RESULT_CACHE_DIR.
+        """
+        self.cache_dir = cache_dir
+
+    def get_entry(self, key: str) -> str:
+        """Returns the path of the text solution file of a key in the cache. The entries are spread over subdirectories named by the first two characters of their key."""
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def contains(self, key: str) -> bool:
+        """Returns True if the run of key is in the cache with its text and .npz files."""
+        entry = self.get_entry(key)
+        return os.path.isfile(entry) and os.path.isfile(entry[:-4] + ".npz")
+
+    def get_key(self, solution_file: str) -> Optional[str]:
+        """Returns the key recorded next to solution_file, or None if it has no .key file."""
+        if not os.path.isfile(solution_file[:-4] + ".key"):
+            return None
+        with open(solution_file[:-4] + ".key", "r") as key_file:
+            return key_file.read().strip()
+
+    def is_linked(self, key: str, solution_file: str) -> bool:
+        """Returns True if solution_file exists and was solved for key."""
+        return os.path.isfile(solution_file) and self.get_key(solution_file) == key
+
+    def is_legacy(self, solution_file: str) -> bool:
+        """Returns True if solution_file and its .npz file exist without a .key file, i.e. the run was solved before the result cache. Such a run can be adopted with store rather than solved again. A run without its .npz file must be solved again, since the cache serves the .npz file."""
+        return os.path.isfile(solution_file) and os.path.isfile(solution_file[:-4] + ".npz") and self.get_key(solution_file) is None
+
+    def link(self, key: str, solution_file: str) -> None:
+        """Links the files of the run of key in the cache to solution_file (refer to RESULT_FILE_SUFFIXES) and records the key next to it.
+
+        Args:
+            key: Key of a run in the cache.
+            solution_file: path + name of the text solution file in the experiment directory.
+        """
+        entry = self.get_entry(key)
+        with open(solution_file[:-4] + ".key.tmp", "w") as key_file:
+            key_file.write(key)
+        os.replace(solution_file[:-4] + ".key.tmp", solution_file[:-4] + ".key")
+        for suffix in RESULT_FILE_SUFFIXES:
+            if os.path.isfile(entry[:-4] + suffix):
+                link_file(entry[:-4] + suffix, solution_file[:-4] + suffix)
+            elif os.path.isfile(solution_file[:-4] + suffix):
+                # Left by another solve of the same run
+                os.remove(solution_file[:-4] + suffix)
+
+    def unlink(self, solution_file: str) -> None:
+        """Removes the files of a run from its experiment directory, leaving the cache unchanged. Files written in place (the telemetry) must be unlinked before solving the run again."""
+        for suffix in (".key",) + RESULT_FILE_SUFFIXES:
+            if os.path.isfile(solution_file[:-4] + suffix):
+                os.remove(solution_file[:-4] + suffix)
+
+    def store(self, key: str, solution_file: str) -> None:
+        """Adds the files of a run solved to solution_file to the cache and records the key next to it.
+
+        Args:
+            key: Key of the run.
+            solution_file: path + name of the text solution file in the experiment directory.
+        """
+        entry = self.get_entry(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        for suffix in RESULT_FILE_SUFFIXES:
+            if os.path.isfile(solution_file[:-4] + suffix):
+                link_file(solution_file[:-4] + suffix, entry[:-4] + suffix)
+        with open(solution_file[:-4] + ".key.tmp", "w") as key_file:
+            key_file.write(key)
+        os.replace(solution_file[:-4] + ".key.tmp", solution_file[:-4] + ".key")
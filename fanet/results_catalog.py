@@ -0,0 +1,279 @@
+"""Catalog of the results of all experiments in a single SQLite file.
+
+Runs are added by solve_milp.run_milp_model as they complete. Results solved before the catalog existed can be imported with:
+    python fanet/results_catalog.py [experiment_name ...]
+If no experiment name is given, every experiment directory in FILES_DIR is imported.
+"""
+from typing import Optional
+import ast
+import os
+import re
+import sqlite3
+import sys
+import numpy as np
+from fanet.solution import load_solution
+from fanet.setup.config import FILES_DIR, RESULTS_CATALOG
+
+# Parameters of a run: (column name, sqlite type), one per key of the parameters dictionaries (refer to parameters.py). Lists and tuples (heights, base_station) are stored as their string representation, booleans as 0 or 1.
+PARAMETER_COLUMNS = [("experiment_name", "TEXT"),
+                     ("n_positions", "INTEGER"),
+                     ("n_drones", "INTEGER"),
+                     ("n_targets", "INTEGER"),
+                     ("targets_speed", "REAL"),
+                     ("alpha", "REAL"),
+                     ("instance", "INTEGER"),
+                     ("observation_period", "INTEGER"),
+                     ("time_step_delta", "REAL"),
+                     ("beta", "REAL"),
+                     ("area_size", "REAL"),
+                     ("heights", "TEXT"),
+                     ("base_station", "TEXT"),
+                     ("comm_range", "REAL"),
+                     ("coverage_angle", "REAL"),
+                     ("n_instances", "INTEGER"),
+                     ("cplex_workmem_limit", "INTEGER"),
+                     ("cplex_time_limit", "INTEGER"),
+                     ("cplex_profile", "TEXT"),
+                     ("cplex_threads", "INTEGER"),
+                     ("cplex_parallel_mode", "INTEGER"),
+                     ("cplex_mip_emphasis", "INTEGER"),
+                     ("cplex_node_file", "INTEGER"),
+                     ("cplex_heuristic_frequency", "INTEGER"),
+                     ("cplex_memory_emphasis", "INTEGER"),
+                     ("memory_budget", "INTEGER"),
+                     ("traces_seed", "INTEGER"),
+                     ("cplex_telemetry_interval", "REAL"),
+                     ("model_build_chunk_size", "INTEGER"),
+                     ("lp_relaxation", "INTEGER"),
+                     ("lp_fixing_time_limit", "REAL"),
+                     ("movement_formulation", "TEXT")]
+# Metrics of a run, named as in solution.SOLUTION_DATA_FIELDS.
+METRIC_COLUMNS = [("status", "INTEGER"),
+                  ("objective_value", "REAL"),
+                  ("distance", "REAL"),
+                  ("energy", "REAL"),
+                  ("solution_time", "REAL"),
+                  ("mip_gap", "REAL"),
+                  ("n_variables", "INTEGER"),
+                  ("n_constraints", "INTEGER"),
+                  ("n_nonzeros", "INTEGER"),
+                  ("lp_bound", "REAL")]
+ALL_COLUMNS = PARAMETER_COLUMNS + METRIC_COLUMNS + [("solution_file", "TEXT")]
+# Pattern of the solution files written by solve_milp.run_milp_model.
+SOLUTION_FILE_PATTERN = re.compile(r"milp_solution_p_(\d+)_d_(\d+)_nt_(\d+)_t_(\d+)_v_(.+)_alpha_(.+)_i_(\d+)\.txt$")
+# Labels of save_solution's text file and the metric they hold.
+SOLUTION_FILE_LABELS = {"Solution status:": "status",
+                        "Objective function value:": "objective_value",
+                        "Total Distance:": "distance",
+                        "Total Energy:": "energy",
+                        "Time to reach the solution:": "solution_time"}
+
+def get_run_parameters(parameters: dict, n_positions: int, n_drones: int, n_targets: int, target_speed: float, alpha: float, instance: int) -> dict:
+    """Returns the parameters of a single run, i.e., the parameters dictionary with the swept lists replaced by the values of the run.
+
+    Args:
+        parameters: Parameters dictionary of the experiment. Refer to parameters.py.
+        n_positions: Number of axis splits of the graph.
+        n_drones: Number of available drones.
+        n_targets: Number of targets.
+        target_speed: Speed of the targets.
+        alpha: Weight of objective function metrics.
+        instance: Index of the trace instance.
+
+    Returns:
+        Dictionary with the keys of PARAMETER_COLUMNS.
+    """
+    run_parameters = {column: parameters.get(column) for column, _ in PARAMETER_COLUMNS}
+    run_parameters.update({"n_positions": n_positions, "n_drones": n_drones, "n_targets": n_targets, "targets_speed": target_speed, "alpha": alpha, "instance": instance})
+    run_parameters["heights"] = str(parameters.get("heights"))
+    run_parameters["base_station"] = str(parameters.get("base_station"))
+    return run_parameters
+
+def read_solution_file(file_name: str) -> dict:
+    """Reads the metrics from a text file written by MilpModel.save_solution.
+
+    Args:
+        file_name: path + name of the solution file.
+
+    Returns:
+        Dictionary with the metrics found in the file.
+    """
+    metrics = {}
+    with open(file_name, "r") as solution_file:
+        for line in solution_file:
+            for label, metric in SOLUTION_FILE_LABELS.items():
+                if line.startswith(label):
+                    metrics[metric] = float(line[len(label):])
+    if "status" in metrics:
+        metrics["status"] = int(metrics["status"])
+    return metrics
+
+def check_columns(columns: list) -> None:
+    """Raises ValueError if a column is not in ALL_COLUMNS. Column names are written into the SQL queries, so only the known ones are accepted."""
+    unknown = [column for column in columns if column not in dict(ALL_COLUMNS)]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}. Choose among {[column for column, _ in ALL_COLUMNS]}.")
+
+class ResultsCatalog:
+    def __init__(self, file_name: Optional[str] = RESULTS_CATALOG) -> None:
+        """Catalog of results stored in a SQLite file, with one row per run and one column per parameter and metric.
+
+        Args:
+            file_name: path + name of the SQLite file. Use ":memory:" for a temporary catalog. Defaults to RESULTS_CATALOG.
+        """
+        self.file_name = file_name
+        # Parallel runs may write concurrently, so wait for the lock instead of failing.
+        self.connection = sqlite3.connect(file_name, timeout=60)
+        columns = ", ".join(f"{column} {column_type}" for column, column_type in ALL_COLUMNS)
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS results ({columns}, PRIMARY KEY (solution_file))")
+        # Catalogs created by older versions lack the newer columns, whose values are NULL for the runs already stored
+        existing_columns = [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]
+        for column, column_type in ALL_COLUMNS:
+            if column not in existing_columns:
+                self.connection.execute(f"ALTER TABLE results ADD COLUMN {column} {column_type}")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_parameters ON results (experiment_name, n_positions, n_drones, n_targets, targets_speed, alpha)")
+        self.connection.commit()
+
+    def add_result(self, run_parameters: dict, metrics: dict, solution_file: str) -> None:
+        """Adds a run to the catalog. If the solution file is already in the catalog, its row is replaced.
+
+        Args:
+            run_parameters: Parameters of the run. Refer to get_run_parameters.
+            metrics: Metrics of the run with the keys of METRIC_COLUMNS. Missing metrics are stored as NULL.
+            solution_file: path + name of the solution file of the run.
+        """
+        row = [run_parameters.get(column) for column, _ in PARAMETER_COLUMNS]
+        row += [metrics.get(column) for column, _ in METRIC_COLUMNS]
+        row += [os.path.abspath(solution_file)]
+        placeholders = ", ".join("?" for _ in ALL_COLUMNS)
+        # Columns are named since migrated catalogs may store them in a different order
+        self.connection.execute(f"INSERT OR REPLACE INTO results ({', '.join(column for column, _ in ALL_COLUMNS)}) VALUES ({placeholders})", [value.item() if isinstance(value, np.generic) else value for value in row])
+        self.connection.commit()
+
+    def import_experiment(self, experiment_dir: str) -> int:
+        """Imports the solution files of an experiment directory created by solve_milp.py. The swept parameters are read from the file names and the others from parameters.txt. Metrics are read from the .npz file of a run when it exists and from the text file otherwise.
+
+        Args:
+            experiment_dir: path of the experiment directory.
+
+        Returns:
+            Number of imported runs.
+        """
+        parameters = {"experiment_name": os.path.basename(os.path.normpath(experiment_dir))}
+        parameters_file = os.path.join(experiment_dir, "parameters.txt")
+        if os.path.isfile(parameters_file):
+            with open(parameters_file, "r") as file:
+                parameters.update(ast.literal_eval(file.read()))
+            parameters["experiment_name"] = os.path.basename(os.path.normpath(experiment_dir))
+
+        n_imported = 0
+        for file_name in sorted(os.listdir(experiment_dir)):
+            match = SOLUTION_FILE_PATTERN.match(file_name)
+            if match is None:
+                continue
+            n_positions, n_drones, n_targets, observation_period, target_speed, alpha, instance = match.groups()
+            run_parameters = get_run_parameters(parameters, int(n_positions), int(n_drones), int(n_targets), float(target_speed), float(alpha), int(instance))
+            run_parameters["observation_period"] = int(observation_period)
+
+            solution_file = os.path.join(experiment_dir, file_name)
+            if os.path.isfile(solution_file[:-4] + ".npz"):
+                metrics = load_solution(solution_file[:-4] + ".npz")
+            else:
+                metrics = read_solution_file(solution_file)
+            self.add_result(run_parameters, metrics, solution_file)
+            n_imported += 1
+        return n_imported
+
+    def get_results(self, where: Optional[dict] = None, columns: Optional[list] = None, as_dataframe: Optional[bool] = False):
+        """Returns the runs matching the given parameters.
+
+        Args:
+            where: Dictionary {column: value} or {column: [values]} that runs must match. Defaults to None (all runs).
+            columns: Columns to return. Defaults to None (all columns).
+            as_dataframe: If True, returns a pandas DataFrame instead of a NumPy structured array. Defaults to False.
+
+        Returns:
+            NumPy structured array (or pandas DataFrame) with one row per run.
+
+        Raises:
+            ValueError: If a column is not in ALL_COLUMNS.
+        """
+        columns = columns if columns is not None else [column for column, _ in ALL_COLUMNS]
+        check_columns(columns)
+        where_clause, values = self.get_where_clause(where)
+        cursor = self.connection.execute(f"SELECT {', '.join(columns)} FROM results {where_clause}", values)
+        return self.to_table(cursor.fetchall(), columns, as_dataframe)
+
+    def aggregate(self, group_by: list, metrics: Optional[list] = None, where: Optional[dict] = None, feasible_only: Optional[bool] = True, as_dataframe: Optional[bool] = False):
+        """Returns the mean of the metrics for each combination of the group_by parameters, along with the number of runs in each group.
+
+        Args:
+            group_by: Parameters to group runs by, e.g. ["n_positions", "n_drones"].
+            metrics: Metrics to average. Defaults to objective_value, distance, energy, solution_time and mip_gap.
+            where: Dictionary {column: value} or {column: [values]} that runs must match. Defaults to None (all runs).
+            feasible_only: If True, only runs with a feasible solution (objective_value >= 0) are considered. Defaults to True.
+            as_dataframe: If True, returns a pandas DataFrame instead of a NumPy structured array. Defaults to False.
+
+        Returns:
+            NumPy structured array (or pandas DataFrame) with the columns group_by + ["n_runs"] + ["mean_" + metric for metric in metrics], sorted by group_by.
+
+        Raises:
+            ValueError: If a column of group_by, metrics or where is not in ALL_COLUMNS.
+        """
+        metrics = metrics if metrics is not None else ["objective_value", "distance", "energy", "solution_time", "mip_gap"]
+        check_columns(group_by + metrics)
+        where_clause, values = self.get_where_clause(where)
+        if feasible_only:
+            where_clause += (" AND" if where_clause else "WHERE") + " objective_value >= 0"
+        selected = group_by + ["COUNT(*)"] + [f"AVG({metric})" for metric in metrics]
+        cursor = self.connection.execute(f"SELECT {', '.join(selected)} FROM results {where_clause} GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}", values)
+        return self.to_table(cursor.fetchall(), group_by + ["n_runs"] + ["mean_" + metric for metric in metrics], as_dataframe)
+
+    def get_where_clause(self, where: Optional[dict]) -> tuple:
+        """Returns the SQL WHERE clause and its values for a dictionary {column: value} or {column: [values]}. Raises ValueError if a column is not in ALL_COLUMNS."""
+        if not where:
+            return "", []
+        check_columns(list(where))
+        conditions = []
+        values = []
+        for column, value in where.items():
+            if column in ["heights", "base_station"]:
+                # Stored as their string representation
+                conditions.append(f"{column} = ?")
+                values.append(str(value))
+            elif isinstance(value, (list, tuple)):
+                conditions.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                values += list(value)
+            else:
+                conditions.append(f"{column} = ?")
+                values.append(value)
+        return "WHERE " + " AND ".join(conditions), values
+
+    def to_table(self, rows: list, columns: list, as_dataframe: bool):
+        """Converts the rows returned by sqlite into a NumPy structured array or a pandas DataFrame. Text columns have dtype object, the others float64 or int64."""
+        if as_dataframe:
+            import pandas as pd
+            return pd.DataFrame(rows, columns=columns)
+        column_types = dict(ALL_COLUMNS)
+        dtype = []
+        for i, column in enumerate(columns):
+            if column_types.get(column) == "TEXT":
+                dtype.append((column, object))
+            elif column_types.get(column) == "INTEGER" or column == "n_runs":
+                # NULL values cannot be stored as integers
+                dtype.append((column, np.int64 if all(row[i] is not None for row in rows) else np.float64))
+            else:
+                dtype.append((column, np.float64))
+        return np.array([tuple(np.nan if value is None else value for value in row) for row in rows], dtype=dtype)
+
+    def close(self) -> None:
+        """Closes the connection to the SQLite file."""
+        self.connection.close()
+
+if __name__ == "__main__":
+    experiment_names = sys.argv[1:] if len(sys.argv) > 1 else [name for name in sorted(os.listdir(FILES_DIR)) if os.path.isfile(os.path.join(FILES_DIR, name, "parameters.txt"))]
+    catalog = ResultsCatalog()
+    for experiment_name in experiment_names:
+        n_imported = catalog.import_experiment(os.path.join(FILES_DIR, experiment_name))
+        print(f"Imported {n_imported} runs from {experiment_name}")
+    catalog.close()
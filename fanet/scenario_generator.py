@@ -0,0 +1,197 @@
+"""This script generates large synthetic traces (thousands of targets, large areas, long observation periods) to stress the pipeline.
+    The trace is generated chunk by chunk of time steps and written to a memory-mapped file in the binary trace store format (refer to trace_store.py), so its size is not limited by the memory.
+    Three mobility models are available, all vectorized over the targets:
+        random_walk: the model of TargetsTrace, a uniform random direction at constant speed at every time step.
+        gauss_markov: speed and direction are Gauss-Markov processes around a mean speed and a mean direction of each target.
+        group: reference point group mobility, groups of targets follow a reference point moving as a random walk, each target wandering around it.
+    The generation throughput is printed and saved in the description of the scenario.
+    Usage: python fanet/scenario_generator.py --n-targets N --observation-period T [--mobility MODEL] [--area-size A] [--speed V] [--chunk-size C] [--seed S] [--output FILE]
+"""
+from typing import Optional
+import argparse
+import os
+import time
+import numpy as np
+from fanet.targets_trace import get_rng, reflect
+from fanet.trace_store import get_trace_store_description, save_trace_store_description
+from fanet.setup.config import SCENARIOS_DIR
+
+class RandomWalkMobility:
+    def __init__(self, n_targets: int, area_size: float, target_speed: float, time_step_delta: float, rng: np.random.Generator) -> None:
+        """Random walk of TargetsTrace: each target starts at a uniform random position and moves target_speed * time_step_delta in a uniform random direction at every time step, bouncing off the walls.
+        The walk is kept in the unbounded plane and folded into the area, as in targets_trace.generate_positions, so chunks continue each other exactly.
+
+        Args:
+            n_targets: Number of targets.
+            area_size: Lenght of the square area A.
+            target_speed: Targets speed in m/s.
+            time_step_delta: Amount of seconds between time steps.
+            rng: Random generator.
+        """
+        self.area_size = area_size
+        self.step_length = target_speed * time_step_delta
+        self.rng = rng
+        self.positions = rng.random((n_targets, 2)) * area_size
+        self.started = False
+
+    def next_chunk(self, n_steps: int) -> np.ndarray:
+        """Returns the positions of the next n_steps time steps as an array of shape (n_targets, n_steps, 2)."""
+        return reflect(self.next_unfolded_chunk(n_steps), self.area_size)
+
+    def next_unfolded_chunk(self, n_steps: int) -> np.ndarray:
+        """Returns the positions of the next n_steps time steps in the unbounded plane, before bouncing off the walls."""
+        n_moves = n_steps if self.started else n_steps - 1
+        # Drawn time step by time step, so the positions do not depend on the chunk size
+        angles = self.rng.random((n_moves, len(self.positions))).T * 2 * np.pi
+        steps = self.step_length * np.stack([np.cos(angles), np.sin(angles)], axis=2)
+        chunk = self.positions[:, None, :] + np.cumsum(steps, axis=1)
+        if not self.started:
+            chunk = np.concatenate([self.positions[:, None, :], chunk], axis=1)
+            self.started = True
+        self.positions = chunk[:, -1]
+        return chunk
+
+class GaussMarkovMobility:
+    def __init__(self, n_targets: int, area_size: float, target_speed: float, time_step_delta: float, rng: np.random.Generator, memory: Optional[float] = 0.75, speed_deviation: Optional[float] = None, direction_deviation: Optional[float] = np.pi/4) -> None:
+        """Gauss-Markov mobility: at every time step, speed = memory * speed + (1 - memory) * target_speed + sqrt(1 - memory^2) * N(0, speed_deviation^2), and the same for the direction around a mean direction drawn for each target. The targets bounce off the walls.
+
+        Args:
+            memory: Weight of the previous speed and direction, between 0 (independent steps) and 1 (straight line). Defaults to 0.75.
+            speed_deviation: Standard deviation of the speed. Defaults to None (target_speed / 4).
+            direction_deviation: Standard deviation of the direction in radians. Defaults to pi/4.
+            Refer to RandomWalkMobility for the other arguments.
+        """
+        self.area_size = area_size
+        self.target_speed = target_speed
+        self.time_step_delta = time_step_delta
+        self.rng = rng
+        self.memory = memory
+        self.speed_deviation = target_speed / 4 if speed_deviation is None else speed_deviation
+        self.direction_deviation = direction_deviation
+        self.positions = rng.random((n_targets, 2)) * area_size
+        self.mean_directions = rng.random(n_targets) * 2 * np.pi
+        self.speeds = np.full(n_targets, float(target_speed))
+        self.directions = self.mean_directions.copy()
+        self.started = False
+
+    def next_chunk(self, n_steps: int) -> np.ndarray:
+        """Returns the positions of the next n_steps time steps as an array of shape (n_targets, n_steps, 2)."""
+        chunk = np.empty((len(self.positions), n_steps, 2))
+        noise = np.sqrt(1 - self.memory ** 2) * self.rng.standard_normal((n_steps, 2, len(self.positions)))
+        for t in range(n_steps):
+            if self.started:
+                self.speeds = np.maximum(self.memory * self.speeds + (1 - self.memory) * self.target_speed + self.speed_deviation * noise[t, 0], 0)
+                self.directions = self.memory * self.directions + (1 - self.memory) * self.mean_directions + self.direction_deviation * noise[t, 1]
+                self.positions = self.positions + (self.speeds * self.time_step_delta)[:, None] * np.stack([np.cos(self.directions), np.sin(self.directions)], axis=1)
+            self.started = True
+            chunk[:, t] = self.positions
+        return reflect(chunk, self.area_size)
+
+class GroupMobility:
+    def __init__(self, n_targets: int, area_size: float, target_speed: float, time_step_delta: float, rng: np.random.Generator, n_groups: Optional[int] = None, group_radius: Optional[float] = None, memory: Optional[float] = 0.9) -> None:
+        """Reference point group mobility: the targets are split into n_groups groups. The reference point of each group moves as a random walk (refer to RandomWalkMobility) and each target stays at a random offset from it. The offsets drift as Gauss-Markov processes whose standard deviation is group_radius / 2. The targets bounce off the walls.
+
+        Args:
+            n_groups: Number of groups. Defaults to None (one group for every 10 targets).
+            group_radius: Typical distance between a target and its reference point. Defaults to None (area_size / 20).
+            memory: Weight of the previous offset, between 0 and 1. Defaults to 0.9.
+            Refer to RandomWalkMobility for the other arguments.
+        """
+        self.area_size = area_size
+        self.rng = rng
+        n_groups = max(1, n_targets // 10) if n_groups is None else n_groups
+        self.offset_deviation = (area_size / 20 if group_radius is None else group_radius) / 2
+        self.memory = memory
+        self.groups = rng.integers(n_groups, size=n_targets)
+        # The reference points have their own generator, so the positions do not depend on the chunk size
+        self.reference_points = RandomWalkMobility(n_groups, area_size, target_speed, time_step_delta, np.random.default_rng(rng.integers(2**63)))
+        self.offsets = self.offset_deviation * rng.standard_normal((n_targets, 2))
+        self.started = False
+
+    def next_chunk(self, n_steps: int) -> np.ndarray:
+        """Returns the positions of the next n_steps time steps as an array of shape (n_targets, n_steps, 2)."""
+        chunk = self.reference_points.next_unfolded_chunk(n_steps)[self.groups]
+        noise = np.sqrt(1 - self.memory ** 2) * self.offset_deviation * self.rng.standard_normal((n_steps, len(self.offsets), 2))
+        for t in range(n_steps):
+            if self.started:
+                self.offsets = self.memory * self.offsets + noise[t]
+            self.started = True
+            chunk[:, t] += self.offsets
+        return reflect(chunk, self.area_size)
+
+# Mobility models by name
+MOBILITY_MODELS = {"random_walk": RandomWalkMobility, "gauss_markov": GaussMarkovMobility, "group": GroupMobility}
+
+def get_scenario_file(mobility: str, n_targets: int, observation_period: int, area_size: float, target_speed: float, seed: Optional[int] = None) -> str:
+    """Returns the path + name of the .npy file of a scenario in SCENARIOS_DIR."""
+    return SCENARIOS_DIR + f"scenario_{mobility}_nt_{n_targets}_t_{observation_period}_a_{area_size}_v_{target_speed}_s_{seed}.npy"
+
+def generate_scenario(file_name: str, n_targets: int, observation_period: int, area_size: float, target_speed: float, time_step_delta: Optional[float] = 1, mobility: Optional[str] = "random_walk", chunk_size: Optional[int] = 100, seed: Optional[int] = None, verbose: Optional[bool] = True, **mobility_parameters) -> dict:
+    """Generates a scenario chunk by chunk of time steps and writes it to a store with one instance (refer to trace_store.py). Only one chunk is held in memory at a time.
+    The positions do not depend on chunk_size (up to rounding), so a scenario can be regenerated with another chunk size.
+
+    Args:
+        file_name: path + name of the .npy file. Written to a temporary file and renamed once complete.
+        n_targets: Number of targets.
+        observation_period: Number of time steps.
+        area_size: Lenght of the square area A.
+        target_speed: Targets speed in m/s (mean speed for gauss_markov, speed of the reference points for group).
+        time_step_delta: Amount of seconds between time steps. Defaults to 1.
+        mobility: Name of the mobility model in MOBILITY_MODELS. Defaults to "random_walk".
+        chunk_size: Number of time steps generated at a time. Defaults to 100.
+        seed: Seed of the scenario. Refer to targets_trace.get_rng. Defaults to None.
+        verbose: If True, prints the progress and the throughput. Defaults to True.
+        mobility_parameters: Extra arguments of the mobility model.
+
+    Returns:
+        Description of the scenario saved next to the file, including its throughput: generation time in seconds, positions per second and MB per second.
+    """
+    if mobility not in MOBILITY_MODELS:
+        raise ValueError(f"Unknown mobility model {mobility}. Choose one of {list(MOBILITY_MODELS)}.")
+    model = MOBILITY_MODELS[mobility](n_targets, area_size, target_speed, time_step_delta, get_rng(seed), **mobility_parameters)
+    positions = np.lib.format.open_memmap(file_name + ".tmp", mode="w+", dtype=np.float64, shape=(1, n_targets, observation_period, 2))
+
+    start_time = time.perf_counter()
+    for t in range(0, observation_period, chunk_size):
+        n_steps = min(chunk_size, observation_period - t)
+        positions[0, :, t:t + n_steps] = model.next_chunk(n_steps)
+        if verbose:
+            elapsed = time.perf_counter() - start_time
+            print(f"[{t + n_steps}/{observation_period}] time steps | elapsed: {elapsed:.1f}s", flush=True)
+    positions.flush()
+    del positions
+    generation_time = time.perf_counter() - start_time
+
+    n_positions = n_targets * observation_period
+    description = get_trace_store_description((1, n_targets, observation_period), target_speed, area_size, time_step_delta)
+    description.update({"mobility": mobility,
+                        "mobility_parameters": mobility_parameters,
+                        "seed": seed,
+                        "chunk_size": chunk_size,
+                        "generation_time": generation_time,
+                        "positions_per_second": n_positions / generation_time,
+                        "mb_per_second": n_positions * 2 * 8 / 2**20 / generation_time})
+    save_trace_store_description(file_name, description)
+    os.replace(file_name + ".tmp", file_name)
+    if verbose:
+        print(f"{n_positions} positions in {generation_time:.2f}s: {description['positions_per_second']:.3g} positions/s, {description['mb_per_second']:.1f} MB/s. Saved to {file_name}")
+    return description
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates a large synthetic trace in the binary trace store format.")
+    parser.add_argument("--n-targets", type=int, default=1000, help="Number of targets.")
+    parser.add_argument("--observation-period", type=int, default=1000, help="Number of time steps.")
+    parser.add_argument("--area-size", type=float, default=1000, help="Lenght of the square area in meters.")
+    parser.add_argument("--speed", type=float, default=10, help="Targets speed in m/s.")
+    parser.add_argument("--time-step-delta", type=float, default=1, help="Amount of seconds between time steps.")
+    parser.add_argument("--mobility", choices=list(MOBILITY_MODELS), default="random_walk", help="Mobility model.")
+    parser.add_argument("--n-groups", type=int, default=None, help="Number of groups of the group mobility model.")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Number of time steps generated at a time.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the scenario.")
+    parser.add_argument("--output", default=None, help="Output .npy file. Defaults to a file in SCENARIOS_DIR named after the parameters.")
+    args = parser.parse_args()
+
+    output = args.output if args.output is not None else get_scenario_file(args.mobility, args.n_targets, args.observation_period, args.area_size, args.speed, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    mobility_parameters = {"n_groups": args.n_groups} if args.mobility == "group" else {}
+    generate_scenario(output, args.n_targets, args.observation_period, args.area_size, args.speed, args.time_step_delta, args.mobility, args.chunk_size, args.seed, **mobility_parameters)
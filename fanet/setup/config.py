@@ -9,3 +9,13 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__))) + "/"
 TESTS_OUTPUT_DIR = os.path.join(BASE_DIR, "tests", "out") + "/"
 # Path where files are stored such as traces, solutions and figures.
 FILES_DIR = os.path.join(BASE_DIR, "files") + "/"
+# SQLite file with the catalog of the results of all experiments (refer to results_catalog.py).
+RESULTS_CATALOG = FILES_DIR + "results_catalog.sqlite"
+# Directory of the solutions of all experiments, named by the hash of their trace and parameters (refer to result_cache.py).
+RESULT_CACHE_DIR = FILES_DIR + "result_cache/"
+# Directory where scenario_generator.py saves the large synthetic traces (binary trace store format, refer to trace_store.py).
+SCENARIOS_DIR = FILES_DIR + "scenarios/"
+# Directory where tune_cplex.py saves the tuned CPLEX parameter files (one .prm file per profile).
+TUNING_DIR = FILES_DIR + "tuning/"
+# Directory where CPLEX writes node files when the node file storage parameter keeps them on disk.
+CPLEX_WORK_DIR = FILES_DIR + "cplex_work/"
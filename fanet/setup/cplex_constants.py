@@ -8,6 +8,9 @@ CONTINUOUS_VARIABLE = "C"
 GREATER_EQUAL = "G"
 EQUAL = "E"
 LESS_EQUAL = "L"
+# Constants for CPLEX solution status of linear programs (LP relaxation)
+LP_OPTIMAL_SOLUTION = 1
+LP_INFEASIBLE_SOLUTION = 2
 # Constants for CPLEX solution status
 OPTIMAL_SOLUTION = 101
 OPTIMAL_TOL_SOLUTION = 102
@@ -17,3 +20,23 @@ TIME_LIMIT_INFEASIBLE = 108
 MEMORY_LIMIT_FEASIBLE = 111
 MEMORY_LIMIT_INFEASIBLE = 112
 ABORTED_FEASIBLE = 113
+# Status codes for which CPLEX holds a feasible solution that can be read
+FEASIBLE_STATUS = [OPTIMAL_SOLUTION, OPTIMAL_TOL_SOLUTION, ABORTED_FEASIBLE, TIME_LIMIT_FEASIBLE, MEMORY_LIMIT_FEASIBLE]
+# Values of the parallel mode parameter
+PARALLEL_OPPORTUNISTIC = -1
+PARALLEL_AUTO = 0
+PARALLEL_DETERMINISTIC = 1
+# Values of the MIP emphasis parameter
+MIP_EMPHASIS_BALANCED = 0
+MIP_EMPHASIS_FEASIBILITY = 1
+MIP_EMPHASIS_OPTIMALITY = 2
+MIP_EMPHASIS_BEST_BOUND = 3
+MIP_EMPHASIS_HIDDEN_FEASIBILITY = 4
+# Values of the node file storage parameter
+NODE_FILE_NONE = 0
+NODE_FILE_MEMORY_COMPRESSED = 1
+NODE_FILE_DISK = 2
+NODE_FILE_DISK_COMPRESSED = 3
+# Values of the heuristic frequency parameter (positive values apply the heuristic every n nodes)
+HEURISTIC_FREQUENCY_NONE = -1
+HEURISTIC_FREQUENCY_AUTO = 0
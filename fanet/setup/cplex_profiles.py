@@ -0,0 +1,29 @@
+"""This file contains named profiles of CPLEX performance parameters.
+    A profile is selected with the parameter "cplex_profile" and uses the same keys as the parameters dictionary (refer to parameters.py).
+    Any of these keys explicitly set in PARAMETERS (i.e. not None) overrides the profile.
+    Profiles found by tune_cplex.py are not listed here, they are saved as CPLEX parameter files in TUNING_DIR.
+"""
+from fanet.setup.cplex_constants import *
+
+CPLEX_PROFILES = {
+    # CPLEX defaults
+    "default": {},
+    # Finds a good incumbent quickly, e.g. for heuristic runs with short time limits
+    "find-feasible-fast": {
+        "cplex_mip_emphasis": MIP_EMPHASIS_FEASIBILITY,
+        "cplex_heuristic_frequency": 10,
+        "cplex_parallel_mode": PARALLEL_OPPORTUNISTIC,
+    },
+    # Moves the best bound to close the gap, for runs that must prove optimality
+    "prove-optimal": {
+        "cplex_mip_emphasis": MIP_EMPHASIS_BEST_BOUND,
+        "cplex_heuristic_frequency": HEURISTIC_FREQUENCY_NONE,
+        "cplex_parallel_mode": PARALLEL_DETERMINISTIC,
+    },
+    # Keeps the branch and bound tree on disk once it exceeds cplex_workmem_limit
+    "low-memory": {
+        "cplex_node_file": NODE_FILE_DISK_COMPRESSED,
+        "cplex_memory_emphasis": True,
+        "cplex_threads": 1,
+    },
+}
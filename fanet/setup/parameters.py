@@ -32,10 +32,38 @@ DEFAULT_PARAMETERS = {
     "coverage_angle": np.pi/6,
     # number of instances to generate for each parameter combination: integer
     "n_instances": 100,
+    # seed of the traces, instance i of each combination uses [traces_seed, i]. None draws new traces every time: integer or None
+    "traces_seed": None,
     # cplex maximum memory in MB: integer
     "cplex_workmem_limit": 10000,
     # cplex maximum time in seconds: integer
     "cplex_time_limit": 3*3600,
+    # memory in MB a run may use (predicted model memory + cplex_workmem_limit). Runs predicted to exceed it are skipped. None means no budget: integer or None
+    "memory_budget": None,
+    # number of variables or constraints per chunk pushed to cplex while building the model, bounding the memory used by Python. None builds the whole model first: integer or None
+    "model_build_chunk_size": None,
+    # cplex number of threads, 0 lets cplex decide: integer or None
+    "cplex_threads": None,
+    # cplex parallel mode, refer to cplex_constants.py: integer or None
+    "cplex_parallel_mode": None,
+    # cplex MIP emphasis, refer to cplex_constants.py: integer or None
+    "cplex_mip_emphasis": None,
+    # cplex node file storage, refer to cplex_constants.py: integer or None
+    "cplex_node_file": None,
+    # cplex heuristic frequency, refer to cplex_constants.py: integer or None
+    "cplex_heuristic_frequency": None,
+    # cplex memory emphasis (conserves memory where possible): boolean or None
+    "cplex_memory_emphasis": None,
+    # named profile of cplex parameters, refer to cplex_profiles.py. Parameters above that are not None override the profile: string
+    "cplex_profile": "default",
+    # seconds between two records of the progress of cplex (the incumbent improvements are always recorded), None records nothing: float or None
+    "cplex_telemetry_interval": 10,
+    # solve the LP relaxation before the MILP and store its bound with the results (an extra solve of the relaxation, so it is off unless requested): boolean
+    "lp_relaxation": False,
+    # seconds spent searching a feasible solution used to fix variables by the reduced costs of the LP relaxation, None fixes nothing: float or None
+    "lp_fixing_time_limit": None,
+    # formulation of the drone movements, "mccormick" (3 constraints per pair of positions) or "flow" (flow conservation, fewer constraints and a tighter LP relaxation): string
+    "movement_formulation": "mccormick",
     # name of the experiment (becomes a folder in FILES_DIR with the results): string
     "experiment_name": "default",
 }
@@ -55,8 +83,22 @@ TEST_PARAMETERS = {
     "comm_range": 60,
     "coverage_angle": np.pi/6,
     "n_instances": 10,
+    "traces_seed": None,
     "cplex_workmem_limit": 10000,
     "cplex_time_limit": 10,
+    "memory_budget": None,
+    "model_build_chunk_size": None,
+    "cplex_threads": None,
+    "cplex_parallel_mode": None,
+    "cplex_mip_emphasis": None,
+    "cplex_node_file": None,
+    "cplex_heuristic_frequency": None,
+    "cplex_memory_emphasis": None,
+    "cplex_profile": "default",
+    "cplex_telemetry_interval": 10,
+    "lp_relaxation": False,
+    "lp_fixing_time_limit": None,
+    "movement_formulation": "mccormick",
     "experiment_name": "test",
 }
 
@@ -75,8 +117,22 @@ EXPERIMENT_PARAMETERS = {
     "comm_range": 60,
     "coverage_angle": np.pi/6,
     "n_instances": 10,
+    "traces_seed": None,
     "cplex_workmem_limit": 10000,
     "cplex_time_limit": 3600,
+    "memory_budget": None,
+    "model_build_chunk_size": None,
+    "cplex_threads": None,
+    "cplex_parallel_mode": None,
+    "cplex_mip_emphasis": None,
+    "cplex_node_file": None,
+    "cplex_heuristic_frequency": None,
+    "cplex_memory_emphasis": None,
+    "cplex_profile": "default",
+    "cplex_telemetry_interval": 10,
+    "lp_relaxation": False,
+    "lp_fixing_time_limit": None,
+    "movement_formulation": "mccormick",
     "experiment_name": "experiment_0",
 }
 
@@ -95,7 +151,21 @@ TEST_TIME_LIMIT = {
     "comm_range": 60,
     "coverage_angle": np.pi/6,
     "n_instances": 10,
+    "traces_seed": None,
     "cplex_workmem_limit": 10000,
     "cplex_time_limit": 300,
+    "memory_budget": None,
+    "model_build_chunk_size": None,
+    "cplex_threads": None,
+    "cplex_parallel_mode": None,
+    "cplex_mip_emphasis": None,
+    "cplex_node_file": None,
+    "cplex_heuristic_frequency": None,
+    "cplex_memory_emphasis": None,
+    "cplex_profile": "default",
+    "cplex_telemetry_interval": 10,
+    "lp_relaxation": False,
+    "lp_fixing_time_limit": None,
+    "movement_formulation": "mccormick",
     "experiment_name": "test_time_limit",
 }
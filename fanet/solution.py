@@ -0,0 +1,153 @@
+from typing import Optional
+import os
+import tempfile
+import numpy as np
+
+# Fields stored by Solution.save(). Every file has all of them so a sweep can be loaded in bulk.
+SOLUTION_DATA_FIELDS = ("status", "objective_value", "distance", "energy", "solution_time", "mip_gap", "n_variables", "n_constraints", "n_nonzeros", "lp_bound", "deployment", "telemetry")
+# Fields stored as arrays, the others are scalars
+SOLUTION_ARRAY_FIELDS = ("deployment", "telemetry")
+# Columns of the telemetry array of a solution: seconds since the start of the solve, nodes processed, objective value of the incumbent, best bound and relative MIP gap (nan without incumbent)
+TELEMETRY_COLUMNS = ("time", "n_nodes", "incumbent", "best_bound", "mip_gap")
+
+class Solution:
+    def __init__(self, status: int, objective_value: float, solution_time: float, deployment: Optional[np.ndarray], positions: list, distance_matrix: np.ndarray, energy_matrix: np.ndarray, mip_gap: Optional[float] = np.nan, model_size: Optional[dict] = None, telemetry: Optional[np.ndarray] = None, lp_bound: Optional[float] = np.nan) -> None:
+        """Describes the deployment found by a solver and the costs derived from it. Costs are computed once from the deployment array and cached.
+
+        Args:
+            status: Solution status. Use the constants defined in cplex_constants.py.
+            objective_value: Value of the objective function. -1 if there is no feasible solution.
+            solution_time: Time in seconds to reach the solution.
+            deployment: Integer array of shape (observation_period, n_drones). Entry [t, drone] is the index in positions where drone is deployed at time step t. None if there is no feasible solution.
+            positions: List of positions P + [base_station]. The base station must be the last element.
+            distance_matrix: Distances between every pair of positions, indexed as positions.
+            energy_matrix: Minimum energy to move between every pair of positions in one time step, indexed as positions.
+            mip_gap: Relative MIP gap of the solution. Defaults to nan.
+            model_size: Dictionary with the keys "n_variables", "n_constraints" and "n_nonzeros" of the model. Defaults to None.
+            telemetry: Array of shape (n_records, len(TELEMETRY_COLUMNS)) with the progress of the solver. Defaults to None (no records).
+            lp_bound: Objective value of the LP relaxation of the model, a lower bound of the optimum. Defaults to nan (not computed).
+        """
+        self.status = status
+        self.objective_value = objective_value
+        self.solution_time = solution_time
+        self.deployment = deployment
+        self.positions = positions
+        self.distance_matrix = distance_matrix
+        self.energy_matrix = energy_matrix
+        self.mip_gap = mip_gap
+        self.model_size = model_size if model_size is not None else {"n_variables": -1, "n_constraints": -1, "n_nonzeros": -1}
+        self.telemetry = telemetry if telemetry is not None else np.empty((0, len(TELEMETRY_COLUMNS)))
+        self.lp_bound = lp_bound
+
+        self.distance = None
+        self.energy = None
+
+    def is_feasible(self) -> bool:
+        """Returns True if the solution holds a deployment."""
+        return self.deployment is not None
+
+    def get_drones_paths(self) -> np.ndarray:
+        """Returns the path of each drone as position indices, including the departure from and the return to the base station.
+
+        Returns:
+            Integer array of shape (n_drones, observation_period + 2).
+        """
+        base_station = len(self.positions) - 1
+        n_time_steps, n_drones = self.deployment.shape
+        paths = np.full((n_drones, n_time_steps + 2), base_station, dtype=int)
+        paths[:, 1:-1] = self.deployment.T
+        return paths
+
+    def get_path_cost(self, cost_matrix: np.ndarray) -> float:
+        """Returns the sum of cost_matrix over every move of every drone path."""
+        paths = self.get_drones_paths()
+        return float(cost_matrix[paths[:, :-1], paths[:, 1:]].sum())
+
+    def get_distance(self) -> float:
+        """Returns the distance traveled by the drones. If the solution is not feasible, returns -1."""
+        if not self.is_feasible():
+            return -1
+        if self.distance is None:
+            self.distance = self.get_path_cost(self.distance_matrix)
+        return self.distance
+
+    def get_energy(self) -> float:
+        """Returns the energy consumed by the drones. If the solution is not feasible, returns -1."""
+        if not self.is_feasible():
+            return -1
+        if self.energy is None:
+            self.energy = self.get_path_cost(self.energy_matrix)
+        return self.energy
+
+    def get_drones_deployement(self) -> list:
+        """Returns the deployment of drones at each time step.
+
+        Returns:
+            list: List of list of tuples. For each time step, for each drone, the position where the drone is deployed.
+        """
+        return [[self.positions[index] for index in deployment_at_t] for deployment_at_t in self.deployment.tolist()]
+
+    def get_data(self) -> dict:
+        """Returns the solution as a dictionary with the keys SOLUTION_DATA_FIELDS. The deployment of an infeasible solution is an empty array."""
+        return {"status": self.status,
+                "objective_value": self.objective_value,
+                "distance": self.get_distance(),
+                "energy": self.get_energy(),
+                "solution_time": self.solution_time,
+                "mip_gap": self.mip_gap,
+                "n_variables": self.model_size["n_variables"],
+                "n_constraints": self.model_size["n_constraints"],
+                "n_nonzeros": self.model_size["n_nonzeros"],
+                "lp_bound": self.lp_bound,
+                "deployment": self.deployment if self.is_feasible() else np.empty((0, 0), dtype=int),
+                "telemetry": self.telemetry}
+
+    def save(self, file_name: str) -> None:
+        """Saves the solution to a .npz file with the fields SOLUTION_DATA_FIELDS. The file is written to a temporary file first and then renamed, so an interrupted run never leaves a partial file behind.
+
+        Args:
+            file_name: path + name of the .npz file.
+        """
+        data = self.get_data()
+        directory = os.path.dirname(os.path.abspath(file_name))
+        with tempfile.NamedTemporaryFile(dir=directory, suffix=".npz.tmp", delete=False) as tmp_file:
+            np.savez(tmp_file, **{field: np.asarray(data[field]) for field in SOLUTION_DATA_FIELDS})
+        os.replace(tmp_file.name, file_name)
+
+    def save_telemetry(self, file_name: str) -> None:
+        """Saves the telemetry to a .csv file with a header line of TELEMETRY_COLUMNS. Refer to MilpModel.set_telemetry.
+
+        Args:
+            file_name: path + name of the .csv file.
+        """
+        np.savetxt(file_name, self.telemetry, delimiter=",", header=",".join(TELEMETRY_COLUMNS), comments="")
+
+def load_solution(file_name: str) -> dict:
+    """Loads a solution saved by Solution.save().
+
+    Args:
+        file_name: path + name of the .npz file.
+
+    Returns:
+        Dictionary with the keys SOLUTION_DATA_FIELDS. Scalars are returned as python numbers. Files saved before the telemetry was recorded have no telemetry records and files saved before the LP bound was recorded have a nan lp_bound.
+    """
+    with np.load(file_name) as npz_file:
+        solution = {field: npz_file[field] if field in SOLUTION_ARRAY_FIELDS else npz_file[field].item() for field in SOLUTION_DATA_FIELDS if field in npz_file}
+    solution.setdefault("telemetry", np.empty((0, len(TELEMETRY_COLUMNS))))
+    solution.setdefault("lp_bound", np.nan)
+    return solution
+
+def load_solutions(file_names: list) -> dict:
+    """Loads many solutions saved by Solution.save().
+
+    Args:
+        file_names: List of .npz files.
+
+    Returns:
+        Dictionary with the keys SOLUTION_DATA_FIELDS. Every scalar field is an array with one entry per file, in the order of file_names. "deployment" and "telemetry" are lists of arrays since their shapes depend on each run.
+    """
+    solutions = [load_solution(file_name) for file_name in file_names]
+    data = {field: np.array([solution[field] for solution in solutions]) for field in SOLUTION_DATA_FIELDS if field not in SOLUTION_ARRAY_FIELDS}
+    for field in SOLUTION_ARRAY_FIELDS:
+        data[field] = [solution[field] for solution in solutions]
+    return data
@@ -0,0 +1,166 @@
+"""Independent check of deployments, to audit the solutions stored by an experiment and the outputs of the heuristics in bulk without cplex.
+    A deployment is checked against its graph and trace: at most one drone per deployment position, every target covered by a drone connected to the base station (breadth-first search on the communication graph, through the positions with a drone), and its distance, energy and objective value recomputed.
+    Every check is vectorized over a batch of deployments of the same graph and shape, so tens of thousands of them are checked in a few numpy operations.
+    Usage: python fanet/solution_verifier.py [--chunk-size N]
+"""
+from typing import Optional
+import argparse
+import os
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import get_cost_matrices
+from fanet.model_size import get_comm_adjacency
+from fanet.solution import load_solution
+from fanet.trace_store import load_run_trace
+from fanet.setup.config import PARAMETERS
+
+# Relative and absolute tolerances between the reported and the recomputed costs
+COST_RTOL = 1e-6
+COST_ATOL = 1e-6
+
+def get_full_comm_adjacency(graph: Graph) -> np.ndarray:
+    """Returns the communication graph of the positions P \\cup {base_station} as a boolean array of shape (|P| + 1, |P| + 1) indexed as graph.get_positions_array(), the base station last. Refer to model_size.get_comm_adjacency."""
+    adjacency, base_adjacency = get_comm_adjacency(graph)
+    full_adjacency = np.zeros((len(adjacency) + 1, len(adjacency) + 1), dtype=bool)
+    full_adjacency[:-1, :-1] = adjacency
+    full_adjacency[:-1, -1] = full_adjacency[-1, :-1] = base_adjacency
+    return full_adjacency
+
+def get_occupancy(deployments: np.ndarray, n_positions: int) -> np.ndarray:
+    """Returns the number of drones at every position.
+
+    Args:
+        deployments: Integer array of shape (n_solutions, observation_period, n_drones) of position indices, the base station last.
+        n_positions: Number of positions |P| + 1.
+
+    Returns:
+        Integer array of shape (n_solutions, observation_period, n_positions).
+    """
+    n_solutions, n_time_steps, _ = deployments.shape
+    offsets = np.arange(n_solutions * n_time_steps).reshape(n_solutions, n_time_steps, 1) * n_positions
+    return np.bincount((deployments + offsets).ravel(), minlength=n_solutions * n_time_steps * n_positions).reshape(n_solutions, n_time_steps, n_positions)
+
+def get_reachable(occupied: np.ndarray, adjacency: np.ndarray) -> np.ndarray:
+    """Breadth-first search from the base station through the positions with a drone, all the searches at once: each iteration expands every frontier by one hop with a matrix product.
+
+    Args:
+        occupied: Boolean array of shape (..., |P| + 1), True where a drone is deployed. The base station is the last position and is always a source.
+        adjacency: Boolean array of shape (|P| + 1, |P| + 1). Refer to get_full_comm_adjacency.
+
+    Returns:
+        Boolean array of the shape of occupied, True for the positions reached from the base station.
+    """
+    shape = occupied.shape
+    occupied = occupied.reshape(-1, shape[-1]).copy()
+    occupied[:, -1] = True
+    reachable = np.zeros(occupied.shape, dtype=bool)
+    reachable[:, -1] = True
+    adjacency = adjacency.astype(np.float32)
+    frontier = reachable
+    while frontier.any():
+        reached = occupied & ~reachable & (frontier.astype(np.float32) @ adjacency > 0)
+        reachable |= reached
+        frontier = reached
+    return reachable.reshape(shape)
+
+def get_paths_cost(deployments: np.ndarray, cost_matrix: np.ndarray) -> np.ndarray:
+    """Returns the sum of cost_matrix over every move of every drone, including the departure from and the return to the base station (refer to Solution.get_path_cost), for each deployment of the batch."""
+    n_solutions, _, n_drones = deployments.shape
+    base_station = np.full((n_solutions, 1, n_drones), len(cost_matrix) - 1, dtype=deployments.dtype)
+    paths = np.concatenate([base_station, deployments, base_station], axis=1)
+    return cost_matrix[paths[:, :-1], paths[:, 1:]].sum(axis=(1, 2))
+
+def verify_deployments(graph: Graph, targets_positions: np.ndarray, deployments: np.ndarray, time_step_delta: float, alpha: float, beta: float, objective_values: Optional[np.ndarray] = None, chunk_size: Optional[int] = 1024) -> dict:
+    """Checks a batch of deployments of the same graph. Refer to the description of this module.
+
+    Args:
+        graph: Graph of the deployments.
+        targets_positions: Array of shape (n_solutions, n_targets, observation_period, 2), or (n_targets, observation_period, 2) if every deployment has the same trace. Refer to TargetsTrace.get_positions.
+        deployments: Integer array of shape (n_solutions, observation_period, n_drones) of position indices, the base station last. Refer to Solution.
+        time_step_delta: Time between each time step in seconds.
+        alpha: Weight between distance and energy.
+        beta: Normalization factor of the energy.
+        objective_values: Reported objective values, one per deployment. Defaults to None (not checked).
+        chunk_size: Number of deployments whose coverage is checked at once, bounding the memory used. Defaults to 1024.
+
+    Returns:
+        Dictionary of arrays with one entry per deployment and the keys collision_free (at most one drone per deployment position), connected (every drone reached from the base station), covered (every target covered by a drone reached from the base station),
+        feasible (collision_free and covered, the feasibility of MilpModel, which allows idle disconnected drones), distance, energy, objective_value and objective_match (True where objective_values is not given).
+    """
+    deployments = np.asarray(deployments, dtype=int)
+    n_positions = len(graph.deployment_positions) + 1
+    if deployments.size and (deployments.min() < 0 or deployments.max() >= n_positions):
+        raise ValueError(f"Deployments must be position indices in [0, {n_positions - 1}]")
+    targets_positions = np.asarray(targets_positions, dtype=float)
+    if targets_positions.ndim == 3:
+        targets_positions = targets_positions[None]
+    n_solutions = len(deployments)
+
+    occupancy = get_occupancy(deployments, n_positions)
+    reachable = get_reachable(occupancy > 0, get_full_comm_adjacency(graph))
+    centers, radii = graph.get_coverage_disks()
+    covered = np.empty(n_solutions, dtype=bool)
+    for start in range(0, n_solutions, chunk_size):
+        stop = min(start + chunk_size, n_solutions)
+        # Shape (chunk, n_targets, observation_period, |P|): target covered by a deployment position with a drone reached from the base station
+        points = targets_positions[start:stop] if len(targets_positions) > 1 else targets_positions
+        offsets = points[..., None, :] - centers
+        in_disk = offsets[..., 0] ** 2 + offsets[..., 1] ** 2 <= radii ** 2
+        covered[start:stop] = (in_disk & reachable[start:stop, None, :, :-1]).any(axis=-1).all(axis=(1, 2))
+
+    distance_matrix, energy_matrix = get_cost_matrices(graph, time_step_delta)
+    distance = get_paths_cost(deployments, distance_matrix)
+    energy = get_paths_cost(deployments, energy_matrix)
+    objective_value = (1 - alpha) * distance + alpha * beta * energy
+    collision_free = (occupancy[:, :, :-1] <= 1).all(axis=(1, 2))
+    return {"collision_free": collision_free,
+            "connected": (reachable | (occupancy == 0)).all(axis=(1, 2)),
+            "covered": covered,
+            "feasible": collision_free & covered,
+            "distance": distance,
+            "energy": energy,
+            "objective_value": objective_value,
+            "objective_match": np.ones(n_solutions, dtype=bool) if objective_values is None else np.isclose(objective_value, objective_values, rtol=COST_RTOL, atol=COST_ATOL)}
+
+def verify_experiment(parameters: dict, chunk_size: Optional[int] = 1024) -> list:
+    """Checks every feasible solution stored by an experiment. The solutions are checked in batches sharing a graph, a number of targets and a deployment shape.
+
+    Args:
+        parameters: Parameters dictionary of the experiment.
+        chunk_size: Refer to verify_deployments. Defaults to 1024.
+
+    Returns:
+        List of dictionaries with the keys of the run (refer to solve_milp.get_sweep_jobs), solution_file, and the checks of verify_deployments as scalars.
+    """
+    from fanet.solve_milp import get_graph, get_solution_file, get_sweep_jobs
+    batches = {}
+    for job in get_sweep_jobs(parameters):
+        solution_file = get_solution_file(parameters, job["n_positions"], job["n_drones"], job["n_targets"], job["target_speed"], job["alpha"], job["instance"])[:-4] + ".npz"
+        if not os.path.isfile(solution_file):
+            continue
+        solution = load_solution(solution_file)
+        # Infeasible solutions have no deployment to check
+        if solution["deployment"].size:
+            batches.setdefault((job["n_positions"], job["alpha"], job["n_targets"], solution["deployment"].shape), []).append((job, solution_file, solution))
+
+    results = []
+    for (n_positions, alpha, _, _), batch in batches.items():
+        targets_positions = np.stack([load_run_trace(parameters, job["n_targets"], job["target_speed"], job["instance"]).get_positions() for job, _, _ in batch])
+        deployments = np.stack([solution["deployment"] for _, _, solution in batch])
+        objective_values = np.array([solution["objective_value"] for _, _, solution in batch])
+        checks = verify_deployments(get_graph(parameters, n_positions), targets_positions, deployments, parameters["time_step_delta"], alpha, parameters["beta"], objective_values, chunk_size)
+        for i, (job, solution_file, _) in enumerate(batch):
+            results.append(dict(job, solution_file=solution_file, **{check: values[i].item() for check, values in checks.items()}))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks the coverage, connectivity and costs of every solution stored by the experiment of PARAMETERS.")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Number of deployments whose coverage is checked at once.")
+    args = parser.parse_args()
+
+    results = verify_experiment(PARAMETERS, args.chunk_size)
+    failures = [result for result in results if not (result["feasible"] and result["objective_match"])]
+    print(f"{len(results)} solutions checked in {PARAMETERS['experiment_name']}, {len(failures)} failed")
+    for result in failures:
+        problems = [name for name, passed in (("drones share a position", result["collision_free"]), ("a target is not covered", result["covered"]), ("objective value differs", result["objective_match"])) if not passed]
+        print(f"{os.path.basename(result['solution_file'])}: {', '.join(problems)} (recomputed objective {result['objective_value']:.6f})")
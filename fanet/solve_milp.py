@@ -1,59 +1,163 @@
 import os
-from fanet.targets_trace import TargetsTrace
+from typing import Optional
+from fanet.trace_store import load_run_trace
 from fanet.graph import Graph
 from fanet.milp_model import MilpModel
+from fanet.results_catalog import ResultsCatalog, get_run_parameters
+from fanet.result_cache import ResultCache, get_run_key
+from fanet.solution import load_solution
+from fanet.model_size import estimate_model_size, exceeds_memory_budget
 from fanet.setup.config import PARAMETERS, FILES_DIR, BASE_DIR, TESTS_OUTPUT_DIR
 
-def run_milp_model(n_targets: int, n_drones: int, target_speed: float, instance: int, graph: Graph, alpha: float) -> float:
+def run_milp_model(n_targets: int, n_drones: int, target_speed: float, instance: int, graph: Graph, alpha: float, parameters: Optional[dict] = PARAMETERS) -> float:
     """Runs the milp model for the given parameters and saves the solution in the experiment directory.
-    If the solution already exists for an instance, it skips that instance."""
-    solution_file = FILES_DIR+PARAMETERS["experiment_name"]+f"/milp_solution_p_{graph.n_positions_per_axis}_d_{n_drones}_nt_{n_targets}_t_{PARAMETERS['observation_period']}_v_{target_speed}_alpha_{alpha}_i_{instance}.txt"
-    if os.path.isfile(solution_file):
+    The trace is read from the binary trace store when it exists (refer to trace_store.py), and from its text file otherwise.
+    The solution is saved both as a text file and as a .npz file with the same name (refer to solution.load_solutions to read them back), and the run is added to the results catalog.
+    The progress of cplex, if recorded (refer to cplex_telemetry_interval), is in the .npz file and in a .csv file with the suffix _telemetry.
+    If the solution already exists for an instance with the same trace and parameters, it skips that instance. If another experiment solved it, its files are linked from the result cache instead of solving it again (refer to result_cache.py).
+    A solution solved before the result cache (without a .key file) is kept and added to the cache if its .npz file exists, and solved again otherwise.
+
+    Args:
+        parameters: Parameters dictionary of the experiment. Defaults to PARAMETERS.
+    """
+    solution_file = get_solution_file(parameters, graph.n_positions_per_axis, n_drones, n_targets, target_speed, alpha, instance)
+    cache = ResultCache()
+    # The files of the run are checked before its trace is read and hashed
+    recorded_key = cache.get_key(solution_file) if os.path.isfile(solution_file) else None
+    legacy = cache.is_legacy(solution_file)
+    if recorded_key is None and not legacy:
+        # Not solved, solved without its .npz file before the result cache, or interrupted
+        cache.unlink(solution_file)
+    trace = load_run_trace(parameters, n_targets, target_speed, instance)
+    key = get_run_key(parameters, graph.n_positions_per_axis, n_drones, alpha, trace)
+    if recorded_key == key:
+        return 0
+    if legacy:
+        cache.store(key, solution_file)
         return 0
-    trace_file = FILES_DIR+f"traces/trace_nt_{n_targets}_t_{PARAMETERS['observation_period']}_v_{target_speed}_i_{n}.txt"
-    trace = TargetsTrace(load_file=trace_file)
+    if recorded_key is not None:
+        # Solved for another trace or other parameters
+        cache.unlink(solution_file)
+    run_parameters = get_run_parameters(parameters, graph.n_positions_per_axis, n_drones, n_targets, target_speed, alpha, instance)
+    if cache.contains(key):
+        # Solved before, possibly by another experiment
+        cache.link(key, solution_file)
+        solution_data = load_solution(solution_file[:-4] + ".npz")
+        catalog = ResultsCatalog()
+        catalog.add_result(run_parameters, solution_data, solution_file)
+        catalog.close()
+        return solution_data["objective_value"]
     model = MilpModel(n_available_drones=n_drones,
-                        observation_period=PARAMETERS["observation_period"],
-                        time_step_delta=PARAMETERS["time_step_delta"],
+                        observation_period=parameters["observation_period"],
+                        time_step_delta=parameters["time_step_delta"],
                         targets_trace=trace,
                         input_graph=graph,
                         alpha=alpha,
-                        beta = PARAMETERS["beta"])
-    model.set_time_limit(PARAMETERS["cplex_time_limit"])
-    model.set_memory_limit(PARAMETERS["cplex_workmem_limit"])
-    model.build_model()
+                        beta = parameters["beta"],
+                        movement_formulation=parameters.get("movement_formulation", "mccormick"))
+    model.set_parameters(parameters)
+    model.build_model(parameters.get("model_build_chunk_size"))
+    if parameters.get("lp_relaxation"):
+        model.quick_estimate(parameters.get("lp_fixing_time_limit"))
     model.solve_model()
     solution = model.get_objective_value()
+    model.save_solution_data(solution_file[:-4] + ".npz")
+    if len(model.get_solution().telemetry) > 0:
+        model.get_solution().save_telemetry(solution_file[:-4] + "_telemetry.csv")
+    catalog = ResultsCatalog()
+    catalog.add_result(run_parameters, model.get_solution().get_data(), solution_file)
+    catalog.close()
+    # Written last: the text file marks the run as complete
     model.save_solution(solution_file)
     model.cplex_finish()
+    cache.store(key, solution_file)
     return solution
 
-if __name__ == "__main__":
-    """This script creates the experiment directory and runs the milp model for each parameter combination.
-    It saves the solutions in the experiment directory.
-    If the solution already exists for an instance, it skips that instance.
+def get_solution_file(parameters: dict, n_positions: int, n_drones: int, n_targets: int, target_speed: float, alpha: float, instance: int) -> str:
+    """Returns the path + name of the text solution file of a run. The file is written atomically and last, so its existence means the run is complete."""
+    return FILES_DIR+parameters["experiment_name"]+f"/milp_solution_p_{n_positions}_d_{n_drones}_nt_{n_targets}_t_{parameters['observation_period']}_v_{target_speed}_alpha_{alpha}_i_{instance}.txt"
+
+def is_run_complete(job: dict, parameters: dict) -> bool:
+    """Returns True if the solution file of a run exists and was solved for its current trace and parameters. Refer to result_cache.py.
+    A solution file solved before the result cache (without a .key file) is not complete: run_milp_model adopts it or solves it again. This function does not write any file.
+
+    Args:
+        job: Run as returned by get_sweep_jobs.
+        parameters: Parameters dictionary of the experiment.
+    """
+    solution_file = get_solution_file(parameters, job["n_positions"], job["n_drones"], job["n_targets"], job["target_speed"], job["alpha"], job["instance"])
+    cache = ResultCache()
+    # The files of the run are checked before its trace is read and hashed
+    if not os.path.isfile(solution_file) or cache.get_key(solution_file) is None:
+        return False
+    trace = load_run_trace(parameters, job["n_targets"], job["target_speed"], job["instance"])
+    return cache.is_linked(get_run_key(parameters, job["n_positions"], job["n_drones"], job["alpha"], trace), solution_file)
+
+def get_graph(parameters: dict, n_positions: int) -> Graph:
+    """Returns the graph described by the parameters dictionary for the given number of axis splits."""
+    return Graph(size_A = parameters["area_size"],
+                    heights = parameters["heights"],
+                    base_station = parameters["base_station"],
+                    n_positions_per_axis = n_positions,
+                    communication_range = parameters["comm_range"],
+                    coverage_angle = parameters["coverage_angle"])
+
+def get_sweep_jobs(parameters: dict) -> list:
+    """Returns every run of the parameter sweep, in the order they are solved by this script.
+
+    Args:
+        parameters: Parameters dictionary of the experiment.
+
+    Returns:
+        List of dictionaries with the keys n_positions, n_targets, target_speed, n_drones, alpha and instance.
+    """
+    return [{"n_positions": n_positions, "n_targets": n_targets, "target_speed": target_speed, "n_drones": n_drones, "alpha": alpha, "instance": instance}
+            for n_positions in parameters["n_positions"]
+            for n_targets in parameters["n_targets"]
+            for target_speed in parameters["targets_speed"]
+            for n_drones in parameters["n_drones"]
+            for alpha in parameters["alpha"]
+            for instance in range(parameters["n_instances"])]
+
+def get_model_estimate(job: dict, parameters: dict, graph: Graph) -> dict:
+    """Returns the predicted size and memory of the model of a run without building it. Refer to model_size.estimate_model_size.
+
+    Args:
+        job: Run as returned by get_sweep_jobs.
+        parameters: Parameters dictionary of the experiment.
+        graph: Graph of the run.
     """
-    if not os.path.isdir(FILES_DIR + PARAMETERS["experiment_name"]):
+    trace = load_run_trace(parameters, job["n_targets"], job["target_speed"], job["instance"])
+    return estimate_model_size(graph, trace, job["n_drones"], parameters["observation_period"], parameters.get("model_build_chunk_size"), parameters.get("movement_formulation", "mccormick"))
+
+def setup_experiment_dir(parameters: dict) -> None:
+    """Creates the experiment directory and saves the parameters dictionary to parameters.txt inside it."""
+    if not os.path.isdir(FILES_DIR + parameters["experiment_name"]):
         try:
-            os.mkdir(FILES_DIR + PARAMETERS["experiment_name"])
+            os.mkdir(FILES_DIR + parameters["experiment_name"])
         except OSError:
-            print("Creation of the directory %s failed" % (FILES_DIR + PARAMETERS["experiment_name"]))
+            print("Creation of the directory %s failed" % (FILES_DIR + parameters["experiment_name"]))
             exit(1)
 
-    file_parameters = open(FILES_DIR + PARAMETERS["experiment_name"] + "/parameters.txt", "w")
-    file_parameters.write(str(PARAMETERS))
+    file_parameters = open(FILES_DIR + parameters["experiment_name"] + "/parameters.txt", "w")
+    file_parameters.write(str(parameters))
     file_parameters.close()
 
-    for n_positions in PARAMETERS["n_positions"]:
-        graph = Graph(size_A = PARAMETERS["area_size"],
-                        heights = PARAMETERS["heights"],
-                        base_station = PARAMETERS["base_station"],
-                        n_positions_per_axis = n_positions,
-                        communication_range = PARAMETERS["comm_range"],
-                        coverage_angle = PARAMETERS["coverage_angle"])
-        for n_targets in PARAMETERS["n_targets"]:
-            for target_speed in PARAMETERS["targets_speed"]:
-                for n_drones in PARAMETERS["n_drones"]:
-                    for alpha in PARAMETERS["alpha"]:
-                        for n in range(PARAMETERS["n_instances"]):
-                            run_milp_model(n_targets, n_drones, target_speed, n, graph, alpha)
+if __name__ == "__main__":
+    """This script creates the experiment directory and runs the milp model for each parameter combination.
+    It saves the solutions in the experiment directory.
+    If the solution already exists for an instance, it skips that instance.
+    If PARAMETERS["memory_budget"] is set, it also skips the instances predicted to exceed it.
+    """
+    setup_experiment_dir(PARAMETERS)
+
+    graphs = {}
+    for job in get_sweep_jobs(PARAMETERS):
+        if job["n_positions"] not in graphs:
+            graphs[job["n_positions"]] = get_graph(PARAMETERS, job["n_positions"])
+        if PARAMETERS.get("memory_budget") is not None:
+            estimate = get_model_estimate(job, PARAMETERS, graphs[job["n_positions"]])
+            if exceeds_memory_budget(estimate, PARAMETERS):
+                print(f"Skipping {job}: predicted memory {estimate['total_memory_mb']:.0f} MB + cplex_workmem_limit exceeds the memory budget of {PARAMETERS['memory_budget']} MB")
+                continue
+        run_milp_model(job["n_targets"], job["n_drones"], job["target_speed"], job["instance"], graphs[job["n_positions"]], job["alpha"])
@@ -0,0 +1,356 @@
+"""Local solver service: a long-running process that solves deployment requests sent as JSON over HTTP on localhost.
+    Client tools skip the Python and CPLEX imports, and the graphs and cost matrices of recent requests are kept in memory. So are their cplex models: the model of a graph and shape (numbers of drones, time steps and targets) is built once, and a later request only replaces its targets (refer to WarmMilpModel) before solving it.
+    Requests are queued and solved by a pool of worker threads. Each worker takes every waiting request at once and solves them grouped by graph and shape.
+
+    POST /solve with a JSON object:
+        positions: Positions of the targets, nested list of shape (n_targets, observation_period, 2).
+        n_drones: Number of drones available.
+        alpha, n_positions: Optional, default to the first value of the service parameters.
+        parameters: Optional dictionary overriding the service parameters (e.g. area_size, comm_range, cplex_time_limit).
+    returns the fields of Solution.get_data() (the deployment as a nested list of position indices, deployment_positions + [base_station]) and a "timing" dictionary in seconds:
+        queue_time (waiting for a worker), graph_time (graph and cost matrices, 0 if cached), build_time (the model if it is not cached, and its targets), solve_time (cplex) and total_time, plus graph_cached and model_cached.
+    GET /status returns the number of requests received, solved, failed and waiting, and the number of cached graphs and models.
+
+    Usage: python fanet/solver_service.py [--host HOST] [--port PORT] [--workers N]
+"""
+from typing import Optional
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as url_request
+import numpy as np
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel, get_cost_matrices
+from fanet.online_planner import OnlineMilpModel
+from fanet.solve_milp import get_graph
+from fanet.setup.config import PARAMETERS
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+
+def get_graph_key(parameters: dict, n_positions: int) -> tuple:
+    """Returns the parameters that define the graph of a request and its cost matrices, as a hashable key."""
+    return (parameters["area_size"], tuple(parameters["heights"]), tuple(parameters["base_station"]), n_positions, parameters["comm_range"], parameters["coverage_angle"], parameters["time_step_delta"])
+
+def get_model_key(job: dict) -> tuple:
+    """Returns the graph, the shape and the parameters that define the model of a job without its targets, as a hashable key. The cplex settings are in the key since they are set once per model."""
+    parameters = job["parameters"]
+    cplex_parameters = json.dumps({key: value for key, value in parameters.items() if key.startswith("cplex_")}, sort_keys=True)
+    return (get_graph_key(parameters, job["n_positions"]), job["n_drones"], job["positions"].shape[1], job["positions"].shape[0], job["alpha"], parameters["beta"],
+            parameters.get("movement_formulation", "mccormick"), cplex_parameters)
+
+def to_json(value):
+    """Converts numpy values of a solution to JSON serializable ones. nan becomes None."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+class WarmMilpModel(OnlineMilpModel):
+    # The targets are at every time step, there is no current deployment
+    first_target_step = 0
+
+    def __init__(self, n_available_drones: int, observation_period: int, time_step_delta: float, input_graph: Graph, alpha: float, beta: float, n_targets: int, movement_formulation: Optional[str] = "mccormick") -> None:
+        """MilpModel whose targets are replaced with set_targets without building the model again. With the positions of n_targets targets, it is the model MilpModel builds for their trace: the drones depart from and return to the base station.
+
+        Args:
+            n_targets: Number of targets of every trace. It bounds the flows, as in MilpModel.
+            Refer to MilpModel for the other arguments.
+        """
+        super().__init__(n_available_drones, observation_period - 1, time_step_delta, input_graph, alpha, beta, n_targets, movement_formulation)
+
+    def build_model(self, chunk_size: Optional[int] = None) -> None:
+        """Builds the part of the model that does not depend on the targets, with the return to the base station in the objective function. Refer to MilpModel.build_model."""
+        MilpModel.build_model(self, chunk_size)
+
+class SolverService:
+    def __init__(self, parameters: Optional[dict] = PARAMETERS, n_workers: Optional[int] = 1, max_graphs: Optional[int] = 16, max_models: Optional[int] = 16) -> None:
+        """Queue of deployment requests solved by worker threads. Refer to the description of this module for the format of the requests.
+
+        Args:
+            parameters: Parameters dictionary used by default for every request. Defaults to PARAMETERS.
+            n_workers: Number of worker threads, i.e., of models solved at the same time. Defaults to 1.
+            max_graphs: Number of graphs (and their cost matrices) kept in memory. The least recently used one is dropped first. Defaults to 16.
+            max_models: Number of idle cplex models kept in memory. The least recently used one is dropped first. Defaults to 16.
+        """
+        self.parameters = parameters
+        self.n_workers = n_workers
+        self.max_graphs = max_graphs
+        self.max_models = max_models
+        self.queue = queue.Queue()
+        self.graphs = collections.OrderedDict()
+        # Idle models of each model key, refer to get_model_key
+        self.models = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"n_received": 0, "n_solved": 0, "n_failed": 0}
+        self.workers = []
+
+    def start(self) -> None:
+        """Starts the worker threads."""
+        self.workers = [threading.Thread(target=self.work, daemon=True) for _ in range(self.n_workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self) -> None:
+        """Stops the worker threads once the requests already queued are solved, and frees the cached models."""
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        with self.lock:
+            models = [model for key_models in self.models.values() for model in key_models]
+            self.models.clear()
+        for model in models:
+            model.cplex_finish()
+
+    def get_job(self, request: dict) -> dict:
+        """Validates a request and returns the job solved by the workers.
+
+        Raises:
+            ValueError: If the request is not a valid deployment request.
+        """
+        if not isinstance(request, dict) or "positions" not in request or "n_drones" not in request:
+            raise ValueError("A request must be a JSON object with at least the keys positions and n_drones")
+        parameters = dict(self.parameters)
+        parameters.update(request.get("parameters", {}))
+        positions = np.asarray(request["positions"], dtype=float)
+        if positions.ndim != 3 or positions.shape[2] != 2:
+            raise ValueError(f"positions must have shape (n_targets, observation_period, 2), not {positions.shape}")
+        return {"positions": positions,
+                "n_drones": int(request["n_drones"]),
+                "alpha": float(request.get("alpha", parameters["alpha"][0])),
+                "n_positions": int(request.get("n_positions", parameters["n_positions"][0])),
+                "parameters": parameters,
+                "future": Future(),
+                "submit_time": time.perf_counter()}
+
+    def submit(self, request: dict) -> Future:
+        """Queues a request. The future holds the response of solve once a worker solved it."""
+        job = self.get_job(request)
+        with self.lock:
+            self.counters["n_received"] += 1
+        self.queue.put(job)
+        return job["future"]
+
+    def solve(self, request: dict, timeout: Optional[float] = None) -> dict:
+        """Queues a request and waits for its response. Refer to the description of this module."""
+        return self.submit(request).result(timeout)
+
+    def get_graph(self, parameters: dict, n_positions: int) -> tuple:
+        """Returns the graph of a request and its cost matrices, built the first time they are needed.
+
+        Returns:
+            Tuple (graph, distance_matrix, energy_matrix, cached).
+        """
+        key = get_graph_key(parameters, n_positions)
+        with self.lock:
+            if key in self.graphs:
+                self.graphs.move_to_end(key)
+                return self.graphs[key] + (True,)
+        graph = get_graph(parameters, n_positions)
+        entry = (graph,) + get_cost_matrices(graph, parameters["time_step_delta"])
+        with self.lock:
+            self.graphs[key] = entry
+            if len(self.graphs) > self.max_graphs:
+                self.graphs.popitem(last=False)
+        return entry + (False,)
+
+    def get_model(self, job: dict, graph: Graph, distance_matrix: np.ndarray, energy_matrix: np.ndarray) -> tuple:
+        """Returns an idle model for the key of a job, built the first time it is needed. The model is out of the cache until it is given back with release_model, so each model is solved by one worker at a time.
+
+        Returns:
+            Tuple (model, cached).
+        """
+        key = get_model_key(job)
+        with self.lock:
+            if self.models.get(key):
+                self.models.move_to_end(key)
+                return self.models[key].pop(), True
+        parameters = job["parameters"]
+        model = WarmMilpModel(job["n_drones"], job["positions"].shape[1], parameters["time_step_delta"], graph, job["alpha"], parameters["beta"], job["positions"].shape[0], parameters.get("movement_formulation", "mccormick"))
+        model.distance_matrix = distance_matrix
+        model.energy_matrix = energy_matrix
+        try:
+            model.model_shut_up()
+            model.set_parameters(parameters)
+            model.build_model(parameters.get("model_build_chunk_size"))
+        except Exception:
+            model.cplex_finish()
+            raise
+        return model, False
+
+    def release_model(self, job: dict, model: WarmMilpModel) -> None:
+        """Gives back a model taken with get_model. The least recently used models beyond max_models are freed."""
+        dropped = []
+        with self.lock:
+            key = get_model_key(job)
+            self.models.setdefault(key, []).append(model)
+            self.models.move_to_end(key)
+            while sum(len(key_models) for key_models in self.models.values()) > self.max_models:
+                oldest_key, oldest_models = next(iter(self.models.items()))
+                dropped.append(oldest_models.pop(0))
+                if not oldest_models:
+                    del self.models[oldest_key]
+        for dropped_model in dropped:
+            dropped_model.cplex_finish()
+
+    def run(self, job: dict) -> dict:
+        """Solves the model of a job, with its targets replaced, and returns its response."""
+        start_time = time.perf_counter()
+        parameters = job["parameters"]
+        graph, distance_matrix, energy_matrix, cached = self.get_graph(parameters, job["n_positions"])
+        graph_time = time.perf_counter() - start_time
+
+        model, model_cached = self.get_model(job, graph, distance_matrix, energy_matrix)
+        try:
+            model.set_targets(np.transpose(job["positions"], (1, 0, 2)))
+            build_time = time.perf_counter() - start_time - graph_time
+            model.solve_model()
+            solution = model.get_solution()
+        except Exception:
+            # The model may be left half updated
+            model.cplex_finish()
+            raise
+        self.release_model(job, model)
+
+        response = {field: to_json(value) for field, value in solution.get_data().items()}
+        response["timing"] = {"queue_time": start_time - job["submit_time"],
+                              "graph_time": graph_time,
+                              "build_time": build_time,
+                              "solve_time": solution.solution_time,
+                              "total_time": time.perf_counter() - job["submit_time"],
+                              "graph_cached": cached,
+                              "model_cached": model_cached}
+        return response
+
+    def work(self) -> None:
+        """Target of the worker threads: takes every waiting job, solves them grouped by graph and shape, and sets the result (or the exception) of their futures."""
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            n_stops = sum(job is None for job in batch)
+            # Put back the stops meant for other workers
+            for _ in range(n_stops - 1):
+                self.queue.put(None)
+            jobs = sorted([job for job in batch if job is not None], key=lambda job: str(get_model_key(job)))
+            for job in jobs:
+                try:
+                    job["future"].set_result(self.run(job))
+                    counter = "n_solved"
+                except Exception as error:
+                    job["future"].set_exception(error)
+                    counter = "n_failed"
+                with self.lock:
+                    self.counters[counter] += 1
+            if n_stops > 0:
+                return
+
+    def get_status(self) -> dict:
+        """Returns the counters of the service, the number of waiting requests and of cached graphs and models."""
+        with self.lock:
+            return dict(self.counters, n_waiting=self.queue.qsize(), n_graphs=len(self.graphs), n_models=sum(len(key_models) for key_models in self.models.values()), n_workers=len(self.workers))
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    """Handles the HTTP requests of a SolverServer. Refer to the description of this module."""
+
+    def send_json(self, code: int, content: dict) -> None:
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/status":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        self.send_json(200, self.server.service.get_status())
+
+    def do_POST(self) -> None:
+        if self.path != "/solve":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            future = self.server.service.submit(request)
+        except ValueError as error:  # json.JSONDecodeError is a ValueError
+            self.send_json(400, {"error": str(error)})
+            return
+        try:
+            self.send_json(200, future.result())
+        except Exception as error:
+            self.send_json(500, {"error": f"{type(error).__name__}: {error}"})
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class SolverServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: SolverService, host: Optional[str] = DEFAULT_HOST, port: Optional[int] = DEFAULT_PORT, verbose: Optional[bool] = False) -> None:
+        """HTTP server of a SolverService. Each connection is handled by its own thread, which waits for the workers of the service. Use port 0 to let the system choose a free port (refer to server_address)."""
+        super().__init__((host, port), SolverRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+def request_deployment(positions: np.ndarray, n_drones: int, alpha: Optional[float] = None, n_positions: Optional[int] = None, parameters: Optional[dict] = None, host: Optional[str] = DEFAULT_HOST, port: Optional[int] = DEFAULT_PORT, timeout: Optional[float] = None) -> dict:
+    """Sends a deployment request to a running service and returns its response. Refer to the description of this module.
+
+    Args:
+        positions: Array of shape (n_targets, observation_period, 2) with the positions of the targets (e.g. TargetsTrace.get_positions()).
+        n_drones: Number of drones available.
+        alpha, n_positions, parameters: Refer to the description of this module. Defaults to None (the defaults of the service).
+        timeout: Seconds to wait for the response. Defaults to None (no timeout).
+
+    Returns:
+        The response, with the deployment as an integer array of shape (observation_period, n_drones).
+
+    Raises:
+        urllib.error.HTTPError: If the service rejects or fails to solve the request. The body of the error holds the message.
+    """
+    content = {"positions": np.asarray(positions, dtype=float).tolist(), "n_drones": n_drones}
+    if alpha is not None:
+        content["alpha"] = alpha
+    if n_positions is not None:
+        content["n_positions"] = n_positions
+    if parameters is not None:
+        content["parameters"] = parameters
+    http_request = url_request.Request(f"http://{host}:{port}/solve", data=json.dumps(content).encode(), headers={"Content-Type": "application/json"})
+    with url_request.urlopen(http_request, timeout=timeout) as answer:
+        response = json.loads(answer.read())
+    response["deployment"] = np.array(response["deployment"], dtype=int)
+    return response
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the local solver service until interrupted.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on. Defaults to localhost only.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument("--workers", type=int, default=1, help="Number of models solved at the same time.")
+    parser.add_argument("--verbose", action="store_true", help="Logs every HTTP request.")
+    args = parser.parse_args()
+
+    service = SolverService(PARAMETERS, args.workers)
+    service.start()
+    server = SolverServer(service, args.host, args.port, args.verbose)
+    print(f"Solver service listening on http://{server.server_address[0]}:{server.server_address[1]} with {args.workers} worker(s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    service.stop()
@@ -0,0 +1,191 @@
+"""This script runs the parameter sweep of solve_milp.py in parallel, cheapest runs first, and can be killed and resumed at any time.
+    The state of every run (pending, running, done, failed or skipped_memory_budget) is kept in a manifest file in the experiment directory.
+    A run is done only once its solution file exists for its current trace and parameters (refer to result_cache.py), which solve_milp.run_milp_model writes atomically and last.
+    Failed runs (crash, out of memory kill) are retried up to --max-attempts times.
+    Usage: python fanet/sweep_scheduler.py [--workers N] [--cores N] [--memory MB] [--max-attempts N] [--retry-failed]
+"""
+from typing import Optional
+import argparse
+import json
+import os
+import numpy as np
+from fanet.parallel_runner import run_parallel, get_worker_parameters
+from fanet.results_catalog import ResultsCatalog
+from fanet.model_size import exceeds_memory_budget
+from fanet.solve_milp import get_sweep_jobs, get_graph, get_model_estimate, setup_experiment_dir, is_run_complete
+from fanet.setup.config import PARAMETERS, FILES_DIR, RESULTS_CATALOG
+
+# Status of a run in the manifest
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+# The model of the run is predicted to exceed the memory_budget parameter. Re-evaluated every time the manifest is updated.
+JOB_SKIPPED = "skipped_memory_budget"
+
+def get_job_key(job: dict) -> str:
+    """Returns the key of a run in the manifest."""
+    return f"p_{job['n_positions']}_d_{job['n_drones']}_nt_{job['n_targets']}_v_{job['target_speed']}_alpha_{job['alpha']}_i_{job['instance']}"
+
+def get_model_size_proxy(job: dict, parameters: dict) -> float:
+    """Returns the number of drone movement variables of a run, D*T*(|P|+1)^2, which dominates the size of the model."""
+    n_positions = job["n_positions"] ** 2 * len(parameters["heights"]) + 1
+    return job["n_drones"] * parameters["observation_period"] * n_positions ** 2
+
+def get_solve_time_history(catalog_file: Optional[str] = RESULTS_CATALOG) -> dict:
+    """Returns the mean solution time of past runs for each (n_positions, n_drones, n_targets), across all experiments in the results catalog.
+
+    Args:
+        catalog_file: path + name of the results catalog. Defaults to RESULTS_CATALOG.
+
+    Returns:
+        Dictionary {(n_positions, n_drones, n_targets): mean solution time in seconds}. Empty if the catalog does not exist.
+    """
+    if not os.path.isfile(catalog_file):
+        return {}
+    catalog = ResultsCatalog(catalog_file)
+    table = catalog.aggregate(group_by=["n_positions", "n_drones", "n_targets"], metrics=["solution_time"], feasible_only=False)
+    catalog.close()
+    return {(int(row["n_positions"]), int(row["n_drones"]), int(row["n_targets"])): float(row["mean_solution_time"]) for row in table if not np.isnan(row["mean_solution_time"])}
+
+def predict_cost(job: dict, parameters: dict, history: dict) -> float:
+    """Predicts the solution time of a run. Past runs with the same n_positions, n_drones and n_targets give their mean solution time. Otherwise, the size of the model is converted to seconds with the median time per unit of size of the past runs.
+
+    Args:
+        job: Run as returned by solve_milp.get_sweep_jobs.
+        parameters: Parameters dictionary of the experiment.
+        history: Mean solution times of past runs. Refer to get_solve_time_history.
+
+    Returns:
+        Predicted cost of the run. Only the order between runs matters.
+    """
+    key = (job["n_positions"], job["n_drones"], job["n_targets"])
+    if key in history:
+        return history[key]
+    size = get_model_size_proxy(job, parameters)
+    if not history:
+        return size
+    rates = [solution_time / get_model_size_proxy({"n_positions": n_positions, "n_drones": n_drones}, parameters) for (n_positions, n_drones, _), solution_time in history.items()]
+    return size * float(np.median(rates))
+
+class SweepScheduler:
+    def __init__(self, parameters: dict, manifest_file: Optional[str] = None, max_attempts: Optional[int] = 2, catalog_file: Optional[str] = RESULTS_CATALOG) -> None:
+        """Keeps the state of every run of a parameter sweep in a manifest file and runs the pending ones cheapest first.
+
+        Args:
+            parameters: Parameters dictionary of the experiment.
+            manifest_file: path + name of the manifest file. Defaults to None (manifest.json in the experiment directory).
+            max_attempts: Number of times a run is started before it is marked as failed. Defaults to 2.
+            catalog_file: Results catalog used to predict the cost of the runs. Defaults to RESULTS_CATALOG.
+        """
+        self.parameters = parameters
+        self.manifest_file = manifest_file if manifest_file is not None else FILES_DIR + parameters["experiment_name"] + "/manifest.json"
+        self.max_attempts = max_attempts
+        self.catalog_file = catalog_file
+        self.manifest = {}
+        if os.path.isfile(self.manifest_file):
+            with open(self.manifest_file, "r") as file:
+                self.manifest = json.load(file)
+
+    def save_manifest(self) -> None:
+        """Saves the manifest to a temporary file and renames it, so the manifest on disk is always complete."""
+        with open(self.manifest_file + ".tmp", "w") as file:
+            json.dump(self.manifest, file, indent=1)
+        os.replace(self.manifest_file + ".tmp", self.manifest_file)
+
+    def is_complete(self, job: dict) -> bool:
+        """Returns True if the solution file of the run exists and was solved for its current trace and parameters."""
+        return is_run_complete(job, self.parameters)
+
+    def update_jobs(self, retry_failed: Optional[bool] = False) -> None:
+        """Adds the runs of the sweep missing from the manifest, marks as done the runs whose solution file exists, sets back to pending the runs left running by a killed session and predicts the cost of every pending run.
+        If the memory_budget parameter is set, the pending runs whose model is predicted to exceed it are skipped (refer to model_size.exceeds_memory_budget).
+
+        Args:
+            retry_failed: If True, failed runs are set back to pending with no attempts. Defaults to False.
+        """
+        history = get_solve_time_history(self.catalog_file)
+        graphs = {}
+        for job in get_sweep_jobs(self.parameters):
+            entry = self.manifest.setdefault(get_job_key(job), {"job": job, "status": JOB_PENDING, "attempts": 0, "exit_codes": []})
+            if self.is_complete(job):
+                entry["status"] = JOB_DONE
+            elif entry["status"] in [JOB_RUNNING, JOB_DONE, JOB_SKIPPED]:
+                entry["status"] = JOB_PENDING
+            elif entry["status"] == JOB_FAILED and retry_failed:
+                entry["status"] = JOB_PENDING
+                entry["attempts"] = 0
+            if entry["status"] == JOB_PENDING and self.parameters.get("memory_budget") is not None:
+                if job["n_positions"] not in graphs:
+                    graphs[job["n_positions"]] = get_graph(self.parameters, job["n_positions"])
+                estimate = get_model_estimate(job, self.parameters, graphs[job["n_positions"]])
+                entry["predicted_memory_mb"] = estimate["total_memory_mb"]
+                if exceeds_memory_budget(estimate, self.parameters):
+                    entry["status"] = JOB_SKIPPED
+            if entry["status"] == JOB_PENDING:
+                entry["predicted_cost"] = predict_cost(job, self.parameters, history)
+        self.save_manifest()
+
+    def get_pending_jobs(self) -> list:
+        """Returns the pending runs sorted by predicted cost, cheapest first."""
+        entries = [entry for entry in self.manifest.values() if entry["status"] == JOB_PENDING]
+        return [entry["job"] for entry in sorted(entries, key=lambda entry: entry.get("predicted_cost", 0))]
+
+    def on_job_started(self, job: dict) -> None:
+        """Marks a run as running."""
+        entry = self.manifest[get_job_key(job)]
+        entry["status"] = JOB_RUNNING
+        entry["attempts"] += 1
+        self.save_manifest()
+
+    def on_job_finished(self, job: dict, exit_code: int) -> None:
+        """Marks a run as done if its solution file exists. Otherwise, the run goes back to pending, or to failed once it reached max_attempts."""
+        entry = self.manifest[get_job_key(job)]
+        entry["exit_codes"].append(exit_code)
+        if exit_code == 0 and self.is_complete(job):
+            entry["status"] = JOB_DONE
+        elif entry["attempts"] >= self.max_attempts:
+            entry["status"] = JOB_FAILED
+        else:
+            entry["status"] = JOB_PENDING
+        self.save_manifest()
+
+    def get_summary(self) -> dict:
+        """Returns the number of runs in each status."""
+        summary = {JOB_PENDING: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0, JOB_SKIPPED: 0}
+        for entry in self.manifest.values():
+            summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+        return summary
+
+    def run(self, n_workers: int, worker_parameters: dict, verbose: Optional[bool] = True) -> dict:
+        """Runs the pending runs until every run is done or failed. Runs that fail and can be retried are started again after the others.
+
+        Args:
+            n_workers: Maximum number of simultaneous runs.
+            worker_parameters: Parameters dictionary given to every run. Refer to parallel_runner.get_worker_parameters.
+            verbose: If True, prints the progress. Defaults to True.
+
+        Returns:
+            Number of runs in each status. Refer to get_summary.
+        """
+        pending_jobs = self.get_pending_jobs()
+        while pending_jobs:
+            run_parallel(pending_jobs, worker_parameters, n_workers, on_job_started=self.on_job_started, on_job_finished=self.on_job_finished, verbose=verbose)
+            pending_jobs = self.get_pending_jobs()
+        return self.get_summary()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the parameter sweep described by PARAMETERS in parallel, cheapest runs first. Can be killed and resumed.")
+    parser.add_argument("--workers", type=int, default=4, help="Number of runs solved simultaneously.")
+    parser.add_argument("--cores", type=int, default=os.cpu_count(), help="Number of cores shared by all workers.")
+    parser.add_argument("--memory", type=int, default=None, help="Cplex working memory in MB shared by all workers.")
+    parser.add_argument("--max-attempts", type=int, default=2, help="Number of times a run is started before it is marked as failed.")
+    parser.add_argument("--retry-failed", action="store_true", help="Sets the runs that failed in previous sessions back to pending.")
+    args = parser.parse_args()
+
+    setup_experiment_dir(PARAMETERS)
+    scheduler = SweepScheduler(PARAMETERS, max_attempts=args.max_attempts)
+    scheduler.update_jobs(retry_failed=args.retry_failed)
+    print(f"Runs: {scheduler.get_summary()}")
+    summary = scheduler.run(args.workers, get_worker_parameters(PARAMETERS, args.workers, args.cores, args.memory))
+    print(f"Runs: {summary}")
@@ -1,8 +1,124 @@
-from typing import Optional
+from typing import Optional, Union
 import numpy as np
 
+def get_rng(seed: Optional[Union[int, list, np.random.Generator]] = None) -> np.random.Generator:
+    """Returns the random generator of a trace.
+
+    Args:
+        seed: Seed (or list of integers, e.g. [seed, instance]) or generator. If None, the generator is seeded from the global numpy random state, so np.random.seed still makes the traces reproducible. Defaults to None.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    if seed is None:
+        seed = np.random.randint(2**31)
+    return np.random.default_rng(seed)
+
+def reflect(coordinates: np.ndarray, area_size: float) -> np.ndarray:
+    """Folds every coordinate back into [0, area_size] by bouncing off the walls: area_size + 1 -> area_size - 1, 2 * area_size + 1 -> 1, -1 -> 1, - area_size - 1 -> area_size - 1, etc."""
+    coordinates = np.abs(coordinates)
+    n_walls = coordinates // area_size
+    rest = coordinates % area_size
+    return np.where(n_walls % 2 == 1, area_size - rest, rest)
+
+def generate_positions(n_targets: int, observation_period: int, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1, seed: Optional[Union[int, list, np.random.Generator]] = None) -> np.ndarray:
+    """Generates the random walk of all targets in one vectorized pass. Each target starts at a uniform random position and moves target_speed * time_step_delta in a uniform random direction at every time step, bouncing off the walls.
+    The walk is drawn in the unbounded plane and then folded into the area. Since the directions are symmetric, this has the same distribution as bouncing at every step.
+
+    Args:
+        n_targets: Number of targets.
+        observation_period: Number of time steps.
+        target_speed: Targets speed in m/s.
+        area_size: Lenght of the square area A.
+        time_step_delta: Amount of seconds between time steps. Defaults to 1.
+        seed: Seed or generator. Refer to get_rng. Defaults to None.
+
+    Returns:
+        Array of shape (n_targets, observation_period, 2) with the (x, y) positions.
+    """
+    initial_positions, angles = draw_walk(n_targets, observation_period, area_size, get_rng(seed))
+    return get_walk_positions(initial_positions, angles, target_speed, area_size, time_step_delta)
+
+def draw_walk(n_targets: int, observation_period: int, area_size: float, rng: np.random.Generator) -> tuple:
+    """Draws the initial positions of shape (n_targets, 1, 2) and the directions of shape (n_targets, observation_period - 1) of the walks of generate_positions."""
+    initial_positions = rng.random((n_targets, 1, 2)) * area_size
+    angles = rng.random((n_targets, observation_period - 1)) * 2 * np.pi
+    return initial_positions, angles
+
+def get_walk_positions(initial_positions: np.ndarray, angles: np.ndarray, target_speed: float, area_size: float, time_step_delta: float) -> np.ndarray:
+    """Returns the positions of walks drawn by draw_walk, of shape (..., n_targets, observation_period, 2) for arrays of shape (..., n_targets, 1, 2) and (..., n_targets, observation_period - 1)."""
+    steps = target_speed * time_step_delta * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    positions = np.concatenate([initial_positions, initial_positions + np.cumsum(steps, axis=-2)], axis=-2)
+    return reflect(positions, area_size)
+
+def generate_positions_batch(n_instances: int, n_targets: int, observation_period: int, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1, seed: Optional[int] = None) -> np.ndarray:
+    """Generates the positions of many instances. Instance i uses the generator seeded with [seed, i], so it can be regenerated on its own with generate_positions(..., seed=[seed, i]) or TargetsTrace(..., seed=[seed, i]).
+    Only the draws are made instance by instance, since each instance has its own generator. The walks of all instances are computed in one vectorized pass.
+
+    Args:
+        n_instances: Number of instances.
+        seed: Seed of the batch. If None, it is drawn from the global numpy random state. Defaults to None.
+        Refer to generate_positions for the other arguments.
+
+    Returns:
+        Array of shape (n_instances, n_targets, observation_period, 2).
+    """
+    if seed is None:
+        seed = np.random.randint(2**31)
+    initial_positions = np.empty((n_instances, n_targets, 1, 2))
+    angles = np.empty((n_instances, n_targets, observation_period - 1))
+    for instance in range(n_instances):
+        initial_positions[instance], angles[instance] = draw_walk(n_targets, observation_period, area_size, get_rng([seed, instance]))
+    return get_walk_positions(initial_positions, angles, target_speed, area_size, time_step_delta)
+
+def generate_covered_positions(graph, n_targets: int, observation_period: int, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1, seed: Optional[Union[int, list, np.random.Generator]] = None, max_draws: Optional[int] = 100, max_restarts: Optional[int] = 10) -> np.ndarray:
+    """Generates the random walk of all targets restricted to the union of the coverage disks of the graph, so the trace is always feasible (refer to Graph.verify_trace_feasiblity).
+    Instead of drawing whole traces until one is feasible, whose acceptance probability drops exponentially with n_targets * observation_period, only the offending draw of the offending target is drawn again:
+    the initial positions are uniform over the union of the disks, and each step keeps a uniform random direction among those landing inside the union.
+    A target that finds no such direction in max_draws draws (e.g. stuck in a small isolated disk) starts a new walk.
+
+    Args:
+        graph: Graph whose positions must cover the targets.
+        seed: Seed or generator. Refer to get_rng. Defaults to None.
+        max_draws: Maximum number of draws of one step of one target. Defaults to 100.
+        max_restarts: Maximum number of times the stuck targets start a new walk. Defaults to 10.
+        Refer to generate_positions for the other arguments.
+
+    Returns:
+        Array of shape (n_targets, observation_period, 2) with the (x, y) positions.
+    """
+    rng = get_rng(seed)
+    positions = np.empty((n_targets, observation_period, 2))
+
+    offending = np.arange(n_targets)
+    for _ in range(max_draws * 10):
+        positions[offending, 0] = rng.random((len(offending), 2)) * area_size
+        offending = offending[~graph.is_covered(positions[offending, 0])]
+        if len(offending) == 0:
+            break
+    else:
+        raise ValueError("The coverage disks of the graph leave almost no room for the targets in the area")
+
+    stuck = np.zeros(n_targets, dtype=bool)
+    step_length = target_speed * time_step_delta
+    for t in range(1, observation_period):
+        offending = np.flatnonzero(~stuck)
+        for _ in range(max_draws):
+            angles = rng.random(len(offending)) * 2 * np.pi
+            steps = step_length * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+            positions[offending, t] = reflect(positions[offending, t - 1] + steps, area_size)
+            offending = offending[~graph.is_covered(positions[offending, t])]
+            if len(offending) == 0:
+                break
+        stuck[offending] = True
+
+    if stuck.any():
+        if max_restarts == 0:
+            raise ValueError(f"Targets moving {step_length} per time step cannot stay inside the coverage disks of the graph")
+        positions[stuck] = generate_covered_positions(graph, int(stuck.sum()), observation_period, target_speed, area_size, time_step_delta, rng, max_draws, max_restarts - 1)
+    return positions
+
 class TargetsTrace:
-    def __init__(self, n_targets: Optional[int] = 5, observation_period: Optional[int] = 5, target_speed: Optional[float] = 5, area_size: Optional[float] = 100, time_step_delta: Optional[float] = 1, load_file: Optional[str] = "") -> None:
+    def __init__(self, n_targets: Optional[int] = 5, observation_period: Optional[int] = 5, target_speed: Optional[float] = 5, area_size: Optional[float] = 100, time_step_delta: Optional[float] = 1, load_file: Optional[str] = "", seed: Optional[Union[int, list, np.random.Generator]] = None, graph = None) -> None:
         """Represents the trajectories of n targets inside an square area A during observation_period time steps. The targets move at a constant speed target_speed. The area A has size area_size^2 and the time between time steps is time_step_delta. If a load file is provided, the trace is loaded from the file. Otherwise, a new trace is generated.
 
         Args:
@@ -12,6 +128,8 @@ class TargetsTrace:
             area_size: Lenght of the square area A. Defaults to 100.
             time_step_delta: Amount of seconds between time steps. Defaults to 1.
             load_file: path + name of file with trace description. Refer to Trace.save_trace() to see the file format. Defaults to "".
+            seed: Seed or generator of the new trace. Refer to get_rng. Defaults to None.
+            graph: If given, the new trace is restricted to the coverage of the graph, so it is always feasible. Refer to generate_covered_positions. Defaults to None.
         """
         if load_file == "":
             self.n_targets = n_targets
@@ -19,11 +137,37 @@ class TargetsTrace:
             self.target_speed = target_speed
             self.area_size = area_size
             self.time_step_delta = time_step_delta
+            self.rng = get_rng(seed)
+            self.graph = graph
 
             self.trace_set = self.generate_all_traces()
         else:
             self.load_trace(load_file)
 
+    @classmethod
+    def from_positions(cls, positions: np.ndarray, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1) -> "TargetsTrace":
+        """Creates a trace from an array of positions.
+
+        Args:
+            positions: Array of shape (n_targets, observation_period, 2).
+            Refer to TargetsTrace.__init__ for the other arguments.
+        """
+        trace = cls.__new__(cls)
+        trace.n_targets, trace.observation_period = positions.shape[:2]
+        trace.target_speed = target_speed
+        trace.area_size = area_size
+        trace.time_step_delta = time_step_delta
+        trace.set_positions(positions)
+        return trace
+
+    def set_positions(self, positions: np.ndarray) -> None:
+        """Sets trace_set from an array of shape (n_targets, observation_period, 2). The positions are stored as Python floats."""
+        self.trace_set = [[tuple(position) for position in target_trace] for target_trace in positions.tolist()]
+
+    def get_positions(self) -> np.ndarray:
+        """Returns the positions of all targets as an array of shape (n_targets, observation_period, 2)."""
+        return np.array(self.trace_set, dtype=float).reshape(len(self.trace_set), -1, 2)
+
     def generate_random_direction(self) -> tuple:
         """Generates a random normalized vector of dimension 2, returns as a tuple (x,y)."""
         direction = (np.random.rand(2) - 0.5) * 2
@@ -31,7 +175,7 @@ class TargetsTrace:
         return normalized_direction
 
     def wall_bounce(self, coordinate: float) -> float:
-        """ Bounces a coordinate axis from the walls.
+        """ Bounces a coordinate axis from the walls. Refer to reflect.
             area_size + 1 -> area_size - 1,
             2 * area_size + 1 -> 1,
             -1 -> 1,
@@ -43,40 +187,24 @@ class TargetsTrace:
         Returns:
             Bounced coordinate.
         """
-        coordinate = abs(coordinate)
-        if coordinate > self.area_size:
-            sign = ((coordinate // self.area_size) % 2)
-            rest = coordinate % self.area_size
-            coordinate = self.area_size * sign  + (-1) ** sign * rest
-        return coordinate
+        return reflect(np.asarray(coordinate, dtype=float), self.area_size).item()
 
     def generate_target_trace(self) -> list:
-        """Generates a sequence o`f positions (list of tuples) of one target inside the area A = (x_max, y_max) with speed target_speed. Random way point model"""
-        target_trace = [tuple(np.random.rand(
-            2) * self.area_size)]  # initial position
-        for t in range(self.observation_period - 1):
-            # Last position plus random direction times speed times time.
-            direction = self.generate_random_direction()
-            last_x = target_trace[-1][0]
-            last_y = target_trace[-1][1]
-            new_x = last_x + direction[0] * self.target_speed * self.time_step_delta
-            new_y = last_y + direction[1] * self.target_speed * self.time_step_delta
-            # Bounces off the walls.
-            new_x = self.wall_bounce(new_x)
-            new_y = self.wall_bounce(new_y)
-            target_trace += [(new_x, new_y)]
-        return target_trace
+        """Generates a sequence of positions (list of tuples) of one target inside the area A = (x_max, y_max) with speed target_speed. Random way point model. Refer to generate_positions."""
+        positions = generate_positions(1, self.observation_period, self.target_speed, self.area_size, self.time_step_delta, self.rng)
+        return [tuple(position) for position in positions[0].tolist()]
 
     def generate_all_traces(self) -> list:
-        """Generates a list with the traces of all targets.
+        """Generates a list with the traces of all targets in one vectorized pass. Refer to generate_positions, or generate_covered_positions if the trace has a graph.
 
         Returns:
             List of traces, where each trace is a list of positions (tuples (x,y)) of one target.
         """
-        trace_set = []
-        for i in range(self.n_targets):
-            trace_set.append(self.generate_target_trace())
-        return trace_set
+        if self.graph is not None:
+            self.set_positions(generate_covered_positions(self.graph, self.n_targets, self.observation_period, self.target_speed, self.area_size, self.time_step_delta, self.rng))
+        else:
+            self.set_positions(generate_positions(self.n_targets, self.observation_period, self.target_speed, self.area_size, self.time_step_delta, self.rng))
+        return self.trace_set
 
     def get_targets_positions_at_time(self, time_step: int) -> list:
         """Returns the positions of all targets at a given time step.
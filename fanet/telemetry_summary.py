@@ -0,0 +1,102 @@
+"""Summary of the progress of cplex over the runs of an experiment, to choose cplex_time_limit from data.
+    For every run with telemetry (refer to MilpModel.set_telemetry), it computes the time to the first feasible solution and the time to reach a relative MIP gap, then reports their percentiles per group of runs.
+    Usage: python fanet/telemetry_summary.py [experiment_name] [--gap GAP] [--group-by n_positions n_drones ...]
+"""
+from typing import Optional
+import argparse
+import os
+import numpy as np
+from fanet.solution import TELEMETRY_COLUMNS, load_solution
+from fanet.results_catalog import SOLUTION_FILE_PATTERN
+from fanet.setup.config import PARAMETERS, FILES_DIR
+
+# Parameters of a run encoded in its solution file name, in the order of the groups of SOLUTION_FILE_PATTERN
+RUN_FILE_PARAMETERS = ("n_positions", "n_drones", "n_targets", "observation_period", "target_speed", "alpha", "instance")
+# Percentiles reported by summarize_runs
+PERCENTILES = (50, 90, 95, 100)
+
+def get_time_to_first_feasible(telemetry: np.ndarray) -> float:
+    """Returns the time in seconds of the first record with an incumbent, nan if there is none.
+
+    Args:
+        telemetry: Array of shape (n_records, len(TELEMETRY_COLUMNS)).
+    """
+    feasible = np.flatnonzero(~np.isnan(telemetry[:, TELEMETRY_COLUMNS.index("incumbent")]))
+    return float(telemetry[feasible[0], 0]) if len(feasible) > 0 else np.nan
+
+def get_time_to_gap(telemetry: np.ndarray, gap: float) -> float:
+    """Returns the time in seconds of the first record with a relative MIP gap lower or equal to gap, nan if there is none.
+
+    Args:
+        telemetry: Array of shape (n_records, len(TELEMETRY_COLUMNS)).
+        gap: Relative MIP gap, e.g. 0.01 for 1%.
+    """
+    # nan gaps (no incumbent) compare as False
+    reached = np.flatnonzero(telemetry[:, TELEMETRY_COLUMNS.index("mip_gap")] <= gap)
+    return float(telemetry[reached[0], 0]) if len(reached) > 0 else np.nan
+
+def get_run_times(experiment_dir: str, gap: Optional[float] = 0.01) -> list:
+    """Returns the parameters, time to first feasible and time to gap of every run of an experiment with telemetry.
+
+    Args:
+        experiment_dir: Directory of the experiment, with the .npz solution files written by solve_milp.run_milp_model.
+        gap: Relative MIP gap. Defaults to 0.01.
+
+    Returns:
+        List of dictionaries with the keys RUN_FILE_PARAMETERS, time_to_first_feasible, time_to_gap and solution_time.
+    """
+    runs = []
+    for file_name in sorted(os.listdir(experiment_dir)):
+        match = SOLUTION_FILE_PATTERN.match(file_name[:-4] + ".txt") if file_name.endswith(".npz") else None
+        if match is None:
+            continue
+        solution = load_solution(os.path.join(experiment_dir, file_name))
+        if len(solution["telemetry"]) == 0:
+            continue
+        run = {parameter: float(value) for parameter, value in zip(RUN_FILE_PARAMETERS, match.groups())}
+        run["time_to_first_feasible"] = get_time_to_first_feasible(solution["telemetry"])
+        run["time_to_gap"] = get_time_to_gap(solution["telemetry"], gap)
+        run["solution_time"] = solution["solution_time"]
+        runs.append(run)
+    return runs
+
+def summarize_runs(runs: list, group_by: Optional[list] = None) -> dict:
+    """Computes, per group of runs, the fraction of runs that found a feasible solution and reached the gap, and the PERCENTILES of both times over the runs that did.
+
+    Args:
+        runs: Runs as returned by get_run_times.
+        group_by: Keys of RUN_FILE_PARAMETERS defining the groups. Defaults to None (a single group).
+
+    Returns:
+        Dictionary mapping each group (tuple of the values of group_by) to a dictionary with the keys n_runs, feasible_fraction, gap_fraction, time_to_first_feasible_p{percentile} and time_to_gap_p{percentile} (nan if no run reached it).
+    """
+    group_by = group_by if group_by is not None else []
+    groups = {}
+    for run in runs:
+        groups.setdefault(tuple(run[key] for key in group_by), []).append(run)
+
+    summary = {}
+    for group, group_runs in sorted(groups.items()):
+        summary[group] = {"n_runs": len(group_runs)}
+        for metric, fraction in (("time_to_first_feasible", "feasible_fraction"), ("time_to_gap", "gap_fraction")):
+            times = np.array([run[metric] for run in group_runs])
+            times = times[~np.isnan(times)]
+            summary[group][fraction] = len(times) / len(group_runs)
+            for percentile in PERCENTILES:
+                summary[group][f"{metric}_p{percentile}"] = float(np.percentile(times, percentile)) if len(times) > 0 else np.nan
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarizes the time to the first feasible solution and to a MIP gap over the runs of an experiment.")
+    parser.add_argument("experiment_name", nargs="?", default=PARAMETERS["experiment_name"], help="Name of the experiment directory in FILES_DIR. Defaults to the experiment of PARAMETERS.")
+    parser.add_argument("--gap", type=float, default=0.01, help="Relative MIP gap. Defaults to 0.01.")
+    parser.add_argument("--group-by", nargs="*", default=["n_positions", "n_drones"], choices=RUN_FILE_PARAMETERS, help="Parameters defining the groups of runs.")
+    args = parser.parse_args()
+
+    runs = get_run_times(FILES_DIR + args.experiment_name, args.gap)
+    print(f"{len(runs)} runs with telemetry in {args.experiment_name}, gap {args.gap:.2%}")
+    for group, group_summary in summarize_runs(runs, args.group_by).items():
+        print(", ".join(f"{key} = {value:g}" for key, value in zip(args.group_by, group)) + f" ({group_summary['n_runs']} runs)")
+        for metric, fraction in (("time_to_first_feasible", "feasible_fraction"), ("time_to_gap", "gap_fraction")):
+            percentiles = " ".join(f"p{percentile}: {group_summary[f'{metric}_p{percentile}']:.1f}s" for percentile in PERCENTILES)
+            print(f"    {metric}: reached by {group_summary[fraction]:.0%} | {percentiles}")
@@ -0,0 +1,118 @@
+"""Binary store of the traces: one .npy array of shape (n_instances, n_targets, observation_period, 2) per combination of n_targets, observation_period and target_speed, next to a .json file with the rest of the trace description.
+    The arrays are opened memory-mapped, so loading one instance only reads its positions and processes solving instances of the same combination share the pages of the file instead of copying them.
+    Usage: python fanet/trace_store.py converts the text traces described by PARAMETERS (refer to generate_traces.py) to the store.
+"""
+from typing import Optional
+import functools
+import json
+import os
+import numpy as np
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.config import PARAMETERS, FILES_DIR
+
+def get_trace_file(parameters: dict, n_targets: int, target_speed: float, instance: int) -> str:
+    """Returns the path + name of the text trace file of a run, as written by generate_traces.py."""
+    return FILES_DIR+f"traces/trace_nt_{n_targets}_t_{parameters['observation_period']}_v_{target_speed}_i_{instance}.txt"
+
+def get_trace_store_file(parameters: dict, n_targets: int, target_speed: float) -> str:
+    """Returns the path + name of the .npy file holding every instance of a combination of parameters."""
+    return FILES_DIR+f"traces/traces_nt_{n_targets}_t_{parameters['observation_period']}_v_{target_speed}.npy"
+
+def save_trace_store(file_name: str, positions: np.ndarray, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1) -> None:
+    """Saves the positions of all instances of a combination of parameters. Both files are written to temporary files and renamed, so a store on disk is always complete.
+
+    Args:
+        file_name: path + name of the .npy file. The description is saved to the same name with the extension .json.
+        positions: Array of shape (n_instances, n_targets, observation_period, 2).
+        target_speed: Targets speed in m/s.
+        area_size: Lenght of the square area A.
+        time_step_delta: Amount of seconds between time steps. Defaults to 1.
+    """
+    with open(file_name + ".tmp", "wb") as file:
+        np.save(file, np.ascontiguousarray(positions, dtype=np.float64))
+    save_trace_store_description(file_name, get_trace_store_description(positions.shape, target_speed, area_size, time_step_delta))
+    os.replace(file_name + ".tmp", file_name)
+
+def get_trace_store_description(shape: tuple, target_speed: float, area_size: float, time_step_delta: Optional[float] = 1) -> dict:
+    """Returns the description of a store whose array has the given shape (n_instances, n_targets, observation_period, 2)."""
+    n_instances, n_targets, observation_period = shape[:3]
+    return {"n_instances": int(n_instances),
+            "n_targets": int(n_targets),
+            "observation_period": int(observation_period),
+            "target_speed": target_speed,
+            "area_size": area_size,
+            "time_step_delta": time_step_delta}
+
+def save_trace_store_description(file_name: str, description: dict) -> None:
+    """Saves the description of a store to a temporary file and renames it.
+
+    Args:
+        file_name: path + name of the .npy file. The description is saved to the same name with the extension .json.
+        description: Dictionary with at least the keys of get_trace_store_description.
+    """
+    with open(file_name[:-4] + ".json.tmp", "w") as file:
+        json.dump(description, file, indent=1)
+    os.replace(file_name[:-4] + ".json.tmp", file_name[:-4] + ".json")
+
+@functools.lru_cache(maxsize=None)
+def open_trace_store(file_name: str) -> tuple:
+    """Opens a store memory-mapped. The store is opened once per process.
+
+    Args:
+        file_name: path + name of the .npy file.
+
+    Returns:
+        Tuple (positions, description): read-only memory-mapped array of shape (n_instances, n_targets, observation_period, 2) and dictionary saved by save_trace_store.
+    """
+    with open(file_name[:-4] + ".json", "r") as file:
+        description = json.load(file)
+    return np.load(file_name, mmap_mode="r"), description
+
+def load_run_trace(parameters: dict, n_targets: int, target_speed: float, instance: int) -> TargetsTrace:
+    """Loads the trace of a run from the store if its combination of parameters was converted, and from its text file otherwise."""
+    file_name = get_trace_store_file(parameters, n_targets, target_speed)
+    if os.path.isfile(file_name) and instance < open_trace_store(file_name)[0].shape[0]:
+        return load_trace(file_name, instance)
+    return TargetsTrace(load_file=get_trace_file(parameters, n_targets, target_speed, instance))
+
+def load_trace(file_name: str, instance: int) -> TargetsTrace:
+    """Loads one instance of a store.
+
+    Args:
+        file_name: path + name of the .npy file.
+        instance: Number of the instance.
+    """
+    positions, description = open_trace_store(file_name)
+    return TargetsTrace.from_positions(positions[instance], description["target_speed"], description["area_size"], description["time_step_delta"])
+
+def convert_text_traces(trace_files: list, file_name: str) -> None:
+    """Saves text traces (refer to TargetsTrace.save_trace) of the same combination of parameters to a store, instance i being trace_files[i].
+
+    Args:
+        trace_files: List of path + name of the text traces.
+        file_name: path + name of the .npy file.
+    """
+    traces = [TargetsTrace(load_file=trace_file) for trace_file in trace_files]
+    for trace in traces[1:]:
+        assert (trace.n_targets, trace.observation_period, trace.target_speed, trace.area_size, trace.time_step_delta) == (traces[0].n_targets, traces[0].observation_period, traces[0].target_speed, traces[0].area_size, traces[0].time_step_delta), f"{trace_files} do not describe the same combination of parameters"
+    positions = np.stack([trace.get_positions() for trace in traces])
+    save_trace_store(file_name, positions, traces[0].target_speed, traces[0].area_size, traces[0].time_step_delta)
+
+def convert_experiment_traces(parameters: dict) -> None:
+    """Converts the text traces of every combination of parameters described by the parameters dictionary. Combinations already in the store or with missing text traces are skipped."""
+    for n_targets in parameters["n_targets"]:
+        for target_speed in parameters["targets_speed"]:
+            file_name = get_trace_store_file(parameters, n_targets, target_speed)
+            if os.path.isfile(file_name):
+                print("Trace store already exists: " + file_name)
+                continue
+            trace_files = [get_trace_file(parameters, n_targets, target_speed, instance) for instance in range(parameters["n_instances"])]
+            missing = [trace_file for trace_file in trace_files if not os.path.isfile(trace_file)]
+            if missing:
+                print(f"Skipping {file_name}: {len(missing)} text traces are missing")
+                continue
+            convert_text_traces(trace_files, file_name)
+            print("Trace store created: " + file_name)
+
+if __name__ == "__main__":
+    convert_experiment_traces(PARAMETERS)
@@ -0,0 +1,94 @@
+"""This script runs the CPLEX tuning tool over a sample of the traces described by PARAMETERS and saves the best parameters found as a profile in TUNING_DIR.
+    The profile can then be selected by setting "cplex_profile" to its name in PARAMETERS.
+    Usage: python fanet/tune_cplex.py [--profile NAME] [--n-samples N] [--tuning-time-limit SECONDS] [--seed SEED]
+"""
+import argparse
+import os
+import random
+import tempfile
+from fanet.milp_model import MilpModel
+from fanet.solve_milp import get_graph, get_sweep_jobs
+from fanet.trace_store import load_run_trace
+from fanet.setup.config import PARAMETERS, TUNING_DIR
+
+def get_sample_runs(parameters: dict, n_samples: int, seed: int) -> list:
+    """Draws a sample of runs from the parameter sweep.
+
+    Args:
+        parameters: Parameters dictionary. Refer to parameters.py.
+        n_samples: Number of runs in the sample. If the sweep has fewer runs, all of them are returned.
+        seed: Seed of the random sample.
+
+    Returns:
+        List of runs as returned by solve_milp.get_sweep_jobs.
+    """
+    runs = get_sweep_jobs(parameters)
+    return random.Random(seed).sample(runs, min(n_samples, len(runs)))
+
+def write_sample_models(runs: list, parameters: dict, directory: str) -> list:
+    """Builds the MILP model of each run and writes it to a .sav file.
+
+    Args:
+        runs: List of runs as returned by solve_milp.get_sweep_jobs.
+        parameters: Parameters dictionary. Refer to parameters.py.
+        directory: Directory where the models are written.
+
+    Returns:
+        List of the model files.
+    """
+    model_files = []
+    for run in runs:
+        n_positions, n_targets, target_speed, n_drones, alpha, instance = run["n_positions"], run["n_targets"], run["target_speed"], run["n_drones"], run["alpha"], run["instance"]
+        graph = get_graph(parameters, n_positions)
+        trace = load_run_trace(parameters, n_targets, target_speed, instance)
+        model = MilpModel(n_available_drones=n_drones,
+                            observation_period=parameters["observation_period"],
+                            time_step_delta=parameters["time_step_delta"],
+                            targets_trace=trace,
+                            input_graph=graph,
+                            alpha=alpha,
+                            beta = parameters["beta"],
+                            movement_formulation=parameters.get("movement_formulation", "mccormick"))
+        model.build_model(parameters.get("model_build_chunk_size"))
+        model_file = os.path.join(directory, f"model_p_{n_positions}_d_{n_drones}_nt_{n_targets}_v_{target_speed}_alpha_{alpha}_i_{instance}.sav")
+        model.cplex_model.write(model_file)
+        model.cplex_finish()
+        model_files.append(model_file)
+    return model_files
+
+def tune_profile(model_files: list, profile: str, tuning_time_limit: float, parameters: dict) -> int:
+    """Runs the CPLEX tuning tool over the given models and saves the best parameters found to TUNING_DIR + profile + ".prm".
+    The time and memory limits of each optimization are fixed to cplex_time_limit and cplex_workmem_limit so the tuned profile is valid for the experiments.
+
+    Args:
+        model_files: List of model files. Refer to write_sample_models.
+        profile: Name of the profile.
+        tuning_time_limit: Time limit in seconds for the whole tuning.
+        parameters: Parameters dictionary. Refer to parameters.py.
+
+    Returns:
+        Status of the tuning returned by cplex.
+    """
+    import cplex
+    tuner = cplex.Cplex()
+    tuner.parameters.tune.timelimit.set(tuning_time_limit)
+    fixed_parameters = [(tuner.parameters.timelimit, parameters["cplex_time_limit"]), (tuner.parameters.workmem, parameters["cplex_workmem_limit"])]
+    status = tuner.parameters.tune_problem_set(model_files, fixed_parameters_and_values=fixed_parameters)
+    os.makedirs(TUNING_DIR, exist_ok=True)
+    tuner.parameters.write_file(TUNING_DIR + profile + ".prm")
+    tuner.end()
+    return status
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tunes cplex over a sample of the traces described by PARAMETERS.")
+    parser.add_argument("--profile", default="tuned", help="Name of the tuned profile.")
+    parser.add_argument("--n-samples", type=int, default=5, help="Number of runs sampled from the sweep.")
+    parser.add_argument("--tuning-time-limit", type=float, default=3600, help="Time limit in seconds for the whole tuning.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the sample.")
+    args = parser.parse_args()
+
+    runs = get_sample_runs(PARAMETERS, args.n_samples, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        model_files = write_sample_models(runs, PARAMETERS, directory)
+        status = tune_profile(model_files, args.profile, args.tuning_time_limit, PARAMETERS)
+    print(f"Tuning finished with status {status}. Set \"cplex_profile\": \"{args.profile}\" in PARAMETERS to use it.")
@@ -0,0 +1,42 @@
+from fanet.column_generation import ColumnGeneration, price_trajectories
+from fanet.milp_model import MilpModel
+from fanet.graph import Graph
+from fanet.targets_trace import TargetsTrace
+import itertools
+import numpy as np
+
+def test_price_trajectories() -> None:
+    """The trajectory found for each final position is the cheapest one, compared with every trajectory of 3 time steps over 3 positions and the base station."""
+    rng = np.random.default_rng(0)
+    cost_matrix = rng.uniform(0, 10, (4, 4))
+    prices = rng.uniform(0, 10, (3, 4))
+    prices[:, -1] = 0
+    trajectories, values = price_trajectories(cost_matrix, prices)
+    for last in range(4):
+        best = min((cost_matrix[3, path[0]] + cost_matrix[path[0], path[1]] + cost_matrix[path[1], path[2]] + cost_matrix[path[2], 3] - prices[[0, 1, 2], path].sum(), path)
+                   for path in itertools.product(range(4), range(4), [last]))
+        assert np.isclose(values[last], best[0])
+        assert tuple(trajectories[last]) == best[1]
+
+def test_column_generation_bounds() -> None:
+    """The lower bound is below the optimal value of the MILP and the deployment of the generated trajectories covers the targets, with its cost as upper bound."""
+    graph = Graph(100, [10], (0, 0, 0), 2, 100, np.tan(np.pi/6))
+    trace = TargetsTrace(3, 4, 10, 100, 1, seed=0, graph=graph)
+    milp_model = MilpModel(3, 4, 1, trace, graph, 0.5, 0.08095)
+    milp_model.model_shut_up()
+    milp_model.build_model()
+    milp_model.solve_model()
+    optimum = milp_model.get_objective_value()
+    milp_model.cplex_finish()
+
+    column_generation = ColumnGeneration(3, 4, 1, trace, graph, 0.5, 0.08095)
+    result = column_generation.solve()
+    assert result["converged"]
+    assert result["lower_bound"] <= optimum + 1e-6 <= result["upper_bound"] + 2e-6
+    positions = graph.get_positions_array()
+    for t in range(4):
+        covered = np.linalg.norm(trace.get_positions()[:, t, None] - positions[None, result["deployment"][t], :2], axis=2) <= graph.coverage_tan_angle * positions[None, result["deployment"][t], 2]
+        assert covered.any(axis=1).all()
+    solution = column_generation.get_solution(result)
+    assert round(solution.get_path_cost(column_generation.master.get_cost_matrix()), 5) == round(result["upper_bound"], 5)
+    column_generation.finish()
@@ -1,5 +1,7 @@
 from fanet.setup.config import *
 from fanet.setup.cplex_constants import *
+from fanet.setup.cplex_profiles import CPLEX_PROFILES
+from fanet.milp_model import MOVEMENT_FORMULATIONS
 
 def test_config() -> None:
     """Tests if the config file is correct."""
@@ -55,3 +57,22 @@ def test_config_parameters() -> None:
     assert isinstance(PARAMETERS["comm_range"], float) or isinstance(PARAMETERS["comm_range"], int)
     assert isinstance(PARAMETERS["coverage_angle"], float) or isinstance(PARAMETERS["coverage_angle"], int)
     assert isinstance(PARAMETERS["n_instances"], int)
+    assert PARAMETERS.get("traces_seed") is None or isinstance(PARAMETERS["traces_seed"], int)
+    assert isinstance(PARAMETERS["experiment_name"], str)
+
+def test_config_cplex_parameters() -> None:
+    """Tests if the cplex performance parameters and the profile in PARAMETERS are valid."""
+    for key in ["cplex_threads", "cplex_parallel_mode", "cplex_mip_emphasis", "cplex_node_file", "cplex_heuristic_frequency"]:
+        assert PARAMETERS.get(key) is None or isinstance(PARAMETERS[key], int)
+    assert PARAMETERS.get("cplex_memory_emphasis") is None or isinstance(PARAMETERS["cplex_memory_emphasis"], bool)
+    assert PARAMETERS.get("memory_budget") is None or isinstance(PARAMETERS["memory_budget"], int)
+    assert PARAMETERS.get("model_build_chunk_size") is None or (isinstance(PARAMETERS["model_build_chunk_size"], int) and PARAMETERS["model_build_chunk_size"] > 0)
+    assert PARAMETERS.get("cplex_telemetry_interval") is None or PARAMETERS["cplex_telemetry_interval"] > 0
+    assert isinstance(PARAMETERS.get("lp_relaxation", False), bool)
+    assert PARAMETERS.get("lp_fixing_time_limit") is None or PARAMETERS["lp_fixing_time_limit"] > 0
+    assert PARAMETERS.get("movement_formulation", "mccormick") in MOVEMENT_FORMULATIONS
+    profile = PARAMETERS.get("cplex_profile", "default")
+    assert profile in CPLEX_PROFILES or os.path.isfile(TUNING_DIR + profile + ".prm")
+    for profile_parameters in CPLEX_PROFILES.values():
+        for key in profile_parameters:
+            assert key in DEFAULT_PARAMETERS
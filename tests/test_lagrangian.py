@@ -0,0 +1,33 @@
+from fanet.lagrangian import LagrangianRelaxation, match_drones
+from fanet.milp_model import MilpModel
+from fanet.graph import Graph
+from fanet.targets_trace import TargetsTrace
+import numpy as np
+
+def test_match_drones() -> None:
+    """Two drones at positions 0 and 1 must cover positions 1 and 2: the drone at 1 stays and the other one moves from 0 to 2."""
+    cost_matrix = np.array([[0, 1, 2], [1, 0, 1], [2, 1, 0]])
+    assert match_drones(np.array([0, 1]), np.array([1, 2]), cost_matrix).tolist() == [2, 1]
+    assert match_drones(np.array([1, 0]), np.array([1, 2]), cost_matrix).tolist() == [1, 2]
+
+def test_lagrangian_bounds() -> None:
+    """The lower bound is below the optimal value of the MILP and the repaired deployment is feasible, with its cost as upper bound."""
+    graph = Graph(100, [10], (0, 0, 0), 2, 100, np.tan(np.pi/6))
+    trace = TargetsTrace(3, 4, 10, 100, 1, seed=0, graph=graph)
+    milp_model = MilpModel(3, 4, 1, trace, graph, 0.5, 0.08095)
+    milp_model.model_shut_up()
+    milp_model.build_model()
+    milp_model.solve_model()
+    optimum = milp_model.get_objective_value()
+    milp_model.cplex_finish()
+
+    relaxation = LagrangianRelaxation(3, 4, 1, trace, graph, 0.5, 0.08095, n_workers=2)
+    result = relaxation.solve(max_iterations=50)
+    relaxation.finish()
+    assert result["lower_bound"] <= optimum + 1e-6 <= result["upper_bound"] + 2e-6
+    assert (np.diff(result["history"][:, 2]) >= 0).all()
+    positions = graph.get_positions_array()
+    for t in range(4):
+        covered = np.linalg.norm(trace.get_positions()[:, t, None] - positions[None, result["deployment"][t], :2], axis=2) <= graph.coverage_tan_angle * positions[None, result["deployment"][t], 2]
+        assert covered.any(axis=1).all()
+    assert round(relaxation.get_deployment_cost(result["deployment"]), 5) == round(result["upper_bound"], 5)
@@ -385,3 +385,115 @@ def test_parameters_methods():
     milp_model.cplex_model.parameters.workmem.reset()
     assert milp_model.cplex_model.parameters.timelimit.get() == default_time_milit
     assert milp_model.cplex_model.parameters.workmem.get() == default_memory_milit
+
+def test_bulk_solution_extraction():
+    """Verifies the deployment read in bulk by get_solution agrees with reading each variable z_t_drone_p by name.
+    """
+    targets_traces, graph, milp_model = example_movement_2()
+    milp_model.alpha = 0.5
+    milp_model.model_shut_up()
+    milp_model.build_model()
+    milp_model.solve_model()
+    assert milp_model.cplex_model.solution.get_status() == OPTIMAL_SOLUTION
+    deployement = milp_model.get_drones_deployement()
+    for t in range(milp_model.observation_period):
+        for drone in range(milp_model.n_available_drones):
+            position = deployement[t][drone]
+            assert milp_model.cplex_model.solution.get_values(milp_model.var_z_t_drone_p(t, drone, position)) >= 0.9
+    assert milp_model.get_solution() is milp_model.get_solution()
+    milp_model.cplex_finish()
+
+def test_performance_parameters_methods(tmp_path, monkeypatch):
+    """Tests if the cplex performance parameters and profiles are set properly. The node files of the profile low-memory go to a temporary directory.
+    """
+    monkeypatch.setattr("fanet.milp_model.CPLEX_WORK_DIR", str(tmp_path) + "/cplex_work/")
+    targets_traces, graph, milp_model = example_movement_2()
+    milp_model.set_profile("find-feasible-fast")
+    assert milp_model.cplex_model.parameters.emphasis.mip.get() == MIP_EMPHASIS_FEASIBILITY
+    assert milp_model.cplex_model.parameters.mip.strategy.heuristicfreq.get() == 10
+    assert milp_model.cplex_model.parameters.parallel.get() == PARALLEL_OPPORTUNISTIC
+
+    parameters = {"cplex_profile": "low-memory", "cplex_time_limit": 100, "cplex_workmem_limit": 100, "cplex_threads": 2, "cplex_mip_emphasis": None}
+    milp_model.set_parameters(parameters)
+    assert milp_model.cplex_model.parameters.mip.strategy.file.get() == NODE_FILE_DISK_COMPRESSED
+    assert milp_model.cplex_model.parameters.emphasis.memory.get() == 1
+    # Explicit parameters override the profile
+    assert milp_model.cplex_model.parameters.threads.get() == 2
+    assert milp_model.cplex_model.parameters.timelimit.get() == 100
+    assert milp_model.cplex_model.parameters.workmem.get() == 100
+    assert os.path.isdir(str(tmp_path) + "/cplex_work/")
+    milp_model.cplex_finish()
+
+def test_telemetry() -> None:
+    """Tests if the progress of cplex is recorded and ends with the optimal solution (gap 0)."""
+    targets_traces, graph, milp_model = example_sensor_coverage_0()
+    milp_model.model_shut_up()
+    milp_model.set_parameters({"cplex_telemetry_interval": 0.01})
+    milp_model.build_model()
+    milp_model.solve_model()
+    telemetry = milp_model.get_solution().telemetry
+    assert telemetry.shape[1] == 5
+    assert (np.diff(telemetry[:, 0]) >= 0).all()
+    assert round(telemetry[-1, 2], 5) == round(milp_model.get_objective_value(), 5)
+    assert telemetry[-1, 4] <= 1e-4
+    milp_model.cplex_finish()
+
+def test_build_in_chunks() -> None:
+    """Tests if building in chunks gives the same model and solution as building the whole model first, while keeping no variables or constraints in Python."""
+    targets_trace, graph, whole_model = example_sensor_coverage_0()
+    chunked_model = MilpModel(2, 2, 1, targets_trace, graph, 0, 0.08095)
+    for model, chunk_size in ((whole_model, None), (chunked_model, 7)):
+        model.model_shut_up()
+        model.build_model(chunk_size)
+        model.solve_model()
+    assert chunked_model.variables == [] and chunked_model.constraints == []
+    assert chunked_model.z_t_drone_p_index == whole_model.z_t_drone_p_index
+    assert chunked_model.cplex_model.variables.get_names() == whole_model.cplex_model.variables.get_names()
+    assert chunked_model.cplex_model.linear_constraints.get_names() == whole_model.cplex_model.linear_constraints.get_names()
+    assert chunked_model.get_model_size() == whole_model.get_model_size()
+    assert round(chunked_model.get_objective_value(), 5) == round(whole_model.get_objective_value(), 5)
+    assert (chunked_model.get_solution().deployment == whole_model.get_solution().deployment).all()
+    whole_model.cplex_finish()
+    chunked_model.cplex_finish()
+
+def test_quick_estimate() -> None:
+    """Tests if the LP bound is a lower bound of the optimum stored in the solution, and if fixing variables by reduced costs keeps the optimum."""
+    targets_trace, graph, reference_model = example_sensor_coverage_0()
+    reduced_model = MilpModel(2, 2, 1, targets_trace, graph, 0, 0.08095)
+    for model in (reference_model, reduced_model):
+        model.model_shut_up()
+        model.build_model()
+    estimate = reduced_model.quick_estimate(heuristic_time_limit=10)
+    reference_model.solve_model()
+    reduced_model.solve_model()
+    assert estimate["lp_bound"] <= reference_model.get_objective_value() + 1e-6
+    assert estimate["upper_bound"] >= reference_model.get_objective_value() - 1e-6
+    assert estimate["n_fixed"] >= 0
+    assert round(reduced_model.get_objective_value(), 5) == round(reference_model.get_objective_value(), 5)
+    assert reduced_model.get_solution().lp_bound == estimate["lp_bound"]
+    assert np.isnan(reference_model.get_solution().lp_bound)
+    reference_model.cplex_finish()
+    reduced_model.cplex_finish()
+
+def test_movement_formulations() -> None:
+    """The flow formulation of the drone movements needs 2 constraints per (t > 0, drone, p) and gives the same optimum as the McCormick one, with an LP relaxation at least as tight."""
+    results = {}
+    for movement_formulation in ("mccormick", "flow"):
+        targets_trace, graph, _ = example_movement_2()
+        model = MilpModel(2, 2, 1, targets_trace, graph, 0, 0.08095, movement_formulation=movement_formulation)
+        model.define_all_variables()
+        model.define_all_constraints()
+        n_movement_constraints = sum(constraint["name"].startswith("drone_mov") for constraint in model.constraints)
+        model.cplex_finish()
+        model = MilpModel(2, 2, 1, targets_trace, graph, 0, 0.08095, movement_formulation=movement_formulation)
+        model.model_shut_up()
+        model.build_model()
+        lp_bound = model.solve_lp_relaxation()["lp_bound"]
+        model.solve_model()
+        results[movement_formulation] = (n_movement_constraints, lp_bound, model.get_objective_value())
+        model.cplex_finish()
+    n_positions = len(graph.deployment_positions) + 1
+    assert results["mccormick"][0] == 3 * 2 * n_positions ** 2
+    assert results["flow"][0] == 2 * 2 * n_positions
+    assert results["flow"][1] >= results["mccormick"][1] - 1e-6
+    assert round(results["flow"][2], 5) == round(results["mccormick"][2], 5) == 294.96174
@@ -0,0 +1,53 @@
+from fanet.model_size import *
+from fanet.milp_model import MilpModel
+import numpy as np
+
+def example_model(n_positions: int, heights: list, n_targets: int, n_drones: int, observation_period: int, movement_formulation: str = "mccormick") -> tuple:
+    """Random instance of the problem.
+
+    Returns:
+        tuple: (graph, targets_trace, milp_model)
+    """
+    np.random.seed(0)
+    graph = Graph(100, heights, (0, 0, 0), n_positions, 60, np.pi/6)
+    targets_trace = TargetsTrace(n_targets, observation_period, 10, 100)
+    milp_model = MilpModel(n_available_drones=n_drones,
+                           observation_period=observation_period,
+                           time_step_delta=1,
+                           targets_trace=targets_trace,
+                           input_graph=graph,
+                           alpha=0.5,
+                           beta=0.08095,
+                           movement_formulation=movement_formulation)
+    return graph, targets_trace, milp_model
+
+def test_estimate_model_size() -> None:
+    """The predicted numbers of variables, constraints and nonzeros are the ones of the built model, for both formulations of the drone movements."""
+    for n_positions, heights, n_targets, n_drones, observation_period, movement_formulation in [(2, [45], 5, 2, 1, "mccormick"), (3, [30, 45], 10, 3, 4, "mccormick"), (4, [45], 20, 5, 3, "mccormick"), (3, [30, 45], 10, 3, 4, "flow")]:
+        graph, targets_trace, milp_model = example_model(n_positions, heights, n_targets, n_drones, observation_period, movement_formulation)
+        estimate = estimate_model_size(graph, targets_trace, n_drones, observation_period, movement_formulation=movement_formulation)
+        milp_model.model_shut_up()
+        milp_model.build_model()
+        model_size = milp_model.get_model_size()
+        milp_model.cplex_finish()
+        for key in ["n_variables", "n_constraints", "n_nonzeros"]:
+            assert estimate[key] == model_size[key]
+        assert 0 < estimate["cplex_memory_mb"] < estimate["total_memory_mb"]
+
+def test_estimate_chunked_memory() -> None:
+    """Building in chunks bounds the predicted Python memory by the size of a chunk, and leaves the size of the model unchanged."""
+    graph, targets_trace, milp_model = example_model(4, [45], 20, 5, 3)
+    milp_model.cplex_finish()
+    whole = estimate_model_size(graph, targets_trace, 5, 3)
+    chunked = estimate_model_size(graph, targets_trace, 5, 3, chunk_size=100)
+    assert chunked["n_nonzeros"] == whole["n_nonzeros"]
+    assert chunked["cplex_memory_mb"] == whole["cplex_memory_mb"]
+    assert chunked["python_memory_mb"] < whole["python_memory_mb"] / 10
+    assert estimate_model_size(graph, targets_trace, 5, 3, chunk_size=10**9)["python_memory_mb"] <= whole["python_memory_mb"]
+
+def test_memory_budget() -> None:
+    """Runs are skipped only when a budget is set and the predicted memory plus the cplex working memory exceeds it."""
+    estimate = {"total_memory_mb": 1000}
+    assert not exceeds_memory_budget(estimate, {"memory_budget": None, "cplex_workmem_limit": 10000})
+    assert not exceeds_memory_budget(estimate, {"memory_budget": 12000, "cplex_workmem_limit": 10000})
+    assert exceeds_memory_budget(estimate, {"memory_budget": 10500, "cplex_workmem_limit": 10000})
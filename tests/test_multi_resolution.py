@@ -0,0 +1,29 @@
+from fanet.multi_resolution import MultiResolutionSolver, refine_positions
+from fanet.milp_model import MilpModel
+from fanet.graph import Graph
+from fanet.targets_trace import TargetsTrace
+import numpy as np
+
+def test_refine_positions() -> None:
+    """On a 4x4 grid of spacing 20, the neighbourhood of radius 15 of (50,50,10) holds the 4 closest positions, followed by (50,50,10) itself which is not on the grid."""
+    graph = Graph(100, [10], (0, 0, 0), 4, 100, np.pi/6)
+    refined = refine_positions([(50, 50, 10)], graph, 15)
+    assert len(refined) == 5
+    assert refined[-1] == (50, 50, 10)
+    assert all(np.hypot(x - 50, y - 50) <= 15 for x, y, _ in refined)
+    # (50,50,10) is on the 7x7 grid of spacing 12.5, up to rounding
+    refined = refine_positions([(50.0, 50.0, 10)], Graph(100, [10], (0, 0, 0), 7, 100, np.pi/6), 1)
+    assert len(refined) == 1 and np.allclose(refined[0], (50, 50, 10))
+    assert refine_positions([], graph, 15) == []
+
+def test_multi_resolution() -> None:
+    """The solution on the refined 4x4 grid is feasible and costs at most as much as the solution of the 2x2 grid, and uses fewer positions than the full 4x4 grid."""
+    graph = Graph(100, [10], (0, 0, 0), 4, 100, np.tan(np.pi/6))
+    trace = TargetsTrace(2, 3, 10, 100, 1, seed=0, graph=Graph(100, [10], (0, 0, 0), 2, 100, np.tan(np.pi/6)))
+    solver = MultiResolutionSolver(2, 3, 1, trace, graph, 0.5, 0.08095, [2], neighbourhood=0.5)
+    result = solver.solve()
+    coarse, fine = result["history"]
+    assert coarse["n_positions_per_axis"] == 2 and fine["n_positions_per_axis"] == 4
+    assert fine["n_positions"] < len(graph.deployment_positions)
+    assert result["solution"].is_feasible()
+    assert fine["objective_value"] <= coarse["objective_value"] + 1e-6
@@ -0,0 +1,64 @@
+from fanet.online_planner import OnlineMilpModel, OnlinePlanner, run_online
+from fanet.graph import Graph
+from fanet.targets_trace import TargetsTrace
+import numpy as np
+
+def example_graph() -> Graph:
+    """Four deployment positions (33,33,10), (33,67,10), (67,33,10) and (67,67,10), all in communication range of each other and of the base station (0,0,0)."""
+    return Graph(100, [10], (0, 0, 0), 2, 100, np.tan(np.pi/6))
+
+def test_deployment_values() -> None:
+    """The MIP start values follow the order of the block z_t_drone_p: the base station first for each (t, drone)."""
+    graph = example_graph()
+    model = OnlineMilpModel(2, 2, 1, graph, 0, 0.08095, 2)
+    model.build_model()
+    deployment = np.array([[4, 4], [0, 3], [1, 4]])
+    values = np.array(model.get_deployment_values(deployment)).reshape(3, 2, 5)
+    assert (np.argmax(np.roll(values, -1, axis=2), axis=2) == deployment).all()
+    assert values.sum() == 6
+    model.cplex_finish()
+
+def test_online_model_random_state() -> None:
+    """Building the model without targets leaves the global numpy random state unchanged."""
+    np.random.seed(0)
+    expected = np.random.rand()
+    np.random.seed(0)
+    model = OnlineMilpModel(2, 2, 1, example_graph(), 0, 0.08095, 2)
+    assert model.targets_trace.n_targets == 0 and np.random.rand() == expected
+    model.cplex_finish()
+
+def test_online_planner_follows_target() -> None:
+    """One drone and one target moving from under (33,33,10) to under (67,67,10). The drone must follow it, and the target variables of the previous step must be replaced."""
+    graph = example_graph()
+    planner = OnlinePlanner(graph, 1, 1, 0, 0.08095, max_targets=1, horizon=1, latency_budget=10)
+    assert planner.step(np.array([[33, 33]])).tolist() == [0]
+    n_variables = planner.model.cplex_model.variables.get_num()
+    assert planner.step(np.array([[67, 67]])).tolist() == [3]
+    assert planner.model.cplex_model.variables.get_num() == n_variables
+    summary = planner.get_latency_summary()
+    assert summary["n_steps"] == 2
+    assert summary["n_infeasible"] == 0
+    planner.finish()
+
+def test_online_planner_prediction() -> None:
+    """Two drones and two targets with a horizon of two time steps. The targets are still at (33,33) and (67,67), but are predicted to both move to (67,33). The plan must anticipate the movement and still cover the current positions."""
+    graph = example_graph()
+    planner = OnlinePlanner(graph, 2, 1, 0, 0.08095, max_targets=2, horizon=2, latency_budget=10)
+    deployment = planner.step(np.array([[33, 33], [67, 67]]), np.array([[[67, 33], [67, 33]]]))
+    assert sorted(deployment.tolist()) == [0, 3]
+    assert (planner.plan[2] == 2).any()
+    planner.finish()
+
+def test_run_online() -> None:
+    """Every deployment of a feasible trace replayed through the planner covers all targets."""
+    graph = example_graph()
+    trace = TargetsTrace(3, 5, 5, 100, 1, seed=0, graph=graph)
+    planner = OnlinePlanner(graph, 3, 1, 0.5, 0.08095, max_targets=3, horizon=2, latency_budget=10)
+    deployments = run_online(planner, trace)
+    assert deployments.shape == (5, 3)
+    positions = graph.get_positions_array()[:, :2]
+    radius = graph.coverage_tan_angle * 10
+    for t in range(5):
+        covered = np.linalg.norm(trace.get_positions()[:, t, None] - positions[None, deployments[t]], axis=2) <= radius
+        assert covered.any(axis=1).all()
+    planner.finish()
@@ -0,0 +1,23 @@
+from fanet.parallel_runner import get_worker_parameters
+from fanet.solve_milp import get_sweep_jobs
+from fanet.setup.parameters import EXPERIMENT_PARAMETERS
+
+def test_sweep_jobs() -> None:
+    """Verifies the sweep has one job per parameter combination and instance."""
+    jobs = get_sweep_jobs(EXPERIMENT_PARAMETERS)
+    n_combinations = len(EXPERIMENT_PARAMETERS["n_positions"]) * len(EXPERIMENT_PARAMETERS["n_targets"]) * len(EXPERIMENT_PARAMETERS["targets_speed"]) * len(EXPERIMENT_PARAMETERS["n_drones"]) * len(EXPERIMENT_PARAMETERS["alpha"])
+    assert len(jobs) == n_combinations * EXPERIMENT_PARAMETERS["n_instances"]
+    assert len(set(tuple(sorted(job.items())) for job in jobs)) == len(jobs)
+
+def test_worker_parameters() -> None:
+    """Verifies the cores and the cplex working memory are split between workers."""
+    worker_parameters = get_worker_parameters(EXPERIMENT_PARAMETERS, n_workers=8, total_cores=64, total_memory=40000)
+    assert worker_parameters["cplex_threads"] == 8
+    assert worker_parameters["cplex_workmem_limit"] == 5000
+    assert EXPERIMENT_PARAMETERS["cplex_threads"] is None
+    # The working memory of a worker never exceeds cplex_workmem_limit
+    worker_parameters = get_worker_parameters(EXPERIMENT_PARAMETERS, n_workers=2, total_cores=1, total_memory=10**6)
+    assert worker_parameters["cplex_threads"] == 1
+    assert worker_parameters["cplex_workmem_limit"] == EXPERIMENT_PARAMETERS["cplex_workmem_limit"]
+    worker_parameters = get_worker_parameters(EXPERIMENT_PARAMETERS, n_workers=2, total_cores=4)
+    assert worker_parameters["cplex_workmem_limit"] == EXPERIMENT_PARAMETERS["cplex_workmem_limit"]
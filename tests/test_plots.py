@@ -0,0 +1,28 @@
+import os
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from fanet.basic_plots import *
+this_dirctory = os.path.dirname(__file__)
+
+def test_get_comm_links() -> None:
+    """Tests if the links drawn are the ones of Graph.get_positions_in_comm_range, each pair once."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 30, np.pi/6)
+    links = {tuple(sorted(map(tuple, link.tolist()))) for link in get_comm_links(graph)}
+    expected = {tuple(sorted([tuple(position[:2]), tuple(neighbor[:2])])) for position in graph.deployment_positions + [graph.base_station] for neighbor in graph.get_positions_in_comm_range(position)}
+    assert len(get_comm_links(graph)) == len(links)
+    assert links == {tuple(tuple(map(float, point)) for point in link) for link in expected}
+
+def test_plots() -> None:
+    """Plots a trace and a deployment per time step, in this process and in 2 workers, and verifies the files are created and no figure is left open."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    trace = TargetsTrace(10, 3, 10, 100, seed=0, graph=graph)
+    deployment = np.array([[0, 9], [4, 9], [4, 8]])
+    plot_trace_with_coverage(trace, graph, this_dirctory + "/out/test_plot.png")
+    plot_trace_per_time_step(trace, graph, this_dirctory + "/out/test_plot.png")
+    plot_deployment(deployment, trace, graph, this_dirctory + "/out/test_deployment_plot.png", n_workers=2)
+    assert plt.get_fignums() == []
+    for file_name in ["test_plot.png"] + [f"test_plot_{t}.png" for t in range(3)] + [f"test_deployment_plot_{t}.png" for t in range(3)]:
+        assert os.path.isfile(this_dirctory + "/out/" + file_name)
+        os.remove(this_dirctory + "/out/" + file_name)
@@ -0,0 +1,89 @@
+import os
+import shutil
+import numpy as np
+from fanet.result_cache import ResultCache, get_run_key, CPLEX_RESOURCE_PARAMETERS
+from fanet.parallel_runner import get_worker_parameters
+from fanet.solution import load_solution
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.parameters import TEST_PARAMETERS
+this_dirctory = os.path.dirname(__file__)
+
+def test_run_key() -> None:
+    """The key ignores the experiment name and the parameters that do not change the result, and changes with the trace and every parameter of the model."""
+    trace = TargetsTrace(3, 5, 10, 100, 1, seed=0)
+    key = get_run_key(TEST_PARAMETERS, 3, 5, 1, trace)
+    assert get_run_key(dict(TEST_PARAMETERS, experiment_name="other", n_instances=TEST_PARAMETERS["n_instances"] + 1, base_station=[0, 0, 0], comm_range=60.0), 3, 5, 1.0, trace) == key
+    assert get_run_key(dict(TEST_PARAMETERS, comm_range=50), 3, 5, 1, trace) != key
+    assert get_run_key(dict(TEST_PARAMETERS, cplex_time_limit=20), 3, 5, 1, trace) != key
+    assert get_run_key(dict(TEST_PARAMETERS, lp_relaxation=not TEST_PARAMETERS["lp_relaxation"]), 3, 5, 1, trace) != key
+    assert get_run_key(dict(TEST_PARAMETERS, movement_formulation="flow" if TEST_PARAMETERS["movement_formulation"] != "flow" else "mccormick"), 3, 5, 1, trace) != key
+    assert get_run_key(TEST_PARAMETERS, 4, 5, 1, trace) != key
+    # Every cplex setting but the resource ones is in the key, a setting that is None as if it was missing
+    for cplex_parameter in [key for key in TEST_PARAMETERS if key.startswith("cplex_")]:
+        assert (get_run_key(dict(TEST_PARAMETERS, **{cplex_parameter: "changed"}), 3, 5, 1, trace) == key) == (cplex_parameter in CPLEX_RESOURCE_PARAMETERS)
+    assert get_run_key(dict(TEST_PARAMETERS, cplex_new_setting=None), 3, 5, 1, trace) == key
+    positions = trace.get_positions()
+    positions[0, 0, 0] += 1e-9
+    assert get_run_key(TEST_PARAMETERS, 3, 5, 1, TargetsTrace.from_positions(positions, 10, 100)) != key
+
+def test_worker_parameters_key() -> None:
+    """A run has the same key whatever the number of workers sharing the cores and the memory, and when solved without workers."""
+    trace = TargetsTrace(3, 5, 10, 100, 1, seed=0)
+    key = get_run_key(TEST_PARAMETERS, 3, 5, 1, trace)
+    assert get_run_key(get_worker_parameters(TEST_PARAMETERS, 2, 16, 8000), 3, 5, 1, trace) == key
+    assert get_run_key(get_worker_parameters(TEST_PARAMETERS, 8, 16, 8000), 3, 5, 1, trace) == key
+
+def test_link_solution() -> None:
+    """A run stored by one experiment is linked into another one. Its files are only reused for the same key."""
+    out_dir = this_dirctory + "/out/test_result_cache"
+    cache = ResultCache(out_dir + "/cache")
+    os.makedirs(out_dir + "/first", exist_ok=True)
+    os.makedirs(out_dir + "/second", exist_ok=True)
+    first_file, second_file = out_dir + "/first/milp_solution.txt", out_dir + "/second/milp_solution.txt"
+    np.savez(first_file[:-4] + ".npz", objective_value=np.asarray(12.5))
+    with open(first_file, "w") as file:
+        file.write("solution")
+    cache.store("a" * 64, first_file)
+    assert cache.contains("a" * 64) and not cache.contains("b" * 64)
+    assert cache.is_linked("a" * 64, first_file)
+
+    cache.link("a" * 64, second_file)
+    assert cache.is_linked("a" * 64, second_file)
+    assert not cache.is_linked("b" * 64, second_file)
+    assert os.path.samefile(first_file[:-4] + ".npz", second_file[:-4] + ".npz")
+    assert not os.path.isfile(second_file[:-4] + "_telemetry.csv")
+
+    # Unlinking a run of an experiment leaves the cache unchanged
+    cache.unlink(second_file)
+    assert not os.path.isfile(second_file) and not cache.is_linked("a" * 64, second_file)
+    assert cache.contains("a" * 64)
+    shutil.rmtree(out_dir)
+
+def test_legacy_solution() -> None:
+    """A solution solved before the result cache is adopted by storing it, then linked into another experiment with the same key. A legacy run without its .npz file is neither adopted nor served from the cache."""
+    out_dir = this_dirctory + "/out/test_result_cache_legacy"
+    cache = ResultCache(out_dir + "/cache")
+    os.makedirs(out_dir + "/first", exist_ok=True)
+    os.makedirs(out_dir + "/second", exist_ok=True)
+    first_file, second_file = out_dir + "/first/milp_solution.txt", out_dir + "/second/milp_solution.txt"
+    with open(first_file, "w") as file:
+        file.write("solution")
+    assert not cache.is_legacy(first_file)
+    cache.store("c" * 64, first_file)
+    assert not cache.contains("c" * 64)
+    cache.unlink(first_file)
+
+    np.savez(first_file[:-4] + ".npz", objective_value=np.asarray(12.5))
+    with open(first_file, "w") as file:
+        file.write("solution")
+    assert cache.is_legacy(first_file) and cache.get_key(first_file) is None
+    assert not cache.is_linked("a" * 64, first_file)
+    cache.store("a" * 64, first_file)
+    assert not cache.is_legacy(first_file) and cache.is_linked("a" * 64, first_file)
+
+    assert cache.contains("a" * 64)
+    cache.link("a" * 64, second_file)
+    assert cache.is_linked("a" * 64, second_file)
+    assert load_solution(second_file[:-4] + ".npz")["objective_value"] == 12.5
+    assert not cache.is_legacy(out_dir + "/missing.txt")
+    shutil.rmtree(out_dir)
@@ -0,0 +1,115 @@
+import os
+import shutil
+import numpy as np
+import pytest
+from fanet.results_catalog import ResultsCatalog, PARAMETER_COLUMNS, get_run_parameters
+from fanet.setup.parameters import DEFAULT_PARAMETERS, TEST_PARAMETERS, EXPERIMENT_PARAMETERS, TEST_TIME_LIMIT
+from fanet.setup.cplex_constants import *
+this_dirctory = os.path.dirname(__file__)
+
+def test_catalog_queries() -> None:
+    """Adds runs to an in-memory catalog and verifies the queries and aggregations."""
+    catalog = ResultsCatalog(":memory:")
+    for n_drones in [5, 10]:
+        for instance in range(3):
+            run_parameters = get_run_parameters(TEST_PARAMETERS, 3, n_drones, 10, 10, 1, instance)
+            metrics = {"status": OPTIMAL_SOLUTION, "objective_value": n_drones + instance, "distance": 1.0, "energy": 2.0, "solution_time": instance}
+            catalog.add_result(run_parameters, metrics, f"run_d_{n_drones}_i_{instance}.txt")
+    # An infeasible run is ignored by the aggregation
+    catalog.add_result(get_run_parameters(TEST_PARAMETERS, 3, 5, 10, 10, 1, 3), {"status": INFEASIBLE_SOLUTION, "objective_value": -1}, "run_d_5_i_3.txt")
+
+    results = catalog.get_results(where={"n_drones": 5})
+    assert len(results) == 4
+    assert set(results["instance"]) == {0, 1, 2, 3}
+    assert results["experiment_name"][0] == TEST_PARAMETERS["experiment_name"]
+
+    table = catalog.aggregate(group_by=["n_drones"], metrics=["objective_value", "solution_time"])
+    assert list(table["n_drones"]) == [5, 10]
+    assert list(table["n_runs"]) == [3, 3]
+    assert list(table["mean_objective_value"]) == [6, 11]
+    assert list(table["mean_solution_time"]) == [1, 1]
+
+    table = catalog.aggregate(group_by=["n_drones"], where={"n_drones": [10], "heights": TEST_PARAMETERS["heights"]})
+    assert list(table["n_drones"]) == [10]
+    assert np.isnan(table["mean_mip_gap"][0])
+    catalog.close()
+
+def test_catalog_parameters() -> None:
+    """Every parameter of a run is stored in its own column."""
+    catalog = ResultsCatalog(":memory:")
+    catalog.add_result(get_run_parameters(TEST_PARAMETERS, 3, 5, 10, 10, 1, 0), {"status": OPTIMAL_SOLUTION, "objective_value": 12.0}, "run.txt")
+    results = catalog.get_results()
+    for column, _ in PARAMETER_COLUMNS:
+        # The swept parameters are replaced by the values of the run
+        if column not in TEST_PARAMETERS or (isinstance(TEST_PARAMETERS[column], list) and column != "heights"):
+            continue
+        expected = str(TEST_PARAMETERS[column]) if column in ["heights", "base_station"] else TEST_PARAMETERS[column]
+        if expected is None:
+            assert results[column][0] is None or np.isnan(results[column][0]), column
+        else:
+            assert results[column][0] == expected, column
+    catalog.close()
+
+def test_unknown_columns() -> None:
+    """Column names that are not in the catalog are rejected before reaching the SQL queries."""
+    catalog = ResultsCatalog(":memory:")
+    with pytest.raises(ValueError):
+        catalog.get_results(where={"n_drones = 5 OR 1": 1})
+    with pytest.raises(ValueError):
+        catalog.get_results(columns=["n_drones", "sqlite_version()"])
+    with pytest.raises(ValueError):
+        catalog.aggregate(group_by=["n_drones; DROP TABLE results"])
+    with pytest.raises(ValueError):
+        catalog.aggregate(group_by=["n_drones"], metrics=["unknown"])
+    assert len(catalog.get_results(where={"n_drones": 5}, columns=["n_drones", "solution_file"])) == 0
+    catalog.close()
+
+def test_catalog_columns() -> None:
+    """Every key of the parameters dictionaries has a column."""
+    columns = [column for column, _ in PARAMETER_COLUMNS]
+    for parameters in [DEFAULT_PARAMETERS, TEST_PARAMETERS, EXPERIMENT_PARAMETERS, TEST_TIME_LIMIT]:
+        assert set(parameters) <= set(columns), set(parameters) - set(columns)
+
+def test_catalog_import() -> None:
+    """Imports an experiment directory with a text solution file written in the format of MilpModel.save_solution."""
+    experiment_dir = this_dirctory + "/out/test_catalog_experiment"
+    os.makedirs(experiment_dir, exist_ok=True)
+    with open(experiment_dir + "/parameters.txt", "w") as file:
+        file.write(str(TEST_PARAMETERS))
+    with open(experiment_dir + "/milp_solution_p_3_d_5_nt_10_t_5_v_10_alpha_0.5_i_2.txt", "w") as file:
+        file.write(f"{'Solution status:':<30} 101\n")
+        file.write(f"{'Objective function value:':<30} 123.5\n")
+        file.write(f"{'Total Distance:':<30} 100.0\n")
+        file.write(f"{'Total Energy:':<30} 300.0\n")
+        file.write(f"{'Time to reach the solution:':<30} 4.2\n")
+
+    catalog = ResultsCatalog(":memory:")
+    assert catalog.import_experiment(experiment_dir) == 1
+    results = catalog.get_results()
+    assert results["experiment_name"][0] == "test_catalog_experiment"
+    assert results["alpha"][0] == 0.5
+    assert results["instance"][0] == 2
+    assert results["status"][0] == OPTIMAL_SOLUTION
+    assert results["objective_value"][0] == 123.5
+    assert results["comm_range"][0] == TEST_PARAMETERS["comm_range"]
+    catalog.close()
+    shutil.rmtree(experiment_dir)
+
+def test_catalog_migration() -> None:
+    """A catalog created before the lp_bound column existed gains it when opened, and its runs have no bound."""
+    file_name = this_dirctory + "/out/test_catalog_migration.db"
+    catalog = ResultsCatalog(file_name)
+    catalog.connection.execute("DROP TABLE results")
+    catalog.connection.execute("CREATE TABLE results (experiment_name TEXT, objective_value REAL, solution_file TEXT, PRIMARY KEY (solution_file))")
+    catalog.connection.execute("INSERT INTO results VALUES ('old', 10.0, 'old.txt')")
+    catalog.connection.commit()
+    catalog.close()
+
+    catalog = ResultsCatalog(file_name)
+    catalog.add_result(get_run_parameters(TEST_PARAMETERS, 3, 5, 10, 10, 1, 0), {"status": OPTIMAL_SOLUTION, "objective_value": 12.0, "lp_bound": 11.5}, "new.txt")
+    results = catalog.get_results(columns=["experiment_name", "objective_value", "lp_bound"])
+    assert list(results["objective_value"]) == [10, 12]
+    assert np.isnan(results["lp_bound"][0])
+    assert results["lp_bound"][1] == 11.5
+    catalog.close()
+    os.remove(file_name)
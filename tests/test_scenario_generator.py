@@ -0,0 +1,39 @@
+import os
+import numpy as np
+from fanet.scenario_generator import *
+from fanet.trace_store import open_trace_store, load_trace
+this_dirctory = os.path.dirname(__file__)
+
+def test_generate_scenario() -> None:
+    """Generates a scenario with each mobility model in chunks and verifies it is inside the area, loads from the store and does not depend on the chunk size."""
+    file_name = this_dirctory + "/out/test_scenario.npy"
+    for mobility in MOBILITY_MODELS:
+        description = generate_scenario(file_name, 200, 25, 500, 10, mobility=mobility, chunk_size=7, seed=0, verbose=False)
+        open_trace_store.cache_clear()
+        positions, stored_description = open_trace_store(file_name)
+        assert positions.shape == (1, 200, 25, 2)
+        assert positions.min() >= 0 and positions.max() <= 500
+        assert stored_description["mobility"] == mobility
+        assert description["positions_per_second"] > 0
+        assert load_trace(file_name, 0).n_targets == 200
+        chunked_positions = np.array(positions)
+
+        generate_scenario(file_name, 200, 25, 500, 10, mobility=mobility, chunk_size=25, seed=0, verbose=False)
+        open_trace_store.cache_clear()
+        assert np.allclose(open_trace_store(file_name)[0], chunked_positions)
+    open_trace_store.cache_clear()
+    os.remove(file_name)
+    os.remove(file_name[:-4] + ".json")
+
+def test_mobility_models() -> None:
+    """Tests the speed of the random walk and the Gauss-Markov models and that the targets of a group stay close to each other."""
+    rng = np.random.default_rng(0)
+    positions = RandomWalkMobility(1000, 1e6, 5, 2, rng).next_chunk(10)
+    assert np.allclose(np.linalg.norm(np.diff(positions, axis=1), axis=2), 10)
+
+    positions = GaussMarkovMobility(1000, 1e6, 5, 1, rng).next_chunk(50)
+    assert abs(np.linalg.norm(np.diff(positions, axis=1), axis=2).mean() - 5) < 0.5
+
+    model = GroupMobility(1000, 10000, 5, 1, rng, n_groups=1, group_radius=50)
+    positions = model.next_chunk(20)
+    assert np.linalg.norm(positions - positions.mean(axis=0), axis=2).mean() < 100
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+from fanet.graph import Graph
+from fanet.solution import Solution, SOLUTION_DATA_FIELDS, TELEMETRY_COLUMNS, load_solution, load_solutions
+from fanet.energy_model import energy, energy_matrix
+from fanet.setup.cplex_constants import *
+
+def example_solution(deployment: list) -> Solution:
+    """Two deployment positions (25,50,10) and (75,50,10) plus the base station (0,0,0).
+
+    Args:
+        deployment: List of lists with the position index of each drone at each time step.
+
+    Returns:
+        Solution: Solution with the given deployment.
+    """
+    graph = Graph(100, [10], (0, 0, 0), 1, 100, np.tan(np.pi/6))
+    graph.deployment_positions = [(25, 50, 10), (75, 50, 10)]
+    distance_matrix = graph.get_distance_matrix()
+    hover = np.ones(distance_matrix.shape, dtype=bool)
+    hover[-1, :] = False
+    hover[:, -1] = False
+    return Solution(status=OPTIMAL_SOLUTION,
+                    objective_value=0,
+                    solution_time=0,
+                    deployment=np.array(deployment),
+                    positions=graph.deployment_positions + [graph.base_station],
+                    distance_matrix=distance_matrix,
+                    energy_matrix=energy_matrix(distance_matrix, 1, hover))
+
+def test_distance_matrix() -> None:
+    """Verifies the distance matrix agrees with Graph.get_distance and keeps the base station as the last position."""
+    graph = Graph(100, [10, 20], (0, 0, 0), 2, 100, np.tan(np.pi/6))
+    positions = graph.deployment_positions + [graph.base_station]
+    distance_matrix = graph.get_distance_matrix()
+    assert distance_matrix.shape == (len(positions), len(positions))
+    for i, p in enumerate(positions):
+        for j, q in enumerate(positions):
+            assert round(distance_matrix[i, j], 8) == round(graph.get_distance(p, q), 8)
+
+def test_energy_matrix() -> None:
+    """Verifies energy_matrix agrees with energy entry by entry."""
+    distance_matrix = np.array([[0, 71.4142842854285], [71.4142842854285, 0]])
+    hover = np.array([[True, False], [True, False]])
+    energies = energy_matrix(distance_matrix, 10, hover)
+    for index, d in np.ndenumerate(distance_matrix):
+        assert energies[index] == energy(d, 10, hover[index])
+
+def test_solution_costs() -> None:
+    """One drone goes base -> (25,50,10) -> (75,50,10) -> base. The other one stays at the base station."""
+    solution = example_solution([[0, 2], [1, 2]])
+    assert solution.get_drones_deployement() == [[(25, 50, 10), (0, 0, 0)], [(75, 50, 10), (0, 0, 0)]]
+    expected_distance = np.linalg.norm((25, 50, 10)) + 50 + np.linalg.norm((75, 50, 10))
+    assert round(solution.get_distance(), 5) == round(expected_distance, 5)
+    expected_energy = energy(np.linalg.norm((25, 50, 10)), 1, False) + energy(50, 1, True) + energy(np.linalg.norm((75, 50, 10)), 1, False)
+    assert round(solution.get_energy(), 5) == round(expected_energy, 5)
+
+def test_infeasible_solution() -> None:
+    """A solution without deployment reports -1 for its costs."""
+    solution = example_solution([[0]])
+    solution.deployment = None
+    assert not solution.is_feasible()
+    assert solution.get_distance() == -1
+    assert solution.get_energy() == -1
+
+def test_save_load_solution() -> None:
+    """Saves a feasible and an infeasible solution to .npz files and loads them back in bulk."""
+    out_dir = os.path.join(os.path.dirname(__file__), "out")
+    feasible = example_solution([[0, 2], [1, 2]])
+    feasible.mip_gap = 0.01
+    feasible.model_size = {"n_variables": 10, "n_constraints": 20, "n_nonzeros": 30}
+    feasible.lp_bound = 0.5
+    infeasible = example_solution([[0]])
+    infeasible.deployment = None
+    infeasible.status = INFEASIBLE_SOLUTION
+    feasible.save(os.path.join(out_dir, "test_solution_0.npz"))
+    infeasible.save(os.path.join(out_dir, "test_solution_1.npz"))
+
+    loaded = load_solution(os.path.join(out_dir, "test_solution_0.npz"))
+    assert set(loaded.keys()) == set(SOLUTION_DATA_FIELDS)
+    assert loaded["status"] == OPTIMAL_SOLUTION
+    assert loaded["distance"] == feasible.get_distance()
+    assert loaded["n_nonzeros"] == 30
+    assert loaded["lp_bound"] == 0.5
+    assert np.array_equal(loaded["deployment"], feasible.deployment)
+
+    sweep = load_solutions([os.path.join(out_dir, "test_solution_0.npz"), os.path.join(out_dir, "test_solution_1.npz")])
+    assert list(sweep["status"]) == [OPTIMAL_SOLUTION, INFEASIBLE_SOLUTION]
+    assert list(sweep["energy"]) == [feasible.get_energy(), -1]
+    assert sweep["deployment"][1].size == 0
+    assert np.isnan(sweep["lp_bound"][1])
+    os.remove(os.path.join(out_dir, "test_solution_0.npz"))
+    os.remove(os.path.join(out_dir, "test_solution_1.npz"))
+    assert [f for f in os.listdir(out_dir) if f.endswith(".tmp")] == []
+
+def test_save_load_telemetry() -> None:
+    """The telemetry is saved with the solution and as a .csv file. Files saved without telemetry and LP bound load with no records and a nan bound."""
+    out_dir = os.path.join(os.path.dirname(__file__), "out")
+    solution = example_solution([[0, 2], [1, 2]])
+    solution.telemetry = np.array([[0.5, 0, np.nan, 10, np.nan], [1.0, 20, 15, 12, 0.2], [2.0, 35, 15, 15, 0]])
+    solution.save(os.path.join(out_dir, "test_solution_telemetry.npz"))
+    solution.save_telemetry(os.path.join(out_dir, "test_solution_telemetry.csv"))
+    loaded = load_solution(os.path.join(out_dir, "test_solution_telemetry.npz"))
+    assert np.array_equal(loaded["telemetry"], solution.telemetry, equal_nan=True)
+    csv = np.genfromtxt(os.path.join(out_dir, "test_solution_telemetry.csv"), delimiter=",", names=True)
+    assert csv.dtype.names == TELEMETRY_COLUMNS
+    assert np.array_equal(csv["n_nodes"], [0, 20, 35])
+
+    data = solution.get_data()
+    np.savez(os.path.join(out_dir, "test_solution_telemetry.npz"), **{field: np.asarray(data[field]) for field in SOLUTION_DATA_FIELDS if field not in ("telemetry", "lp_bound")})
+    loaded = load_solution(os.path.join(out_dir, "test_solution_telemetry.npz"))
+    assert loaded["telemetry"].shape == (0, len(TELEMETRY_COLUMNS))
+    assert np.isnan(loaded["lp_bound"])
+    os.remove(os.path.join(out_dir, "test_solution_telemetry.npz"))
+    os.remove(os.path.join(out_dir, "test_solution_telemetry.csv"))
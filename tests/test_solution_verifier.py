@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from fanet.graph import Graph
+from fanet.milp_model import get_cost_matrices
+from fanet.solution import Solution
+from fanet.solution_verifier import verify_deployments, get_reachable, get_full_comm_adjacency
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.cplex_constants import OPTIMAL_SOLUTION
+
+def reference_checks(graph: Graph, trace: TargetsTrace, deployment: np.ndarray) -> tuple:
+    """Checks one deployment position by position with the methods of Graph. Returns (collision_free, connected, covered)."""
+    positions = graph.deployment_positions + [graph.base_station]
+    collision_free, connected, covered = True, True, True
+    for t, deployment_at_t in enumerate(deployment.tolist()):
+        used = [positions[index] for index in deployment_at_t if index < len(positions) - 1]
+        collision_free &= len(used) == len(set(used))
+        reached, queue = set(), [graph.base_station]
+        while queue:
+            position = queue.pop()
+            for neighbour in graph.get_positions_in_comm_range(position):
+                if neighbour in used and neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+        connected &= set(used) <= reached
+        covered &= all(set(graph.get_target_coverage(target)) & reached for target in trace.get_targets_positions_at_time(t))
+    return collision_free, connected, covered
+
+def test_verify_deployments() -> None:
+    """The batch checks agree with the checks of each deployment on its own, and the recomputed costs with Solution."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    rng = np.random.default_rng(0)
+    n_solutions, n_drones, observation_period = 200, 6, 2
+    traces = [TargetsTrace(1, observation_period, 10, 100, 1, seed=[0, i], graph=graph) for i in range(n_solutions)]
+    deployments = rng.integers(0, len(graph.deployment_positions) + 1, (n_solutions, observation_period, n_drones))
+    alpha, beta = 0.5, 0.08095
+    checks = verify_deployments(graph, np.stack([trace.get_positions() for trace in traces]), deployments, 1, alpha, beta, chunk_size=64)
+    assert checks["feasible"].any() and not checks["feasible"].all()
+    distance_matrix, energy_matrix = get_cost_matrices(graph, 1)
+    for i in range(n_solutions):
+        assert (checks["collision_free"][i], checks["connected"][i], checks["covered"][i]) == reference_checks(graph, traces[i], deployments[i])
+        solution = Solution(OPTIMAL_SOLUTION, 0, 0, deployments[i], graph.deployment_positions + [graph.base_station], distance_matrix, energy_matrix)
+        assert np.isclose(checks["distance"][i], solution.get_distance())
+        assert np.isclose(checks["energy"][i], solution.get_energy())
+        assert np.isclose(checks["objective_value"][i], (1 - alpha) * solution.get_distance() + alpha * beta * solution.get_energy())
+
+def test_verify_objective() -> None:
+    """A reported objective value is only accepted if it matches the deployment. Deployments with an unknown position are rejected."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    trace = TargetsTrace(2, 2, 10, 100, 1, seed=0, graph=graph)
+    deployments = np.array([[[0, 9], [1, 9]], [[4, 9], [4, 4]]])
+    objective_value = verify_deployments(graph, trace.get_positions(), deployments, 1, 0, 1)["objective_value"]
+    checks = verify_deployments(graph, trace.get_positions(), deployments, 1, 0, 1, objective_values=objective_value + [0, 1e-3])
+    assert checks["objective_match"].tolist() == [True, False]
+    assert checks["collision_free"].tolist() == [True, False]
+    with pytest.raises(ValueError):
+        verify_deployments(graph, trace.get_positions(), deployments + 1, 1, 0, 1)
+
+def test_reachable_relay() -> None:
+    """A position out of range of the base station is only reached through a relay."""
+    graph = Graph(100, [10], (0, 0, 0), 1, 40, np.pi/6)
+    graph.deployment_positions = [(20, 20, 10), (45, 40, 10), (90, 90, 10)]
+    adjacency = get_full_comm_adjacency(graph)
+    assert (adjacency == adjacency.T).all() and not adjacency.diagonal().any()
+    occupied = np.array([[True, True, True, False], [False, True, False, False]])
+    assert get_reachable(occupied, adjacency).tolist() == [[True, True, False, True], [False, False, False, True]]
@@ -0,0 +1,68 @@
+from fanet.solver_service import SolverService, SolverServer, WarmMilpModel, request_deployment
+from fanet.graph import Graph
+from fanet.milp_model import MilpModel
+from fanet.targets_trace import TargetsTrace
+from fanet.setup.config import PARAMETERS
+from urllib import error as url_error
+import json
+import threading
+import numpy as np
+import pytest
+
+def start_server() -> SolverServer:
+    """Starts a service with one worker behind a server on a free port."""
+    parameters = dict(PARAMETERS, area_size=100, heights=[10], base_station=(0, 0, 0), comm_range=100, coverage_angle=np.pi/6, time_step_delta=1, cplex_time_limit=60)
+    service = SolverService(parameters)
+    service.start()
+    server = SolverServer(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def stop_server(server: SolverServer) -> None:
+    server.shutdown()
+    server.server_close()
+    server.service.stop()
+
+def test_invalid_request() -> None:
+    """A request without positions is rejected before reaching the workers."""
+    server = start_server()
+    with pytest.raises(url_error.HTTPError) as error:
+        request_deployment(np.zeros((1, 1, 3)), 1, port=server.server_address[1])
+    assert error.value.code == 400
+    assert "positions" in json.loads(error.value.read())["error"]
+    assert server.service.get_status()["n_received"] == 0
+    stop_server(server)
+
+def test_solve_requests() -> None:
+    """One target under (33,33,10) then under (67,67,10) on a 2x2 grid: the drone follows it. The second request, with the target moving back, reuses the graph and the model of the first one."""
+    server = start_server()
+    positions = np.array([[[33, 33], [67, 67]]])
+    response = request_deployment(positions, 1, alpha=0, n_positions=2, port=server.server_address[1])
+    assert response["deployment"].tolist() == [[0], [3]]
+    assert not response["timing"]["graph_cached"] and not response["timing"]["model_cached"]
+    response = request_deployment(positions[:, ::-1], 1, alpha=0, n_positions=2, port=server.server_address[1])
+    assert response["deployment"].tolist() == [[3], [0]]
+    assert response["timing"]["graph_cached"] and response["timing"]["model_cached"]
+    assert response["timing"]["total_time"] >= response["timing"]["build_time"]
+    assert server.service.get_status()["n_solved"] == 2
+    assert server.service.get_status()["n_models"] == 1
+    stop_server(server)
+
+def test_warm_model() -> None:
+    """A WarmMilpModel with the targets of a trace has the size and the optimum of the MilpModel of the trace."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    model = WarmMilpModel(3, 4, 1, graph, 0.5, 0.08095, 3)
+    model.model_shut_up()
+    model.build_model()
+    for seed in range(2):
+        trace = TargetsTrace(3, 4, 10, 100, 1, seed=seed, graph=graph)
+        reference = MilpModel(3, 4, 1, trace, graph, 0.5, 0.08095)
+        reference.model_shut_up()
+        reference.build_model()
+        reference.solve_model()
+        model.set_targets(np.transpose(trace.get_positions(), (1, 0, 2)))
+        model.solve_model()
+        assert model.get_model_size() == reference.get_model_size()
+        assert np.isclose(model.get_objective_value(), reference.get_objective_value())
+        reference.cplex_finish()
+    model.cplex_finish()
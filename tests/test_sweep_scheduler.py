@@ -0,0 +1,52 @@
+import os
+from fanet.sweep_scheduler import *
+from fanet.setup.parameters import TEST_PARAMETERS
+this_dirctory = os.path.dirname(__file__)
+
+def example_scheduler() -> SweepScheduler:
+    """Scheduler over a sweep of 2 grid sizes x 2 instances with its manifest in the tests output directory."""
+    parameters = dict(TEST_PARAMETERS)
+    parameters["n_positions"] = [4, 3]
+    parameters["n_instances"] = 2
+    parameters["experiment_name"] = "test_sweep_scheduler"
+    manifest_file = this_dirctory + "/out/test_manifest.json"
+    if os.path.isfile(manifest_file):
+        os.remove(manifest_file)
+    return SweepScheduler(parameters, manifest_file=manifest_file, max_attempts=2, catalog_file=this_dirctory + "/out/missing_catalog.sqlite")
+
+def test_cost_ordering() -> None:
+    """Without history, runs are ordered by model size, so the smaller grid comes first."""
+    scheduler = example_scheduler()
+    scheduler.update_jobs()
+    jobs = scheduler.get_pending_jobs()
+    assert len(jobs) == 4
+    assert [job["n_positions"] for job in jobs] == [3, 3, 4, 4]
+    # Past solution times take precedence over the model size
+    history = {(4, 5, 10): 1.0, (3, 5, 10): 100.0}
+    assert predict_cost(jobs[0], scheduler.parameters, history) > predict_cost(jobs[-1], scheduler.parameters, history)
+    job = {"n_positions": 5, "n_drones": 5, "n_targets": 10}
+    assert predict_cost(job, scheduler.parameters, history) > 0
+    os.remove(scheduler.manifest_file)
+
+def test_retry_and_resume() -> None:
+    """A failed run is retried until max_attempts. Runs left running by a killed session become pending again."""
+    scheduler = example_scheduler()
+    scheduler.update_jobs()
+    job, other_job = scheduler.get_pending_jobs()[:2]
+    scheduler.on_job_started(job)
+    scheduler.on_job_finished(job, -9)
+    assert scheduler.manifest[get_job_key(job)]["status"] == JOB_PENDING
+    scheduler.on_job_started(job)
+    scheduler.on_job_finished(job, 1)
+    assert scheduler.manifest[get_job_key(job)]["status"] == JOB_FAILED
+    assert scheduler.manifest[get_job_key(job)]["exit_codes"] == [-9, 1]
+    scheduler.on_job_started(other_job)
+
+    # The session is killed and a new one loads the manifest
+    resumed = SweepScheduler(scheduler.parameters, manifest_file=scheduler.manifest_file, catalog_file=scheduler.catalog_file)
+    assert resumed.get_summary() == {JOB_PENDING: 2, JOB_RUNNING: 1, JOB_DONE: 0, JOB_FAILED: 1, JOB_SKIPPED: 0}
+    resumed.update_jobs()
+    assert resumed.get_summary() == {JOB_PENDING: 3, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 1, JOB_SKIPPED: 0}
+    resumed.update_jobs(retry_failed=True)
+    assert resumed.get_summary()[JOB_PENDING] == 4
+    os.remove(scheduler.manifest_file)
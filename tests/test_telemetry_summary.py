@@ -0,0 +1,36 @@
+import os
+import shutil
+import numpy as np
+from fanet.solution import Solution
+from fanet.telemetry_summary import get_time_to_first_feasible, get_time_to_gap, get_run_times, summarize_runs
+from fanet.setup.cplex_constants import *
+
+TELEMETRY = np.array([[0.5, 0, np.nan, 10, np.nan],
+                      [1.0, 20, 20, 12, 0.4],
+                      [3.0, 35, 15, 14.9, 0.006],
+                      [4.0, 40, 15, 15, 0]])
+
+def test_times() -> None:
+    """The first feasible solution is found after 1 s, the 1% gap reached after 3 s and 0.1% after 4 s."""
+    assert get_time_to_first_feasible(TELEMETRY) == 1.0
+    assert get_time_to_gap(TELEMETRY, 0.01) == 3.0
+    assert get_time_to_gap(TELEMETRY, 0.001) == 4.0
+    assert np.isnan(get_time_to_first_feasible(TELEMETRY[:1]))
+    assert np.isnan(get_time_to_gap(TELEMETRY[:2], 0.01))
+
+def test_summarize_runs() -> None:
+    """Two runs of a 3x3 grid, one of them never feasible, and one run of a 4x4 grid."""
+    out_dir = os.path.join(os.path.dirname(__file__), "out", "test_telemetry_summary")
+    os.makedirs(out_dir, exist_ok=True)
+    for n_positions, instance, telemetry in ((3, 0, TELEMETRY), (3, 1, TELEMETRY[:1]), (4, 0, TELEMETRY)):
+        solution = Solution(OPTIMAL_SOLUTION, 15, telemetry[-1, 0], None, [], np.zeros((1, 1)), np.zeros((1, 1)), telemetry=telemetry)
+        solution.save(os.path.join(out_dir, f"milp_solution_p_{n_positions}_d_3_nt_5_t_5_v_10_alpha_0.5_i_{instance}.npz"))
+    runs = get_run_times(out_dir, 0.01)
+    assert len(runs) == 3
+    summary = summarize_runs(runs, ["n_positions"])
+    assert list(summary.keys()) == [(3,), (4,)]
+    assert summary[(3,)]["n_runs"] == 2
+    assert summary[(3,)]["feasible_fraction"] == 0.5
+    assert summary[(3,)]["time_to_gap_p100"] == 3.0
+    assert summary[(4,)]["time_to_first_feasible_p50"] == 1.0
+    shutil.rmtree(out_dir)
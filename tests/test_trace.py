@@ -1,6 +1,8 @@
 import os
 this_dirctory = os.path.dirname(__file__)
-from fanet.targets_trace import TargetsTrace
+from fanet.targets_trace import TargetsTrace, generate_positions, generate_positions_batch, generate_covered_positions, reflect
+from fanet.graph import Graph
+import numpy as np
 
 def test_trace_creation() -> None:
     """Creates a trace file, saves it and then loads it again. Verifies that the loaded trace is the same as the original one.
@@ -53,3 +55,68 @@ def test_trace_within_bounds() -> None:
         for position in target_trace:
             assert position[0] >= 0 and position[0] <= area_size
             assert position[1] >= 0 and position[1] <= area_size
+
+def test_seeded_traces() -> None:
+    """Tests if the same seed gives the same trace and if each instance of a batch can be generated on its own."""
+    assert TargetsTrace(10, 5, 20, 100, seed=1).trace_set == TargetsTrace(10, 5, 20, 100, seed=1).trace_set
+    assert TargetsTrace(10, 5, 20, 100, seed=1).trace_set != TargetsTrace(10, 5, 20, 100, seed=2).trace_set
+    batch = generate_positions_batch(4, 10, 5, 20, 100, seed=3)
+    assert batch.shape == (4, 10, 5, 2)
+    assert np.array_equal(batch[2], generate_positions(10, 5, 20, 100, seed=[3, 2]))
+    assert TargetsTrace(10, 5, 20, 100, seed=[3, 2]).trace_set == TargetsTrace.from_positions(batch[2], 20, 100).trace_set
+
+def test_vectorized_positions() -> None:
+    """Tests if the reflection is symmetric, has a period of twice the area size and stays in the area, and if the targets move target_speed * time_step_delta per time step away from the walls."""
+    coordinates = np.linspace(-45, 45, 181)
+    reflected = reflect(coordinates, 10)
+    assert reflected.min() >= 0 and reflected.max() <= 10
+    assert np.allclose(reflect(-coordinates, 10), reflected)
+    assert np.allclose(reflect(coordinates + 20, 10), reflected)
+    assert np.allclose(reflect(np.linspace(0, 10, 21), 10), np.linspace(0, 10, 21))
+
+    positions = generate_positions(1000, 10, 2, 1000, 0.5, seed=0)
+    assert positions.min() >= 0 and positions.max() <= 1000
+    steps = np.linalg.norm(np.diff(positions, axis=1), axis=2)
+    away_from_walls = (positions[:, 1:].min(axis=2) > 1) & (positions[:, 1:].max(axis=2) < 999)
+    assert np.allclose(steps[away_from_walls], 1)
+
+def test_covered_positions() -> None:
+    """Tests if traces restricted to the coverage of a graph are feasible, keep the speed of the targets and start uniformly over the covered area."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    sensors_trace = TargetsTrace(100, 5, 10, 100, seed=0, graph=graph)
+    assert graph.verify_trace_feasiblity(sensors_trace.trace_set)
+    positions = sensors_trace.get_positions()
+    steps = np.linalg.norm(np.diff(positions, axis=1), axis=2)
+    away_from_walls = (positions[:, 1:].min(axis=2) > 10) & (positions[:, 1:].max(axis=2) < 90)
+    assert np.allclose(steps[away_from_walls], 10)
+
+    # Share of the initial positions in each cell of a 5x5 grid against the share of the covered area in the cell
+    initial_positions = generate_covered_positions(graph, 50000, 1, 10, 100, seed=1)[:, 0]
+    cells = np.minimum(initial_positions // 20, 4).astype(int)
+    shares = np.bincount(cells[:, 0] * 5 + cells[:, 1], minlength=25) / len(initial_positions)
+    grid = np.stack(np.meshgrid(np.arange(0.25, 100, 0.5), np.arange(0.25, 100, 0.5), indexing="ij"), axis=2)
+    covered_area = graph.is_covered(grid).reshape(5, 40, 5, 40).sum(axis=(1, 3)).flatten()
+    assert np.allclose(shares, covered_area / covered_area.sum(), atol=0.005)
+
+class CountingGraph:
+    """Graph whose is_covered counts the positions it checks. generate_covered_positions checks every position it draws once."""
+
+    def __init__(self, graph: Graph) -> None:
+        self.graph = graph
+        self.n_checked = 0
+
+    def is_covered(self, positions: np.ndarray) -> np.ndarray:
+        self.n_checked += positions.size // 2
+        return self.graph.is_covered(positions)
+
+def test_covered_positions_draws() -> None:
+    """At 50 and 100 targets almost no unrestricted trace is feasible, so whole-trace rejection would draw each position more than 100 times. Restricting the trace to the coverage draws each position a few times. The timing is in benchmarks/benchmark_traces.py."""
+    graph = Graph(100, [45], (0, 0, 0), 3, 60, np.pi/6)
+    for n_targets in [50, 100]:
+        acceptance = graph.is_covered(generate_positions_batch(1000, n_targets, 5, 10, 100, seed=0)).all(axis=(1, 2)).mean()
+        assert acceptance < 0.01
+        for instance in range(10):
+            counting_graph = CountingGraph(graph)
+            positions = generate_covered_positions(counting_graph, n_targets, 5, 10, 100, seed=instance)
+            assert graph.is_covered(positions).all()
+            assert counting_graph.n_checked < 10 * positions.size // 2
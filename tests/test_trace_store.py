@@ -0,0 +1,29 @@
+import os
+import numpy as np
+from fanet.trace_store import *
+this_dirctory = os.path.dirname(__file__)
+
+def test_trace_store() -> None:
+    """Converts text traces to a store and verifies that every instance loads back the same trace, memory-mapped."""
+    trace_files = []
+    for instance in range(3):
+        trace = TargetsTrace(5, 4, 20, 100, seed=instance)
+        trace_files.append(this_dirctory + f"/out/test_store_trace_{instance}.txt")
+        trace.save_trace(trace_files[-1])
+    file_name = this_dirctory + "/out/test_trace_store.npy"
+    convert_text_traces(trace_files, file_name)
+    open_trace_store.cache_clear()
+
+    positions, description = open_trace_store(file_name)
+    assert isinstance(positions, np.memmap)
+    assert positions.shape == (3, 5, 4, 2)
+    assert description["n_instances"] == 3
+    for instance, trace_file in enumerate(trace_files):
+        text_trace = TargetsTrace(load_file=trace_file)
+        store_trace = load_trace(file_name, instance)
+        assert store_trace.trace_set == text_trace.trace_set
+        assert (store_trace.n_targets, store_trace.observation_period, store_trace.target_speed, store_trace.area_size, store_trace.time_step_delta) == (text_trace.n_targets, text_trace.observation_period, text_trace.target_speed, text_trace.area_size, text_trace.time_step_delta)
+        os.remove(trace_file)
+    open_trace_store.cache_clear()
+    os.remove(file_name)
+    os.remove(file_name[:-4] + ".json")